@@ -0,0 +1,354 @@
+"""Die and reticle assembly with array instances.
+
+Placing every copy of a device with its own `c << cell` instance makes reticles
+with thousands of identical devices slow to build and large to write. A
+:py:class:`Die` places repeated cells as :py:class:`klayout.db.CellInstArray`
+instead::
+
+    die = Die(size=(10_000, 10_000))
+    mzis = die.place_array(mzi(), (100, 100), pitch=(500, 300), columns=16, rows=30)
+    gcs = die.place(grating(), [(50, 0), (177, 0), (304, 0), (50, 500)])
+    mzis.port("o1", 3, 7)
+
+Irregular positions are split into regular runs (rows with a constant pitch),
+each of which is one array instance. The ports of the elements are not copied
+into the die; :py:meth:`Placement.port` transforms a port of the placed cell when
+it is looked up.
+
+Every placement is checked against the die boundary and against the bounding
+boxes of all previous placements. The copies of an array are checked against
+each other from the pitch and the bounding box of the cell. The boxes of the
+previous placements are kept in a box-tree index (a
+:py:class:`klayout.db.Shapes` container), which is queried once per array with
+the bounding box of the array; only the placements found there are compared
+with the copies.
+
+A reticle is a die of dies::
+
+    reticle = Die(size=(26_000, 33_000))
+    reticle.place_array(die.c, (0, 0), pitch=(10_000, 10_000), columns=2, rows=3)
+"""
+
+from collections.abc import Iterable, Iterator, Sequence
+
+from kfactory import KCell, kdb
+from kfactory.kcell import Instance, Port
+
+__all__ = ["PlacementError", "Placement", "Die", "regular_runs"]
+
+
+class PlacementError(ValueError):
+    """Raised if a placement leaves the die or overlaps another placement."""
+
+
+class Placement:
+    """One or more array instances of the same cell.
+
+    Attributes:
+        cell: The placed cell.
+        insts: The array instances.
+    """
+
+    def __init__(self, cell: KCell, insts: Sequence[Instance]) -> None:
+        """Create a placement from array instances of a cell."""
+        self.cell = cell
+        self.insts = list(insts)
+
+    def __len__(self) -> int:
+        """Number of placed copies of the cell."""
+        return sum(inst.size() for inst in self.insts)
+
+    def each_trans(self) -> Iterator[kdb.Trans]:
+        """Transformation of every copy, run by run and row by row."""
+        for inst in self.insts:
+            yield from inst.cell_inst.each_trans()
+
+    def trans(self, ia: int = 0, ib: int = 0, run: int = 0) -> kdb.Trans:
+        """Transformation of one copy.
+
+        Args:
+            ia: Index along the `a` vector of the array.
+            ib: Index along the `b` vector of the array.
+            run: Index of the array instance for irregular placements.
+        """
+        inst = self.insts[run]
+        na, nb = max(inst.na, 1), max(inst.nb, 1)
+        if not (0 <= ia < na and 0 <= ib < nb):
+            raise IndexError(f"({ia}, {ib}) is out of range for a {na}x{nb} array")
+        return kdb.Trans(inst.a * ia + inst.b * ib) * inst.trans
+
+    def port(self, name: str, ia: int = 0, ib: int = 0, run: int = 0) -> Port:
+        """Port of one copy in the coordinates of the die.
+
+        Args:
+            name: Name of the port in the placed cell.
+            ia: Index along the `a` vector of the array.
+            ib: Index along the `b` vector of the array.
+            run: Index of the array instance for irregular placements.
+        """
+        return self.cell.ports[name].copy(self.trans(ia, ib, run))
+
+    def ports(self, name: str) -> Iterator[Port]:
+        """Port `name` of every copy, in the order of :py:meth:`each_trans`."""
+        port = self.cell.ports[name]
+        for trans in self.each_trans():
+            yield port.copy(trans)
+
+
+def regular_runs(points: Iterable[tuple[int, int]]) -> list[tuple[int, int, int, int]]:
+    """Split points into horizontal runs with a constant pitch.
+
+    Points are grouped by their y coordinate and every group is split greedily
+    into runs where consecutive points have the same distance.
+
+    Args:
+        points: Positions. [dbu]
+
+    Returns:
+        List of `(x, y, pitch, count)`. `pitch` is 0 for single points.
+    """
+    rows: dict[int, list[int]] = {}
+    for x, y in points:
+        rows.setdefault(y, []).append(x)
+    runs: list[tuple[int, int, int, int]] = []
+    for y in sorted(rows):
+        xs = sorted(set(rows[y]))
+        i = 0
+        while i < len(xs):
+            if i + 1 == len(xs):
+                runs.append((xs[i], y, 0, 1))
+                break
+            pitch = xs[i + 1] - xs[i]
+            j = i + 1
+            while j + 1 < len(xs) and xs[j + 1] - xs[j] == pitch:
+                j += 1
+            runs.append((xs[i], y, pitch, j - i + 1))
+            i = j + 1
+    return runs
+
+
+_BOXES = kdb.Shapes.SBoxes
+
+
+def _overlapping(
+    lo: int, hi: int, start: int, end: int, step: int, n: int
+) -> int | None:
+    """First copy of an interval repeated with a step which overlaps another.
+
+    Args:
+        lo: Start of the other interval.
+        hi: End of the other interval.
+        start: Start of the first copy.
+        end: End of the first copy.
+        step: Offset between the copies.
+        n: Number of copies.
+
+    Returns:
+        The index of a copy whose interior overlaps `(lo, hi)`, `None` if none.
+    """
+    if step < 0:
+        return _overlapping(-hi, -lo, -end, -start, -step, n)
+    if step == 0 or n == 1:
+        return 0 if start < hi and end > lo else None
+    first = max(0, (lo - end) // step + 1)
+    last = min(n - 1, -((start - hi) // step) - 1)
+    return first if first <= last else None
+
+
+def _check_copies(cell: KCell, boxes: Sequence[kdb.Box], spacing: int) -> None:
+    """Check equally sized boxes against each other in a grid of their size."""
+    w = boxes[0].width() + spacing or 1
+    h = boxes[0].height() + spacing or 1
+    grid: dict[tuple[int, int], list[kdb.Box]] = {}
+    for box in boxes:
+        x, y = box.left // w, box.bottom // h
+        for key in ((x + i, y + j) for i in (-1, 0, 1) for j in (-1, 0, 1)):
+            for other in grid.get(key, ()):
+                if (
+                    abs(other.left - box.left) < w
+                    and abs(other.bottom - box.bottom) < h
+                ):
+                    raise PlacementError(
+                        f"{cell.name} at {box} overlaps a placement at {other}"
+                    )
+        grid.setdefault((x, y), []).append(box)
+
+
+class Die:
+    """A die (or reticle) populated with array instances.
+
+    Attributes:
+        c: The die cell.
+        box: Boundary of the die. [dbu]
+        placements: All placements in order.
+    """
+
+    def __init__(
+        self,
+        size: tuple[float, float],
+        c: KCell | None = None,
+        origin: tuple[float, float] = (0, 0),
+        spacing: float = 0,
+    ) -> None:
+        """Create a die.
+
+        Args:
+            size: Width and height of the die. [um]
+            c: Cell to place into. `None` creates a new cell.
+            origin: Lower left corner of the die. [um]
+            spacing: Minimum distance between the bounding boxes of placed
+                cells. [um]
+        """
+        self.c = c or KCell()
+        self.box = kdb.DBox(
+            origin[0], origin[1], origin[0] + size[0], origin[1] + size[1]
+        ).to_itype(self.c.kcl.dbu)
+        self.spacing = round(spacing / self.c.kcl.dbu)
+        self.placements: list[Placement] = []
+        self._index = kdb.Shapes()
+
+    def _check(
+        self,
+        cell: KCell,
+        arrays: Sequence[tuple[kdb.Trans, kdb.Vector, kdb.Vector, int, int]],
+    ) -> None:
+        """Check arrays of a cell against the boundary, each other and the index.
+
+        Args:
+            cell: The placed cell.
+            arrays: `(trans, a, b, na, nb)` of each array, `a` along x and `b`
+                along y.
+        """
+        cell_box = cell.bbox()
+        if cell_box.empty():
+            return
+        s = self.spacing
+        boxes: list[kdb.Box] = []
+        for trans, a, b, na, nb in arrays:
+            box = cell_box.transformed(trans)
+            array_box = box + box.moved(a * (na - 1) + b * (nb - 1))
+            if not array_box.inside(self.box):
+                raise PlacementError(
+                    f"{cell.name} at {array_box} is outside of the die {self.box}"
+                )
+            for n, pitch in ((na, a), (nb, b)):
+                if (
+                    n > 1
+                    and abs(pitch.x) < box.width() + s
+                    and abs(pitch.y) < box.height() + s
+                ):
+                    raise PlacementError(
+                        f"{cell.name} overlaps itself with the pitch {pitch}"
+                    )
+            query = array_box.enlarged(s, s)
+            for shape in self._index.each_overlapping(_BOXES, query):
+                other = shape.box
+                ia = _overlapping(
+                    other.left - s, other.right + s, box.left, box.right, a.x, na
+                )
+                ib = _overlapping(
+                    other.bottom - s, other.top + s, box.bottom, box.top, b.y, nb
+                )
+                if ia is not None and ib is not None:
+                    raise PlacementError(
+                        f"{cell.name} at {box.moved(a * ia + b * ib)} overlaps "
+                        f"a placement at {other}"
+                    )
+            boxes.extend(
+                box.moved(a * ia + b * ib) for ib in range(nb) for ia in range(na)
+            )
+        if len(arrays) > 1:
+            _check_copies(cell, boxes, s)
+        for box in boxes:
+            self._index.insert(box)
+
+    def place_array(
+        self,
+        cell: KCell,
+        origin: tuple[float, float],
+        pitch: tuple[float, float],
+        columns: int = 1,
+        rows: int = 1,
+        trans: kdb.Trans = kdb.Trans(),
+    ) -> Placement:
+        """Place a cell as a regular array.
+
+        Args:
+            cell: Cell to place.
+            origin: Position of the first copy. [um]
+            pitch: Horizontal and vertical pitch. [um]
+            columns: Number of copies along x.
+            rows: Number of copies along y.
+            trans: Rotation/mirroring of every copy, applied before the shift.
+
+        Raises:
+            PlacementError: If a copy is outside of the die or overlaps a
+                previous placement.
+        """
+        dbu = self.c.kcl.dbu
+        trans = kdb.Trans(kdb.DVector(*origin).to_itype(dbu)) * trans
+        a = kdb.DVector(pitch[0], 0).to_itype(dbu)
+        b = kdb.DVector(0, pitch[1]).to_itype(dbu)
+        self._check(cell, [(trans, a, b, columns, rows)])
+        inst = self.c.create_inst(cell, trans, a=a, b=b, na=columns, nb=rows)
+        placement = Placement(cell, [inst])
+        self.placements.append(placement)
+        return placement
+
+    def place(
+        self,
+        cell: KCell,
+        positions: Iterable[tuple[float, float]],
+        trans: kdb.Trans = kdb.Trans(),
+    ) -> Placement:
+        """Place a cell at irregular positions.
+
+        The positions are split into horizontal runs with a constant pitch
+        (:py:func:`regular_runs`), each placed as one array instance.
+
+        Args:
+            cell: Cell to place.
+            positions: Positions of the copies. [um]
+            trans: Rotation/mirroring of every copy, applied before the shift.
+
+        Raises:
+            PlacementError: If a copy is outside of the die or overlaps a
+                previous placement.
+        """
+        dbu = self.c.kcl.dbu
+        runs = regular_runs((round(x / dbu), round(y / dbu)) for x, y in positions)
+        self._check(
+            cell,
+            [
+                (kdb.Trans(x, y) * trans, kdb.Vector(pitch, 0), kdb.Vector(), n, 1)
+                for x, y, pitch, n in runs
+            ],
+        )
+        insts = [
+            (
+                self.c.create_inst(
+                    cell,
+                    kdb.Trans(x, y) * trans,
+                    a=kdb.Vector(pitch, 0),
+                    b=kdb.Vector(),
+                    na=n,
+                )
+                if n > 1
+                else self.c.create_inst(cell, kdb.Trans(x, y) * trans)
+            )
+            for x, y, pitch, n in runs
+        ]
+        placement = Placement(cell, insts)
+        self.placements.append(placement)
+        return placement
+
+
+if __name__ == "__main__":
+    from kgeneric import cells
+
+    die = Die(size=(5000, 5000))
+    mzis = die.place_array(
+        cells.mzi(), (200, 200), pitch=(300, 150), columns=10, rows=25
+    )
+    print(len(mzis), mzis.port("o1", 9, 24))
+    die.c.show()
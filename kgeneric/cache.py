@@ -0,0 +1,470 @@
+"""Bounded cache of the cells created by kgeneric factories.
+
+Every `@cell` factory caches its cells by their parameters, so in long sessions
+(notebooks, the cell service, sweeps over `bend_euler` radii) the layout only
+grows. The cells of all kgeneric factories are tracked in least recently used
+order. With a limit set::
+
+    set_cache_limit(max_cells=10_000, max_bytes=500 * 2**20)
+
+the least recently used cells are deleted from the layout and from the caches of
+their factories whenever a top level factory call returns and the limit is
+exceeded. Only cells which are not instantiated in another cell, not pinned and
+not referenced outside of the caches (e.g. by a variable of the caller) are
+evicted; the children of an evicted cell can be evicted in turn. Use
+:py:func:`pin` to keep cells which are neither instantiated nor referenced.
+
+The memory of a cell is estimated from its shapes and instances
+(:py:func:`cell_memory`), the estimate is only calculated if `max_bytes` is set
+or the memory is queried. The number and memory of the cells are kept as running
+totals, a factory call only scans the cells if a limit is exceeded.
+
+:py:func:`cache_scope` releases the cells created in a block, e.g. one iteration
+of a sweep::
+
+    for delta_length in delta_lengths:
+        with cache_scope() as scope:
+            c = mzi(delta_length=delta_length)
+            lengths.append(c.info["length_um"])
+
+Cells created in the scope are deleted on exit unless they are instantiated in
+a cell created before the scope or passed to :py:meth:`CacheScope.keep`.
+
+:py:func:`prune` deletes every cell of the layout of the given top cells which is
+not reachable from them, e.g. the straights and bends left behind after
+flattening. The deleted cells are removed from the caches of all
+:py:func:`kfactory.cell` factories, not only those of kgeneric::
+
+    c.flatten()
+    reclaimed = prune(c)
+"""
+
+import gc
+import inspect
+import sys
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+from cachetools.keys import hashkey
+from kfactory import KCell, KCLayout, kdb
+
+__all__ = [
+    "CacheInfo",
+    "CacheScope",
+    "PruneResult",
+    "cache_info",
+    "cache_limit",
+    "cache_scope",
+    "cell_memory",
+    "factory_cache",
+    "pin",
+    "prune",
+    "release",
+    "set_cache_limit",
+    "track",
+    "tracking",
+    "unreachable",
+    "unpin",
+]
+
+# rough sizes of klayout objects [bytes]
+_CELL_BYTES = 256
+_SHAPE_BYTES = 48
+_POINT_BYTES = 8
+_INSTANCE_BYTES = 64
+
+Key = tuple[int, int]
+
+# type of the keys of the caches of `kfactory.cell`
+_HashKey = type(hashkey())
+
+
+@dataclass
+class _Entry:
+    cell: KCell
+    cache: dict[Any, KCell]
+    memory: int | None = None
+
+
+@dataclass
+class CacheScope:
+    """Cells created inside a :py:func:`cache_scope`."""
+
+    cells: list[KCell] = field(default_factory=list)
+    kept: set[Key] = field(default_factory=set)
+
+    def keep(self, *cells: KCell) -> None:
+        """Keep cells (and their children) after the scope."""
+        for c in cells:
+            self.kept.add(_key(c))
+            self.kept.update((id(c.kcl), ci) for ci in c.called_cells())
+
+
+class CacheInfo(NamedTuple):
+    """State of the cell cache."""
+
+    cells: int
+    memory: int
+    evicted: int
+    max_cells: int | None
+    max_bytes: int | None
+
+
+class PruneResult(NamedTuple):
+    """Cells deleted by :py:func:`prune`."""
+
+    cells: int
+    memory: int
+
+
+_entries: OrderedDict[Key, _Entry] = OrderedDict()
+_pinned: set[Key] = set()
+_scopes: list[CacheScope] = []
+_max_cells: int | None = None
+_max_bytes: int | None = None
+_depth = 0
+_evicted = 0
+# estimated memory of the entries whose memory is known [bytes]
+_bytes = 0
+
+
+def _key(c: KCell) -> Key:
+    return id(c.kcl), c.cell_index()
+
+
+def _alive(c: KCell) -> bool:
+    return not c._kdb_cell._destroyed()
+
+
+def factory_cache(factory: Callable[..., KCell]) -> dict[Any, KCell] | None:
+    """The parameter cache of a function decorated by :py:func:`kfactory.cell`."""
+    cache = inspect.getclosurevars(factory).nonlocals.get("cache")
+    return cache if isinstance(cache, dict) else None
+
+
+def cell_memory(c: KCell) -> int:
+    """Estimated memory of a cell without its children. [bytes]"""
+    memory = _CELL_BYTES + _INSTANCE_BYTES * int(c.child_instances())
+    # `c.shapes(layer)` would create an empty container for every layer
+    it = kdb.RecursiveShapeIterator(c.kcl.layout, c._kdb_cell, c.kcl.layer_indexes())
+    it.max_depth = 0
+    for item in it.each():
+        shape = item.shape()
+        memory += _SHAPE_BYTES
+        if shape.is_polygon() or shape.is_path() or shape.is_box():
+            memory += _POINT_BYTES * int(shape.polygon.num_points())
+    return memory
+
+
+def _memory(entry: _Entry) -> int:
+    """Memory of an entry, estimated once and added to the running total."""
+    global _bytes
+    if entry.memory is None:
+        entry.memory = cell_memory(entry.cell) if _alive(entry.cell) else 0
+        _bytes += entry.memory
+    return entry.memory
+
+
+def _forget(key: Key) -> None:
+    """Remove an entry from the tracking and its memory from the total."""
+    global _bytes
+    entry = _entries.pop(key, None)
+    if entry is not None and entry.memory is not None:
+        _bytes -= entry.memory
+
+
+def track(c: KCell, cache: dict[Any, KCell]) -> None:
+    """Record the use of a cell returned by a factory with the given cache."""
+    key = _key(c)
+    entry = _entries.get(key)
+    if entry is not None and entry.cell is c:
+        _entries.move_to_end(key)
+        return
+    _forget(key)
+    entry = _entries[key] = _Entry(c, cache)
+    if _max_bytes is not None:
+        _memory(entry)
+    for scope in _scopes:
+        scope.cells.append(c)
+
+
+@contextmanager
+def tracking() -> Iterator[None]:
+    """Enforce the limit when the outermost factory call returns.
+
+    Factories call other factories; evicting cells while a parent is being built
+    could delete a child before it is instantiated.
+    """
+    global _depth
+    _depth += 1
+    try:
+        yield
+    finally:
+        _depth -= 1
+    if _depth == 0:
+        _enforce()
+
+
+def _delete(
+    entries: Iterable[tuple[Key, KCell]], caches: Iterable[dict[Any, KCell]] = ()
+) -> int:
+    """Delete cells from their layouts, the factory caches and the tracking.
+
+    Args:
+        entries: Keys and cells to delete.
+        caches: Factory caches to clean in addition to those of tracked cells.
+    """
+    cells = dict(entries)
+    ids = {id(c) for c in cells.values()}
+    unique = {id(cache): cache for cache in caches}
+    unique.update((id(e.cache), e.cache) for k in cells if (e := _entries.get(k)))
+    for cache in unique.values():
+        for k in [k for k, v in cache.items() if id(v) in ids]:
+            del cache[k]
+    by_layout: dict[int, tuple[KCLayout, list[int]]] = {}
+    for key, c in cells.items():
+        _forget(key)
+        _pinned.discard(key)
+        if _alive(c):
+            by_layout.setdefault(key[0], (c.kcl, []))[1].append(key[1])
+    for layout, indexes in by_layout.values():
+        layout.layout.delete_cells(indexes)
+        for ci in indexes:
+            layout.kcells.pop(ci, None)
+    return sum(len(indexes) for _, indexes in by_layout.values())
+
+
+def _prune_dead() -> None:
+    """Forget cells which were deleted by someone else."""
+    dead = [(key, e.cell) for key, e in _entries.items() if not _alive(e.cell)]
+    if dead:
+        _delete(dead)
+
+
+def _references(entry: _Entry) -> int:
+    """References to the cell of an entry held by the caches and kfactory."""
+    c = entry.cell
+    # the entry and the `d` accessor of the cell
+    n = 2 + sum(v is c for v in entry.cache.values())
+    n += c.kcl.kcells.get(c.cell_index()) is c
+    n += sum(x is c for scope in _scopes for x in scope.cells)
+    return n
+
+
+def _held(entry: _Entry) -> bool:
+    """Whether the cell of an entry is referenced outside of the caches."""
+    # minus the reference of the argument
+    return sys.getrefcount(entry.cell) - 1 > _references(entry)
+
+
+def _excess() -> tuple[int, int]:
+    """Cells and bytes above the limits, from the running totals."""
+    excess_cells = len(_entries) - _max_cells if _max_cells is not None else 0
+    excess_bytes = _bytes - _max_bytes if _max_bytes is not None else 0
+    return excess_cells, excess_bytes
+
+
+def _enforce() -> None:
+    """Evict least recently used cells until the cache is within its limit.
+
+    The limits are compared with the running totals, the entries are only
+    scanned if a limit is exceeded. Cells deleted by someone else are dropped
+    during the scan.
+    """
+    global _evicted
+    excess_cells, excess_bytes = _excess()
+    while excess_cells > 0 or excess_bytes > 0:
+        victims = []
+        dead = []
+        for key, entry in _entries.items():
+            if excess_cells <= 0 and excess_bytes <= 0:
+                break
+            if not _alive(entry.cell):
+                dead.append((key, entry.cell))
+            elif key in _pinned or entry.cell.parent_cells() or _held(entry):
+                continue
+            else:
+                victims.append((key, entry.cell))
+            excess_cells -= 1
+            excess_bytes -= _memory(entry)
+        if dead:
+            _delete(dead)
+        if not victims and not dead:
+            return
+        _evicted += _delete(victims)
+        excess_cells, excess_bytes = _excess()
+
+
+def _release(candidates: dict[Key, KCell], kept: set[Key]) -> int:
+    """Delete candidates which are not instantiated, until none is left."""
+    deleted = 0
+    while True:
+        victims = [
+            (key, c)
+            for key, c in candidates.items()
+            if key not in kept and _alive(c) and not c.parent_cells()
+        ]
+        if not victims:
+            return deleted
+        for key, _ in victims:
+            del candidates[key]
+        deleted += _delete(victims)
+
+
+def release(*cells: KCell) -> int:
+    """Delete cells and those of their children which are no longer used.
+
+    Cells which are instantiated in another cell are kept, so are children used
+    by other cells and pinned children.
+
+    Returns:
+        The number of deleted cells.
+    """
+    candidates: dict[Key, KCell] = {}
+    for c in cells:
+        candidates[_key(c)] = c
+        for ci in c.called_cells():
+            key = (id(c.kcl), ci)
+            if key in _entries and key not in _pinned:
+                candidates[key] = _entries[key].cell
+    return _release(candidates, set())
+
+
+def _layout(tops: tuple[KCell, ...]) -> KCLayout:
+    """Layout of the top cells."""
+    if not tops:
+        raise ValueError("At least one top cell is needed")
+    layout = tops[0].kcl
+    if any(c.kcl is not layout for c in tops):
+        raise ValueError("The top cells have to be in the same layout")
+    return layout
+
+
+def unreachable(*tops: KCell) -> list[int]:
+    """Indexes of the cells of the layout of the top cells not used by them.
+
+    Pinned cells and their children count as used. The cells without parents are
+    removed first, which can leave their children without parents in turn, so
+    the number of parents of every cell is counted once and decremented instead
+    of walking the hierarchy of each top cell.
+
+    Raises:
+        ValueError: If no top cell is given or they are in different layouts.
+    """
+    layout = _layout(tops)
+    roots = {c.cell_index() for c in tops}
+    roots.update(ci for (lid, ci) in _pinned if lid == id(layout))
+    parents = {
+        cell.cell_index(): cell.parent_cells() for cell in layout.layout.each_cell()
+    }
+    orphans = [ci for ci, n in parents.items() if n == 0 and ci not in roots]
+    removed: list[int] = []
+    while orphans:
+        ci = orphans.pop()
+        removed.append(ci)
+        for child in layout.layout.cell(ci).each_child_cell():
+            parents[child] -= 1
+            if parents[child] == 0 and child not in roots:
+                orphans.append(child)
+    return removed
+
+
+def _factory_caches(cells: Iterable[KCell]) -> list[dict[Any, KCell]]:
+    """Caches of :py:func:`kfactory.cell` factories holding any of the cells.
+
+    The caches are found among the referrers of the cells by their keys, so the
+    caches of factories unknown to kgeneric are found as well.
+    """
+    return [
+        r
+        for r in gc.get_referrers(*cells)
+        if isinstance(r, dict) and r and all(type(k) is _HashKey for k in r)
+    ]
+
+
+def prune(*tops: KCell) -> PruneResult:
+    """Delete all cells of the layout of the top cells which they do not use.
+
+    The cells are deleted in one call and removed from the caches of all
+    factories holding them, calling a factory again creates a new cell. Pinned
+    cells are kept.
+
+    Args:
+        tops: Cells to keep together with their children.
+
+    Returns:
+        The number of deleted cells and their estimated memory [bytes].
+
+    Raises:
+        ValueError: If no top cell is given or they are in different layouts.
+    """
+    layout = _layout(tops)
+    lid = id(layout)
+    victims = [
+        (
+            (lid, ci),
+            layout.kcells.get(ci) or KCell(kdb_cell=layout.layout.cell(ci), kcl=layout),
+        )
+        for ci in unreachable(*tops)
+    ]
+    memory = sum(cell_memory(c) for _, c in victims)
+    caches = _factory_caches(c for _, c in victims) if victims else []
+    return PruneResult(_delete(victims, caches), memory)
+
+
+@contextmanager
+def cache_scope() -> Iterator[CacheScope]:
+    """Delete the cells created in a block, see the module documentation."""
+    scope = CacheScope()
+    _scopes.append(scope)
+    try:
+        yield scope
+    finally:
+        _scopes.remove(scope)
+        _release({_key(c): c for c in scope.cells if _alive(c)}, scope.kept)
+
+
+def pin(*cells: KCell) -> None:
+    """Protect cells from eviction, see :py:func:`release` to delete them."""
+    _pinned.update(_key(c) for c in cells)
+
+
+def unpin(*cells: KCell) -> None:
+    """Allow the eviction of pinned cells again."""
+    _pinned.difference_update(_key(c) for c in cells)
+
+
+def set_cache_limit(max_cells: int | None = None, max_bytes: int | None = None) -> None:
+    """Limit the number or the estimated memory of the cached cells.
+
+    Args:
+        max_cells: Maximum number of cells, unlimited if `None`.
+        max_bytes: Maximum estimated memory of the cells, unlimited if `None`.
+    """
+    global _max_cells, _max_bytes
+    _max_cells = max_cells
+    _max_bytes = max_bytes
+    if max_bytes is not None:
+        for entry in _entries.values():
+            _memory(entry)
+    _enforce()
+
+
+def cache_limit() -> tuple[int | None, int | None]:
+    """Maximum number of cells and maximum memory of the cache."""
+    return _max_cells, _max_bytes
+
+
+def cache_info() -> CacheInfo:
+    """Number and estimated memory of the cached cells and evicted cells."""
+    _prune_dead()
+    return CacheInfo(
+        len(_entries),
+        sum(map(_memory, _entries.values())),
+        _evicted,
+        _max_cells,
+        _max_bytes,
+    )
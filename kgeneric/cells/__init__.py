@@ -5,23 +5,33 @@ from kgeneric.cells.circular import bend_circular
 from kgeneric.cells.coupler import coupler, straight_coupler
 from kgeneric.cells.euler import bend_euler, bend_s_euler
 from kgeneric.cells.grating_coupler_elliptical import grating_coupler_elliptical
-from kgeneric.cells.mzi import mzi
-from kgeneric.cells.taper import taper
+from kgeneric.cells.mzi import mzi, mzi_incremental
+from kgeneric.cells.ring import racetrack, ring_double, ring_single
+from kgeneric.cells.spiral import spiral_archimedean, spiral_euler
+from kgeneric.cells.taper import taper, taper_profile
 from kgeneric.cells.straight import straight, straight_dbu
+from kgeneric.cells import dbu
 from kgeneric.cells.dbu.taper import taper as taper_dbu
 
-
 __all__ = [
     "bend_circular",
     "bend_euler",
     "bend_s",
     "bend_s_euler",
     "coupler",
+    "dbu",
     "grating_coupler_elliptical",
     "mzi",
+    "mzi_incremental",
+    "racetrack",
+    "ring_double",
+    "ring_single",
+    "spiral_archimedean",
+    "spiral_euler",
     "straight",
     "straight_dbu",
     "straight_coupler",
     "taper",
     "taper_dbu",
+    "taper_profile",
 ]
@@ -0,0 +1,184 @@
+"""Conversion of numpy arrays to KLayout shapes.
+
+The generators of kgeneric calculate backbones and outlines as `(N, 2)` numpy
+arrays. The functions here convert such an array to a KLayout object with a single
+conversion of its columns, without creating intermediate `DPoint` lists.
+
+Float arrays are in um if a `dbu` is given and are then rounded to the grid
+the same way as `DPolygon.to_itype` (half away from zero). Integer arrays are
+in dbu.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from kfactory import KCell, LayerEnum, kdb
+from kfactory.enclosure import LayerEnclosure
+
+from kgeneric.cross_section import enclosure_sections
+
+__all__ = [
+    "snap",
+    "to_points",
+    "to_dpoints",
+    "to_polygon",
+    "to_dpolygon",
+    "to_path",
+    "to_dpath",
+    "to_region",
+    "insert_polygons",
+    "extrude_points",
+    "extrude_path",
+]
+
+Array = npt.NDArray[np.floating[Any]] | npt.NDArray[np.integer[Any]]
+
+
+def snap(array: Array, dbu: float | None = None) -> npt.NDArray[np.int64]:
+    """Round an array to integer coordinates.
+
+    Args:
+        array: Coordinates. [um] if `dbu` is given, [dbu] otherwise.
+        dbu: Database unit to convert um to dbu.
+    """
+    a = np.asarray(array)
+    if dbu is None and np.issubdtype(a.dtype, np.integer):
+        return a.astype(np.int64, copy=False)
+    f = a / dbu if dbu is not None else a
+    snapped: npt.NDArray[np.int64] = np.trunc(f + np.copysign(0.5, f)).astype(np.int64)
+    return snapped
+
+
+def to_points(array: Array, dbu: float | None = None) -> list[kdb.Point]:
+    """Points of an `(N, 2)` array."""
+    a = snap(array, dbu)
+    return list(map(kdb.Point, a[:, 0].tolist(), a[:, 1].tolist()))
+
+
+def to_dpoints(array: npt.NDArray[np.float64]) -> list[kdb.DPoint]:
+    """Float points of an `(N, 2)` array. [um]"""
+    a = np.asarray(array, dtype=np.float64)
+    return list(map(kdb.DPoint, a[:, 0].tolist(), a[:, 1].tolist()))
+
+
+def to_polygon(
+    hull: Array, dbu: float | None = None, holes: Iterable[Array] = ()
+) -> kdb.Polygon:
+    """Polygon from the `(N, 2)` array of its hull and optional holes."""
+    polygon = kdb.Polygon(to_points(hull, dbu))
+    for hole in holes:
+        polygon.insert_hole(to_points(hole, dbu))
+    return polygon
+
+
+def to_dpolygon(hull: npt.NDArray[np.float64]) -> kdb.DPolygon:
+    """Float polygon from the `(N, 2)` array of its hull. [um]"""
+    return kdb.DPolygon(to_dpoints(hull))
+
+
+def to_path(spine: Array, width: int, dbu: float | None = None) -> kdb.Path:
+    """Path along an `(N, 2)` array.
+
+    Args:
+        spine: Points of the path.
+        width: Width of the path. [dbu]
+        dbu: Database unit to convert the points from um.
+    """
+    return kdb.Path(to_points(spine, dbu), width)
+
+
+def to_dpath(spine: npt.NDArray[np.float64], width: float) -> kdb.DPath:
+    """Float path along an `(N, 2)` array. [um]"""
+    return kdb.DPath(to_dpoints(spine), width)
+
+
+def to_region(polygons: Iterable[Array], dbu: float | None = None) -> kdb.Region:
+    """Region of many polygons given as `(N, 2)` arrays."""
+    return kdb.Region([to_polygon(hull, dbu) for hull in polygons])
+
+
+def insert_polygons(
+    shapes: kdb.Shapes, polygons: Iterable[Array], dbu: float | None = None
+) -> None:
+    """Insert many polygons given as `(N, 2)` arrays with one insertion."""
+    shapes.insert(to_region(polygons, dbu))
+
+
+def extrude_points(
+    path: npt.NDArray[np.float64],
+    width: float,
+    start_angle: float | None = None,
+    end_angle: float | None = None,
+) -> npt.NDArray[np.float64]:
+    """Outline of a path with a constant width.
+
+    The edges are offset along the direction from the previous to the next
+    point, like :py:func:`kfactory.enclosure.extrude_path_points`.
+
+    Args:
+        path: `(N, 2)` points of the backbone.
+        width: Width of the path.
+        start_angle: Angle of the start in degrees, from the first two points if
+            `None`.
+        end_angle: Angle of the end in degrees, from the last two points if
+            `None`.
+
+    Returns:
+        `(2 * N, 2)` points of the top edge followed by the reversed bottom edge.
+    """
+    path = np.asarray(path, dtype=np.float64)
+    d = np.empty_like(path)
+    d[1:-1] = path[2:] - path[:-2]
+    d[0] = path[1] - path[0]
+    d[-1] = path[-1] - path[-2]
+    angles = np.arctan2(d[:, 1], d[:, 0])
+    if start_angle is not None:
+        angles[0] = np.deg2rad(start_angle)
+    if end_angle is not None:
+        angles[-1] = np.deg2rad(end_angle)
+    offset = width / 2 * np.stack([-np.sin(angles), np.cos(angles)], axis=1)
+    return np.concatenate([path + offset, (path - offset)[::-1]])
+
+
+def extrude_path(
+    c: KCell,
+    layer: int | LayerEnum,
+    path: npt.NDArray[np.float64],
+    width: float,
+    enclosure: LayerEnclosure | None = None,
+    start_angle: float | None = None,
+    end_angle: float | None = None,
+) -> None:
+    """Extrude a path with a core and its enclosure.
+
+    Same geometry as :py:func:`kfactory.enclosure.extrude_path` for a backbone
+    given as numpy array.
+
+    Args:
+        c: Target cell.
+        layer: Layer of the core.
+        path: `(N, 2)` points of the backbone. [um]
+        width: Width of the core. [um]
+        enclosure: Slab/exclude definition. [dbu]
+        start_angle: Angle of the start in degrees.
+        end_angle: Angle of the end in degrees.
+    """
+    dbu = c.kcl.dbu
+    sections: dict[int, list[tuple[int | None, int]]] = {layer: [(None, 0)]}
+    for layer_enc, d_min, d_max in enclosure_sections(enclosure):
+        sections.setdefault(layer_enc, []).append((d_min, d_max))
+
+    def outline(d: int) -> kdb.Region:
+        points = extrude_points(path, width + 2 * d * dbu, start_angle, end_angle)
+        return kdb.Region(to_polygon(points, dbu))
+
+    for layer_enc, layer_sections in sections.items():
+        region = kdb.Region()
+        for d_min, d_max in layer_sections:
+            r = outline(d_max)
+            if d_min is not None:
+                r -= outline(d_min)
+            region.insert(r)
+        c.shapes(layer_enc).insert(region.merge())
@@ -4,18 +4,21 @@ from collections.abc import Sequence
 
 import numpy as np
 import numpy.typing as nty
-from kfactory import KCell, LayerEnum, cell, kdb
-from kfactory.enclosure import LayerEnclosure, extrude_path
+from kfactory import KCell, LayerEnum, kdb
+from kfactory.enclosure import LayerEnclosure
 from scipy.special import binom  # type: ignore[import]
 
+from kgeneric.cells.arrays import extrude_path, to_dpoints
+from kgeneric.cells.decorator import cell
+
 __all__ = ["bend_s"]
 
 
-def bezier_curve(
+def _bezier_array(
     t: nty.NDArray[np.float64],
     control_points: Sequence[tuple[np.float64 | float, np.float64 | float]],
-) -> list[kdb.DPoint]:
-    """Calculates the backbone of a bezier bend."""
+) -> nty.NDArray[np.float64]:
+    """`(N, 2)` backbone of :py:func:`bezier_curve`."""
     xs = np.zeros(t.shape, dtype=np.float64)
     ys = np.zeros(t.shape, dtype=np.float64)
     n = len(control_points) - 1
@@ -24,7 +27,39 @@ def bezier_curve(
         xs += ank * control_points[k][0]
         ys += ank * control_points[k][1]
 
-    return [kdb.DPoint(float(x), float(y)) for x, y in zip(xs, ys)]
+    return np.stack([xs, ys], axis=1)
+
+
+def bezier_curve(
+    t: nty.NDArray[np.float64],
+    control_points: Sequence[tuple[np.float64 | float, np.float64 | float]],
+) -> list[kdb.DPoint]:
+    """Calculates the backbone of a bezier bend."""
+    return to_dpoints(_bezier_array(t, control_points))
+
+
+def bezier_length(
+    control_points: Sequence[tuple[np.float64 | float, np.float64 | float]],
+    t_start: float = 0,
+    t_stop: float = 1,
+    n_gauss: int = 32,
+) -> float:
+    """Length of a bezier curve between two parameters.
+
+    The speed of the curve is a polynomial in `t`, its integral is evaluated with
+    Gauss-Legendre quadrature, which is exact up to floating point precision for
+    the smooth curves used in bends.
+    """
+    x, w = np.polynomial.legendre.leggauss(n_gauss)
+    t = (t_stop - t_start) / 2 * x + (t_stop + t_start) / 2
+    dxs = np.zeros(t.shape, dtype=np.float64)
+    dys = np.zeros(t.shape, dtype=np.float64)
+    n = len(control_points) - 1
+    for k in range(n):
+        ank = n * binom(n - 1, k) * (1 - t) ** (n - 1 - k) * t**k
+        dxs += ank * (control_points[k + 1][0] - control_points[k][0])
+        dys += ank * (control_points[k + 1][1] - control_points[k][1])
+    return float((t_stop - t_start) / 2 * np.sum(w * np.hypot(dxs, dys)))
 
 
 @cell
@@ -52,58 +87,50 @@ def bend_s(
     """
     c = KCell()
     _length, _height = length, height
-    pts = bezier_curve(
-        control_points=[
-            (0.0, 0.0),
-            (_length / 2, 0.0),
-            (_length / 2, _height),
-            (_length, _height),
-        ],
-        t=np.linspace(t_start, t_stop, nb_points),
+    control_points = [
+        (0.0, 0.0),
+        (_length / 2, 0.0),
+        (_length / 2, _height),
+        (_length, _height),
+    ]
+    pts = _bezier_array(np.linspace(t_start, t_stop, nb_points), control_points)
+
+    extrude_path(
+        c,
+        path=pts,
+        layer=layer,
+        width=width,
+        enclosure=enclosure,
+        start_angle=0,
+        end_angle=0,
     )
 
-    extrude_path(c, path=pts, layer=layer, width=width, start_angle=0, end_angle=0)
-    if enclosure:
-        enclosure.extrude_path(c, pts, layer, width, start_angle=0, end_angle=0)
-        # enclosure.apply_minkowski_tiled(c)
-        # enclosure.apply_bbox(c)
-
     bbox_layer = c.bbox_per_layer(layer)
     c.create_port(
         name="o1",
-        width=int(width / c.kcl.dbu),
+        width=round(width / c.kcl.dbu),
         trans=kdb.Trans(2, True, 0, 0),
         layer=layer,
         port_type="optical",
     )
     c.create_port(
         name="o2",
-        width=int(width / c.kcl.dbu),
+        width=round(width / c.kcl.dbu),
         trans=kdb.Trans(
-            0, False, bbox_layer.right, bbox_layer.top - int(width / c.kcl.dbu) // 2
+            0, False, bbox_layer.right, bbox_layer.top - round(width / c.kcl.dbu) // 2
         ),
         layer=layer,
         port_type="optical",
     )
 
     c.info["sim"] = "FDTD"
+    c.info["length_um"] = bezier_length(control_points, t_start, t_stop)
     return c
 
 
 if __name__ == "__main__":
-    import kfactory as kf
-
     from kgeneric import LAYER
-
-    um = 1 / kf.kcl.dbu
-    enclosure = LayerEnclosure(
-        [
-            (LAYER.DEEPTRENCH, 2 * um, 3 * um),
-            (LAYER.SLAB90, 2 * um),
-        ],
-        name="WGSLAB",
-        main_layer=LAYER.WG,
-    )
+    from kgeneric.gpdk import enclosure_slab as enclosure
 
     c = bend_s(width=0.25, height=2, length=1, layer=LAYER.WG, enclosure=enclosure)
     c.draw_ports()
@@ -5,8 +5,11 @@ A circular bend has a constant radius.
 
 import numpy as np
 from kfactory import kdb
-from kfactory.enclosure import LayerEnclosure, extrude_path
-from kfactory.kcell import KCell, LayerEnum, cell
+from kfactory.enclosure import LayerEnclosure
+from kfactory.kcell import KCell, LayerEnum
+
+from kgeneric.cells.arrays import extrude_path
+from kgeneric.cells.decorator import cell
 
 __all__ = ["bend_circular"]
 
@@ -33,18 +36,13 @@ def bend_circular(
     """
     c = KCell()
     r = radius
-    backbone = [
-        kdb.DPoint(x, y)
-        for x, y in [
-            [np.sin(_angle / 180 * np.pi) * r, (-np.cos(_angle / 180 * np.pi) + 1) * r]
-            for _angle in np.linspace(
-                0, angle, int(abs(angle) // angle_step + 0.5), endpoint=True
-            )
-        ]
-    ]
+    angles = np.deg2rad(
+        np.linspace(0, angle, int(abs(angle) // angle_step + 0.5), endpoint=True)
+    )
+    backbone = r * np.stack([np.sin(angles), 1 - np.cos(angles)], axis=1)
 
     extrude_path(
-        target=c,
+        c,
         layer=layer,
         path=backbone,
         width=width,
@@ -55,15 +53,16 @@ def bend_circular(
 
     c.create_port(
         trans=kdb.Trans(2, False, 0, 0),
-        width=int(width / c.kcl.dbu),
+        width=round(width / c.kcl.dbu),
         layer=layer,
     )
     c.create_port(
-        dcplx_trans=kdb.DCplxTrans(1, angle, False, backbone[-1].to_v()),
-        dwidth=width,
+        dcplx_trans=kdb.DCplxTrans(1, angle, False, *backbone[-1].tolist()),
+        dwidth=round(width / c.kcl.dbu) * c.kcl.dbu,
         layer=layer,
     )
     c.autorename_ports()
+    c.info["length_um"] = radius * abs(angle) * np.pi / 180
 
     return c
 
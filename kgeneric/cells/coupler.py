@@ -1,9 +1,11 @@
-from kfactory import KCell, cell, kdb
+from kfactory import KCell, kdb
 from kfactory.enclosure import LayerEnclosure
 from kfactory.kcell import LayerEnum
 
 from kgeneric.cells.bezier import bend_s
+from kgeneric.cells.decorator import cell
 from kgeneric.cells.straight import straight
+from kgeneric.enclosure import NO_ENCLOSURE
 from kgeneric.layers import LAYER
 
 
@@ -15,7 +17,7 @@ def coupler(
     dx: float = 5.0,
     width: float = 0.5,
     layer: int | LayerEnum = LAYER.WG,
-    enclosure: LayerEnclosure = LayerEnclosure(),
+    enclosure: LayerEnclosure = NO_ENCLOSURE,
 ) -> KCell:
     r"""Symmetric coupler.
 
@@ -39,49 +41,27 @@ def coupler(
          o1                                          o4
     """
     c = KCell()
-    enclosure = enclosure if enclosure is not None else LayerEnclosure()
-    sbend = c << bend_s(
+    sbend = bend_s(
         width=width,
-        height=((dy) / 2 - gap / 2 - width / 2),
+        height=(dy / 2 - gap / 2 - width / 2),
         length=dx,
         layer=layer,
         enclosure=enclosure,
     )
-    sbend_2 = c << bend_s(
-        width=width,
-        height=((dy) / 2 - gap / 2 - width / 2),
-        length=dx,
-        layer=layer,
-        enclosure=enclosure,
-    )
-
+    end = sbend.ports["o2"].trans.disp
     wg = c << straight_coupler(gap, length, width, layer, enclosure)
-
-    sbend.connect("o2", wg.ports["o1"], mirror=True)
-    sbend_2.connect("o2", wg.ports["o4"])
-    sbend_r_top = c << bend_s(
-        width=width,
-        height=(dy / 2 - width / 2 - gap / 2),
-        length=dx,
-        layer=layer,
-        enclosure=enclosure,
-    )
-    sbend_r_bot = c << bend_s(
-        width=width,
-        height=(dy / 2 - width / 2 - gap / 2),
-        length=dx,
-        layer=layer,
-        enclosure=enclosure,
-    )
-
-    sbend_r_top.connect("o1", wg.ports["o3"])
-    sbend_r_bot.connect("o1", wg.ports["o2"], mirror=True)
-
-    c.add_port(name="o1", port=sbend_2.ports["o1"])
-    c.add_port(name="o2", port=sbend.ports["o1"])
-    c.add_port(name="o3", port=sbend_r_bot.ports["o2"])
-    c.add_port(name="o4", port=sbend_r_top.ports["o2"])
-    c.begin_instances_rec()
+    p1, p2, p3, p4 = (wg.ports[name].trans.disp for name in ["o1", "o2", "o3", "o4"])
+
+    # one s-bend cell, mirrored at the x-axis for the top-left and bottom-right arm
+    sbend_l_bot = c.create_inst(sbend, kdb.Trans(p4 - end))
+    sbend_l_top = c.create_inst(sbend, kdb.Trans(0, True, p1.x - end.x, p1.y + end.y))
+    sbend_r_top = c.create_inst(sbend, kdb.Trans(p2))
+    sbend_r_bot = c.create_inst(sbend, kdb.Trans(0, True, p3.x, p3.y))
+
+    c.add_port(name="o1", port=sbend_l_bot.ports["o1"])
+    c.add_port(name="o2", port=sbend_l_top.ports["o1"])
+    c.add_port(name="o3", port=sbend_r_top.ports["o2"])
+    c.add_port(name="o4", port=sbend_r_bot.ports["o2"])
     return c
 
 
@@ -91,7 +71,7 @@ def straight_coupler(
     length: float = 10.0,
     width: float = 0.5,
     layer: int | LayerEnum = LAYER.WG,
-    enclosure: LayerEnclosure = LayerEnclosure(),
+    enclosure: LayerEnclosure = NO_ENCLOSURE,
 ) -> KCell:
     """Straight coupler.
 
@@ -119,17 +99,7 @@ def straight_coupler(
 
 
 if __name__ == "__main__":
-    import kfactory as kf
-
-    um = 1 / kf.kcl.dbu
-    enclosure = LayerEnclosure(
-        [
-            (LAYER.DEEPTRENCH, 2 * um, 3 * um),
-            (LAYER.SLAB90, 2 * um),
-        ],
-        name="WGSLAB",
-        main_layer=LAYER.WG,
-    )
+    from kgeneric.gpdk import enclosure_slab as enclosure
 
     c = coupler(enclosure=enclosure)
     c.show()
@@ -1,4 +1,20 @@
+from .bezier import bend_s
+from .circular import bend_circular
+from .euler import bend_euler
+from .ring import ring_double, ring_single
+from .spiral import spiral_archimedean, spiral_euler
 from .straight import straight
-from .taper import taper
+from .taper import taper, taper_profile
 
-__all__ = ["straight", "taper"]
+__all__ = [
+    "bend_circular",
+    "bend_euler",
+    "bend_s",
+    "ring_double",
+    "ring_single",
+    "spiral_archimedean",
+    "spiral_euler",
+    "straight",
+    "taper",
+    "taper_profile",
+]
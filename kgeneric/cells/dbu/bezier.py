@@ -0,0 +1,86 @@
+"""Bezier s-bends [dbu].
+
+The control points are integer, so the ends of the backbone at `t=0` and `t=1`
+are exactly the ports.
+"""
+
+import numpy as np
+import numpy.typing as npt
+from kfactory import KCell, LayerEnum, kdb
+from kfactory.enclosure import LayerEnclosure
+from scipy.special import binom  # type: ignore[import-untyped]
+
+from kgeneric.cells.bezier import bezier_length
+from kgeneric.cells.dbu.extrude import extrude_backbone
+from kgeneric.cells.decorator import cell
+
+__all__ = ["bezier_backbone", "bend_s"]
+
+
+def bezier_backbone(
+    t: npt.NDArray[np.float64], control_points: npt.NDArray[np.float64]
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Points and tangent angles of a bezier curve.
+
+    Args:
+        t: Curve parameters from 0 to 1.
+        control_points: `(n + 1, 2)` control points.
+
+    Returns:
+        `(N, 2)` points and `(N,)` tangent angles in radians.
+    """
+    n = len(control_points) - 1
+    k = np.arange(n + 1)
+    basis = binom(n, k) * (1 - t[:, None]) ** (n - k) * t[:, None] ** k
+    k = np.arange(n)
+    dbasis = n * binom(n - 1, k) * (1 - t[:, None]) ** (n - 1 - k) * t[:, None] ** k
+    points = basis @ control_points
+    tangents = dbasis @ np.diff(control_points, axis=0)
+    return points, np.arctan2(tangents[:, 1], tangents[:, 0])
+
+
+@cell
+def bend_s(
+    width: int,
+    height: int,
+    length: int,
+    layer: int | LayerEnum,
+    nb_points: int = 99,
+    enclosure: LayerEnclosure | None = None,
+) -> KCell:
+    """Create a bezier s-bend [dbu].
+
+    Args:
+        width: Width of the core. [dbu]
+        height: height difference of left/right. [dbu]
+        length: Length of the bend. [dbu]
+        layer: Layer index of the core.
+        nb_points: Number of points of the backbone.
+        enclosure: Slab/Exclude definition. [dbu]
+    """
+    c = KCell()
+    control_points = np.array(
+        [(0, 0), (length / 2, 0), (length / 2, height), (length, height)],
+        dtype=np.float64,
+    )
+    backbone, angles = bezier_backbone(np.linspace(0, 1, nb_points), control_points)
+
+    extrude_backbone(c, layer, backbone, angles, width, enclosure)
+
+    c.create_port(
+        name="o1",
+        width=width,
+        trans=kdb.Trans(2, False, 0, 0),
+        layer=layer,
+        port_type="optical",
+    )
+    c.create_port(
+        name="o2",
+        width=width,
+        trans=kdb.Trans(0, False, length, height),
+        layer=layer,
+        port_type="optical",
+    )
+
+    c.info["length_um"] = bezier_length(control_points * c.kcl.dbu)
+    return c
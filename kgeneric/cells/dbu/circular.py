@@ -0,0 +1,56 @@
+"""Circular bends [dbu].
+
+The edges are concentric arcs calculated as numpy arrays. For multiples of 90°
+the end of the backbone is an integer point, so both ports are on the grid.
+"""
+
+import numpy as np
+from kfactory import KCell, LayerEnum, kdb
+from kfactory.enclosure import LayerEnclosure
+
+from kgeneric.cells.dbu.extrude import extrude_backbone
+from kgeneric.cells.decorator import cell
+
+__all__ = ["bend_circular"]
+
+
+@cell
+def bend_circular(
+    width: int,
+    radius: int,
+    layer: int | LayerEnum,
+    enclosure: LayerEnclosure | None = None,
+    angle: int = 90,
+    angle_step: float = 1,
+) -> KCell:
+    """Circular radius bend [dbu].
+
+    Args:
+        width: Width of the core. [dbu]
+        radius: Radius of the backbone. [dbu]
+        layer: Layer index of the target layer.
+        enclosure: :py:class:`kfactory.enclosure` object to describe the
+            claddings. [dbu]
+        angle: Angle amount of the bend, a multiple of 90.
+        angle_step: Angle amount per backbone point of the bend.
+    """
+    if angle % 90 or not 0 < angle < 360:
+        raise ValueError(f"angle must be 90, 180 or 270, got {angle=}")
+    c = KCell()
+    angles = np.deg2rad(
+        np.linspace(0, angle, max(int(angle / angle_step + 0.5), 2) + 1)
+    )
+    backbone = radius * np.stack([np.sin(angles), 1 - np.cos(angles)], axis=1)
+    backbone[-1] = np.round(backbone[-1])
+
+    extrude_backbone(c, layer, backbone, angles, width, enclosure)
+
+    c.create_port(trans=kdb.Trans(2, False, 0, 0), width=width, layer=layer)
+    c.create_port(
+        trans=kdb.Trans(angle // 90, False, *backbone[-1].astype(int).tolist()),
+        width=width,
+        layer=layer,
+    )
+    c.autorename_ports()
+    c.info["length_um"] = radius * np.deg2rad(angle) * c.kcl.dbu
+    return c
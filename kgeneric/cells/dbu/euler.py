@@ -0,0 +1,100 @@
+"""Euler bends [dbu].
+
+The backbone is calculated as numpy array in dbu. The rounding error of its end
+point (at most half a dbu per coordinate) is distributed linearly along the
+backbone, so both ports are on the grid and the geometry ends exactly at them.
+"""
+
+import numpy as np
+import numpy.typing as npt
+from kfactory import KCell, LayerEnum, kdb
+from kfactory.enclosure import LayerEnclosure
+from scipy.special import fresnel  # type: ignore[import-untyped]
+
+from kgeneric.cells.dbu.extrude import extrude_backbone
+from kgeneric.cells.decorator import cell
+from kgeneric.cells.euler import euler_length
+
+__all__ = ["euler_backbone", "bend_euler"]
+
+
+def euler_backbone(
+    angle: float, radius: float, resolution: float = 150
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Backbone of an euler bend starting at the origin towards east.
+
+    Args:
+        angle: Angle of the bend in degrees, positive.
+        radius: Minimum radius of the bend.
+        resolution: Points per radian of half the angle.
+
+    Returns:
+        `(N, 2)` points and `(N,)` tangent angles in radians.
+    """
+    th = np.deg2rad(angle) / 2
+    R = radius
+    length = 4 * R * th
+    a = np.sqrt(R**2 * th)
+    sq2pi = np.sqrt(2 * np.pi)
+    n = max(int(th * resolution), 2)
+    s = np.linspace(0, length, n + 1)
+
+    first = s <= length / 2
+    fsin, fcos = fresnel(np.where(first, s, length - s) / (sq2pi * a))
+    fasin, facos = fresnel(np.sqrt(2 / np.pi) * R * th / a)
+    x = np.where(
+        first,
+        sq2pi * a * fcos,
+        sq2pi
+        * a
+        * (facos + np.cos(2 * th) * (facos - fcos) + np.sin(2 * th) * (fasin - fsin)),
+    )
+    y = np.where(
+        first,
+        sq2pi * a * fsin,
+        sq2pi
+        * a
+        * (fasin - np.cos(2 * th) * (fasin - fsin) + np.sin(2 * th) * (facos - fcos)),
+    )
+    angles = np.where(first, s**2 / (4 * a**2), 2 * th - (length - s) ** 2 / (4 * a**2))
+    return np.stack([x, y], axis=1), angles
+
+
+@cell
+def bend_euler(
+    width: int,
+    radius: int,
+    layer: int | LayerEnum,
+    enclosure: LayerEnclosure | None = None,
+    angle: int = 90,
+    resolution: float = 150,
+) -> KCell:
+    """Create a euler bend [dbu].
+
+    Args:
+        width: Width of the core. [dbu]
+        radius: Minimum radius of the backbone. [dbu]
+        layer: Layer index / LayerEnum of the core.
+        enclosure: Slab/exclude definition. [dbu]
+        angle: Angle of the bend, a multiple of 90.
+        resolution: Angle resolution for the backbone.
+    """
+    if angle % 90 or not 0 < angle < 360:
+        raise ValueError(f"angle must be 90, 180 or 270, got {angle=}")
+    c = KCell()
+    backbone, angles = euler_backbone(angle, radius, resolution)
+    end = backbone[-1].copy()
+    backbone += np.linspace(0, 1, len(backbone))[:, None] * (np.round(end) - end)
+    backbone[-1] = np.round(backbone[-1])
+
+    extrude_backbone(c, layer, backbone, angles, width, enclosure)
+
+    c.create_port(trans=kdb.Trans(2, False, 0, 0), width=width, layer=layer)
+    c.create_port(
+        trans=kdb.Trans(angle // 90, False, *backbone[-1].astype(int).tolist()),
+        width=width,
+        layer=layer,
+    )
+    c.autorename_ports()
+    c.info["length_um"] = euler_length(radius * c.kcl.dbu, angle)
+    return c
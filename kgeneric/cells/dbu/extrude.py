@@ -0,0 +1,65 @@
+"""Extrusion of backbones given as numpy arrays [dbu].
+
+A backbone is an `(N, 2)` array of points together with the `(N,)` angles of
+its tangent in radians. The edges are offset along the normals and rounded to
+the grid once, without going through `DPoint`.
+"""
+
+import numpy as np
+import numpy.typing as npt
+from kfactory import KCell, LayerEnum, kdb
+from kfactory.enclosure import LayerEnclosure
+
+from kgeneric.cells.arrays import to_polygon
+from kgeneric.cross_section import section_edges
+
+__all__ = ["offset_polygon", "extrude_backbone"]
+
+
+def offset_polygon(
+    backbone: npt.NDArray[np.float64],
+    angles: npt.NDArray[np.float64],
+    d_top: float,
+    d_bot: float,
+) -> kdb.Polygon:
+    """Polygon between two offsets of a backbone.
+
+    Args:
+        backbone: `(N, 2)` points of the backbone. [dbu]
+        angles: `(N,)` tangent angles of the backbone. [rad]
+        d_top: Offset of the edge left of the backbone. [dbu]
+        d_bot: Offset of the edge right of the backbone (negative for the right
+            side). [dbu]
+    """
+    normals = np.stack([-np.sin(angles), np.cos(angles)], axis=1)
+    top = np.round(backbone + d_top * normals).astype(np.int64)
+    bot = np.round(backbone + d_bot * normals).astype(np.int64)
+    return to_polygon(np.concatenate([top, bot[::-1]]))
+
+
+def extrude_backbone(
+    c: KCell,
+    layer: int | LayerEnum,
+    backbone: npt.NDArray[np.float64],
+    angles: npt.NDArray[np.float64],
+    width: int,
+    enclosure: LayerEnclosure | None = None,
+) -> None:
+    """Extrude a backbone with a core and its enclosure.
+
+    The enclosure sections are offset from the edges of the core along the
+    normals of the backbone, see :py:func:`kgeneric.cross_section.section_edges`.
+
+    Args:
+        c: Target cell.
+        layer: Layer of the core.
+        backbone: `(N, 2)` points of the backbone. [dbu]
+        angles: `(N,)` tangent angles of the backbone. [rad]
+        width: Width of the core. [dbu]
+        enclosure: Slab/exclude definition. [dbu]
+    """
+    w = width / 2
+    c.shapes(layer).insert(offset_polygon(backbone, angles, w, -w))
+    layers, edges = section_edges(width, enclosure)
+    for layer_enc, (d_top, d_bot) in zip(layers, edges):
+        c.shapes(layer_enc).insert(offset_polygon(backbone, angles, d_top, d_bot))
@@ -0,0 +1,154 @@
+"""Ring and racetrack resonators [dbu].
+
+A ring consists of four instances of the same cached quarter
+:py:func:`~kgeneric.cells.dbu.circular.bend_circular`, mirrored and rotated
+into place, and optional straights between them for racetracks. The bus
+waveguides are straights. Sweeping the gap only creates a new top cell, sweeping
+the radius reuses the straights of the racetrack.
+
+The ring is centered at `x=0`, the through bus is at `y=0`::
+
+          o3 ─────────────── o4  (ring_double only)
+               ╭─────────╮
+               │         │ length_y
+               ╰─────────╯
+                 length_x
+          o1 ─────────────── o2
+"""
+
+import numpy as np
+from kfactory import KCell, LayerEnum, kdb
+from kfactory.enclosure import LayerEnclosure
+from kfactory.kcell import Instance
+
+from kgeneric.cells.dbu.circular import bend_circular
+from kgeneric.cells.dbu.straight import straight
+from kgeneric.cells.decorator import cell
+
+__all__ = ["ring_single", "ring_double"]
+
+
+def _ring(
+    c: KCell,
+    width: int,
+    radius: int,
+    layer: int | LayerEnum,
+    enclosure: LayerEnclosure | None,
+    length_x: int,
+    length_y: int,
+    y: int,
+    angle_step: float,
+) -> None:
+    """Insert a ring with the bottom of its backbone at `y`."""
+    quarter = bend_circular(width, radius, layer, enclosure, angle_step=angle_step)
+    left = -(length_x // 2)
+    right = left + length_x
+    top = y + 2 * radius + length_y
+    for trans in [
+        kdb.Trans(0, False, right, y),
+        kdb.Trans(0, True, right, top),
+        kdb.Trans(2, True, left, y),
+        kdb.Trans(2, False, left, top),
+    ]:
+        c.create_inst(quarter, trans)
+    if length_x:
+        wg = straight(width, length_x, layer, enclosure)
+        c.create_inst(wg, kdb.Trans(left, y))
+        c.create_inst(wg, kdb.Trans(left, top))
+    if length_y:
+        wg = straight(width, length_y, layer, enclosure)
+        c.create_inst(wg, kdb.Trans(1, False, right + radius, y + radius))
+        c.create_inst(wg, kdb.Trans(1, False, left - radius, y + radius))
+
+
+def _bus(
+    c: KCell,
+    width: int,
+    length: int,
+    layer: int | LayerEnum,
+    enclosure: LayerEnclosure | None,
+    y: int,
+) -> Instance:
+    return c.create_inst(
+        straight(width, length, layer, enclosure), kdb.Trans(-(length // 2), y)
+    )
+
+
+@cell
+def ring_single(
+    width: int,
+    radius: int,
+    gap: int,
+    layer: int | LayerEnum,
+    enclosure: LayerEnclosure | None = None,
+    length_x: int = 0,
+    length_y: int = 0,
+    angle_step: float = 1,
+) -> KCell:
+    """Ring or racetrack resonator with one bus waveguide [dbu].
+
+    Args:
+        width: Width of the core of ring and bus. [dbu]
+        radius: Radius of the bends. [dbu]
+        gap: Gap between bus and ring. [dbu]
+        layer: Layer index / LayerEnum of the core.
+        enclosure: Slab/exclude definition. [dbu]
+        length_x: Length of the straights parallel to the bus. [dbu]
+        length_y: Length of the straights perpendicular to the bus. [dbu]
+        angle_step: Angle amount per backbone point of the bends.
+    """
+    c = KCell()
+    _ring(
+        c, width, radius, layer, enclosure, length_x, length_y, gap + width, angle_step
+    )
+    bus = _bus(c, width, length_x + 2 * radius, layer, enclosure, 0)
+    c.add_port(name="o1", port=bus.ports["o1"])
+    c.add_port(name="o2", port=bus.ports["o2"])
+    c.info["length_um"] = float(
+        (2 * np.pi * radius + 2 * (length_x + length_y)) * c.kcl.dbu
+    )
+    return c
+
+
+@cell
+def ring_double(
+    width: int,
+    radius: int,
+    gap: int,
+    layer: int | LayerEnum,
+    enclosure: LayerEnclosure | None = None,
+    length_x: int = 0,
+    length_y: int = 0,
+    gap_drop: int | None = None,
+    angle_step: float = 1,
+) -> KCell:
+    """Ring or racetrack resonator with a through and a drop bus [dbu].
+
+    Args:
+        width: Width of the core of ring and busses. [dbu]
+        radius: Radius of the bends. [dbu]
+        gap: Gap between through bus and ring. [dbu]
+        layer: Layer index / LayerEnum of the core.
+        enclosure: Slab/exclude definition. [dbu]
+        length_x: Length of the straights parallel to the busses. [dbu]
+        length_y: Length of the straights perpendicular to the busses. [dbu]
+        gap_drop: Gap between drop bus and ring, `gap` if `None`. [dbu]
+        angle_step: Angle amount per backbone point of the bends.
+    """
+    c = KCell()
+    gap_drop = gap if gap_drop is None else gap_drop
+    y = gap + width
+    _ring(c, width, radius, layer, enclosure, length_x, length_y, y, angle_step)
+    length = length_x + 2 * radius
+    bus = _bus(c, width, length, layer, enclosure, 0)
+    drop = _bus(
+        c, width, length, layer, enclosure, y + 2 * radius + length_y + gap_drop + width
+    )
+    c.add_port(name="o1", port=bus.ports["o1"])
+    c.add_port(name="o2", port=bus.ports["o2"])
+    c.add_port(name="o3", port=drop.ports["o1"])
+    c.add_port(name="o4", port=drop.ports["o2"])
+    c.info["length_um"] = float(
+        (2 * np.pi * radius + 2 * (length_x + length_y)) * c.kcl.dbu
+    )
+    return c
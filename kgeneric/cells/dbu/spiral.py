@@ -0,0 +1,257 @@
+"""Double spirals for delay lines [dbu].
+
+Both spirals consist of two interleaved arms which are point symmetric to each
+other and joined by an s-shaped center. The backbone of one arm is calculated
+in a single numpy pass, the other arm is its point reflection. The whole
+backbone is extruded as one polygon per layer, so the cell has no children and
+the generation time is linear in the number of vertices.
+
+:py:func:`spiral_archimedean` has arms with a constant pitch `r = r0 + k * phi`,
+:py:func:`spiral_euler` is a racetrack of 180° euler bends and straights.
+
+`o1` is at the origin facing west, `o2` faces east.
+"""
+
+import numpy as np
+import numpy.typing as npt
+from kfactory import KCell, LayerEnum, kdb
+from kfactory.enclosure import LayerEnclosure
+
+from kgeneric.cells.bezier import bezier_length
+from kgeneric.cells.dbu.bezier import bezier_backbone
+from kgeneric.cells.dbu.euler import euler_backbone
+from kgeneric.cells.dbu.extrude import extrude_backbone
+from kgeneric.cells.decorator import cell
+
+__all__ = [
+    "archimedean_length",
+    "spiral_archimedean_backbone",
+    "spiral_euler_backbone",
+    "spiral_archimedean",
+    "spiral_euler",
+]
+
+
+def archimedean_length(r1: float, r2: float, k: float) -> float:
+    """Length of an archimedean spiral `r = r0 + k * phi` between two radii."""
+
+    def primitive(r: float) -> float:
+        return float((r * np.hypot(r, k) + k**2 * np.arcsinh(r / k)) / (2 * k))
+
+    return primitive(r2) - primitive(r1)
+
+
+def _join_arms(
+    arm: npt.NDArray[np.float64],
+    arm_angles: npt.NDArray[np.float64],
+    center: npt.NDArray[np.float64],
+    center_angles: npt.NDArray[np.float64],
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Reflected arm reversed, center and arm, without the duplicate joints."""
+    backbone = np.concatenate([-arm[:0:-1], center, arm[1:]])
+    angles = np.concatenate([arm_angles[:0:-1], center_angles, arm_angles[1:]])
+    return backbone - backbone[0], angles
+
+
+def spiral_archimedean_backbone(
+    radius: float, pitch: float, turns: int, angle_step: float = 1
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], float]:
+    """Backbone of an archimedean double spiral.
+
+    The center is an s-bend of two circular arcs with `radius`, tangent to the
+    arms. Each arm ends with a short arc which turns it to a horizontal
+    direction, its end is on the grid.
+
+    Args:
+        radius: Radius of the arcs of the center. [dbu]
+        pitch: Distance between neighboring windings of the two arms. [dbu]
+        turns: Number of turns of each arm.
+        angle_step: Angle between the points of the backbone in degrees.
+
+    Returns:
+        `(N, 2)` points, `(N,)` tangent angles in radians and the length. [dbu]
+    """
+    if turns < 1:
+        raise ValueError(f"turns must be at least 1, got {turns=}")
+    k = pitch / np.pi
+    if 2 * radius <= k:
+        raise ValueError(f"radius must be larger than pitch / (2 * pi), got {radius=}")
+    step = np.deg2rad(angle_step)
+
+    r0 = np.sqrt(4 * radius**2 - k**2)
+    delta0 = np.arctan(k / r0)
+    phi_end = 2 * np.pi * turns - np.pi / 2
+    phi = np.linspace(0, phi_end, max(int(phi_end / step + 0.5), 2) + 1)
+    r = r0 + k * phi
+    arm = np.stack([r * np.cos(phi), r * np.sin(phi)], axis=1)
+    arm_angles = phi + np.pi / 2 - np.arctan(k / r)
+
+    # turn the end of the arm to east
+    r_end = r[-1]
+    delta_end = np.arctan(k / r_end)
+    t = np.linspace(0, delta_end, max(int(delta_end / step + 0.5), 1) + 1)[1:]
+    h = arm_angles[-1]
+    arc_center = arm[-1] + r_end * np.array([-np.sin(h), np.cos(h)])
+    arc = arc_center + r_end * np.stack([np.sin(h + t), -np.cos(h + t)], axis=1)
+    arm = np.concatenate([arm, arc])
+    arm_angles = np.concatenate([arm_angles, h + t])
+    end = arm[-1].copy()
+    arm += np.linspace(0, 1, len(arm))[:, None] * (np.round(end) - end)
+    arm[-1] = np.round(arm[-1])
+
+    # s-bend from -arm[0] to arm[0], point symmetric around the origin
+    a = np.linspace(
+        delta0 + np.pi,
+        2 * np.pi - delta0,
+        max(int((np.pi - 2 * delta0) / step + 0.5), 2) + 1,
+    )
+    rho = r0 / (2 * np.cos(delta0))
+    half = rho * np.stack(
+        [np.cos(delta0) + np.cos(a), np.sin(delta0) + np.sin(a)], axis=1
+    )
+    center = np.concatenate([-half[:0:-1], half])
+    center_angles = np.concatenate([a[:0:-1], a]) + np.pi / 2
+
+    length = 2 * (archimedean_length(r0, r_end, k) + r_end * delta_end)
+    length += 2 * rho * (np.pi - 2 * delta0)
+    return (*_join_arms(arm, arm_angles, center, center_angles), length)
+
+
+def spiral_euler_backbone(
+    radius: float,
+    pitch: int,
+    length: int,
+    turns: int,
+    resolution: float = 150,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], float]:
+    """Backbone of a racetrack double spiral of euler bends.
+
+    The bends of each arm alternate between the two ends of the straights. All
+    bends are scaled copies of the innermost one, so the backbone of the bends is
+    only calculated once. The center is a bezier s-bend along the straights.
+
+    Args:
+        radius: Minimum radius of the innermost bends. [dbu]
+        pitch: Distance between neighboring straights of the two arms. [dbu]
+        length: Length of the straights. [dbu]
+        turns: Number of turns of each arm.
+        resolution: Angle resolution of the bends.
+
+    Returns:
+        `(N, 2)` points, `(N,)` tangent angles in radians and the length. [dbu]
+    """
+    if turns < 1:
+        raise ValueError(f"turns must be at least 1, got {turns=}")
+    unit, unit_angles = euler_backbone(180, 1, resolution)
+    span = unit[-1, 1]
+    # height of the innermost bend, with the same parity as the pitch so the
+    # straights are on the grid
+    d0 = int(np.ceil(radius * span))
+    d0 += (d0 - pitch) % 2
+    if d0 <= pitch:
+        raise ValueError(f"pitch must be smaller than the bend height {d0}")
+    y0 = (pitch - d0) // 2
+
+    n = 2 * turns
+    i = np.arange(n)
+    sign = np.where(i % 2, -1, 1)
+    heights = d0 + 2 * pitch * i
+    y = y0 + np.concatenate([[0], np.cumsum(sign * heights)])
+    starts = np.stack([np.where(i % 2, 0, length), y[:-1]], axis=1)
+    bends = (sign * heights / span)[:, None, None] * unit + starts[:, None, :]
+    arm = np.concatenate([bends.reshape(-1, 2), [(length, y[-1])]])
+    bend_angles = unit_angles + np.pi * (i % 2)[:, None]
+    arm_angles = np.concatenate([bend_angles.reshape(-1), [2 * np.pi]])
+    arm -= (length / 2, 0)
+
+    control_points = np.array(
+        [(-length / 2, -y0), (0, -y0), (0, y0), (length / 2, y0)], dtype=np.float64
+    )
+    center, center_angles = bezier_backbone(
+        np.linspace(0, 1, max(int(resolution), 2)), control_points
+    )
+
+    total = 2 * (2 * np.pi * heights.sum() / span + n * length)
+    total += bezier_length(control_points.tolist())
+    return (*_join_arms(arm, arm_angles, center, center_angles), total)
+
+
+def _spiral(
+    backbone: npt.NDArray[np.float64],
+    angles: npt.NDArray[np.float64],
+    length: float,
+    width: int,
+    layer: int | LayerEnum,
+    enclosure: LayerEnclosure | None,
+) -> KCell:
+    c = KCell()
+    extrude_backbone(c, layer, backbone, angles, width, enclosure)
+    c.create_port(trans=kdb.Trans(2, False, 0, 0), width=width, layer=layer)
+    c.create_port(
+        trans=kdb.Trans(0, False, *np.round(backbone[-1]).astype(int).tolist()),
+        width=width,
+        layer=layer,
+    )
+    c.autorename_ports()
+    c.info["length_um"] = float(length * c.kcl.dbu)
+    c.info["n_points"] = len(backbone)
+    return c
+
+
+@cell
+def spiral_archimedean(
+    width: int,
+    radius: int,
+    pitch: int,
+    turns: int,
+    layer: int | LayerEnum,
+    enclosure: LayerEnclosure | None = None,
+    angle_step: float = 1,
+) -> KCell:
+    """Archimedean double spiral [dbu].
+
+    Args:
+        width: Width of the core. [dbu]
+        radius: Radius of the arcs of the center. [dbu]
+        pitch: Distance between neighboring windings. [dbu]
+        turns: Number of turns of each arm.
+        layer: Layer index / LayerEnum of the core.
+        enclosure: Slab/exclude definition. [dbu]
+        angle_step: Angle between the points of the backbone in degrees.
+    """
+    backbone, angles, length = spiral_archimedean_backbone(
+        radius, pitch, turns, angle_step
+    )
+    return _spiral(backbone, angles, length, width, layer, enclosure)
+
+
+@cell
+def spiral_euler(
+    width: int,
+    radius: int,
+    pitch: int,
+    length: int,
+    turns: int,
+    layer: int | LayerEnum,
+    enclosure: LayerEnclosure | None = None,
+    resolution: float = 150,
+) -> KCell:
+    """Racetrack double spiral of euler bends [dbu].
+
+    The `length` of the straights has to be large enough for the s-bend in the
+    center, which has a height of about 2.75 times the `radius`.
+
+    Args:
+        width: Width of the core. [dbu]
+        radius: Minimum radius of the innermost bends. [dbu]
+        pitch: Distance between neighboring straights. [dbu]
+        length: Length of the straights. [dbu]
+        turns: Number of turns of each arm.
+        layer: Layer index / LayerEnum of the core.
+        enclosure: Slab/exclude definition. [dbu]
+        resolution: Angle resolution of the bends.
+    """
+    backbone, angles, total = spiral_euler_backbone(
+        radius, pitch, length, turns, resolution
+    )
+    return _spiral(backbone, angles, total, width, layer, enclosure)
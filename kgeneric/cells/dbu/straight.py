@@ -15,10 +15,13 @@ A straight is a rectangle of material with excludes and/or slab around it::
 The slabs and excludes can be given in the form of an :py:class:~`Enclosure`.
 """
 
-from kfactory import KCell, LayerEnum, cell, kdb
+from kfactory import KCell, LayerEnum, kdb
 from kfactory.enclosure import LayerEnclosure
 from kfactory.kcell import Info
 
+from kgeneric.cells.decorator import cell
+from kgeneric.cross_section import section_edges
+
 __all__ = ["straight"]
 
 
@@ -59,8 +62,9 @@ def straight(
         name="o2", trans=kdb.Trans(0, False, length, 0), layer=layer, width=width
     )
 
-    if enclosure is not None:
-        enclosure.apply_minkowski_y(c, layer)
+    layers, edges = section_edges(width, enclosure)
+    for layer_enc, (d_top, d_bot) in zip(layers, edges):
+        c.shapes(layer_enc).insert(kdb.Box(0, int(d_bot), length, int(d_top)))
     c.info = Info(
         **{
             "width_um": width * c.kcl.dbu,
@@ -1,12 +1,108 @@
 """Taper definitions [dbu].
 
-TODO: Non-linear tapers
+Besides the linear :py:func:`taper`, :py:func:`taper_profile` creates tapers
+following a width profile `w(t)` with `t` from 0 to 1 along the taper:
+
+- `"linear"`: `w1 + (w2 - w1) * t`
+- `"parabolic"`: `sqrt(w1**2 + (w2**2 - w1**2) * t)`
+- `"exponential"`: `w1 * (w2 / w1)**t`
+- any callable `f(t, w1, w2)` taking and returning numpy arrays.
+
+The profile is sampled densely and then decimated to the points needed to stay
+within `tolerance` of it. The resulting half-width tables are cached per
+profile, widths, length and tolerance.
+
+A callable profile is named in the cell name by its `__name__` and a digest of
+its samples, e.g. `Pprofile_3f2a9c1d` for a lambda, so different functions give
+different cells and names and the same function gives the same name in every
+process.
 """
 
-from kfactory import KCell, cell, kdb
+import hashlib
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from kfactory import KCell, kdb
 from kfactory.enclosure import LayerEnclosure
 
-__all__ = ["taper"]
+from kgeneric.cells.arrays import to_polygon
+from kgeneric.cells.decorator import cell
+from kgeneric.cross_section import enclosure_sections
+
+__all__ = [
+    "NamedProfile",
+    "named_profile",
+    "taper",
+    "taper_profile",
+    "taper_profile_points",
+    "taper_profiles",
+]
+
+Profile = Callable[[npt.NDArray[np.float64], float, float], npt.NDArray[np.float64]]
+
+taper_profiles: dict[str, Profile] = {
+    "linear": lambda t, w1, w2: w1 + (w2 - w1) * t,
+    "parabolic": lambda t, w1, w2: np.sqrt(w1**2 + (w2**2 - w1**2) * t),
+    "exponential": lambda t, w1, w2: w1 * (w2 / w1) ** t,
+}
+
+_max_samples = 8192
+
+
+@dataclass(frozen=True)
+class NamedProfile:
+    """Callable profile with a stable name, equal by name.
+
+    Attributes:
+        function: Profile `f(t, w1, w2)`.
+        name: `__name__` of the function and digest of its samples.
+    """
+
+    function: Profile = field(compare=False)
+    name: str
+
+    def __call__(
+        self, t: npt.NDArray[np.float64], w1: float, w2: float
+    ) -> npt.NDArray[np.float64]:
+        """Width of the profile."""
+        return self.function(t, w1, w2)
+
+
+def _samples(length: int) -> npt.NDArray[np.float64]:
+    return np.linspace(0, length, min(length, _max_samples) + 1)
+
+
+def named_profile(
+    profile: Profile, width1: int, width2: int, length: int
+) -> NamedProfile:
+    """Profile named by a digest of its samples for a taper. [dbu]
+
+    Args:
+        profile: Profile `f(t, w1, w2)`.
+        width1: Width at the start. [dbu]
+        width2: Width at the end. [dbu]
+        length: Length of the taper. [dbu]
+    """
+    if isinstance(profile, NamedProfile):
+        return profile
+    y = np.asarray(profile(_samples(length) / length, width1, width2), np.float64)
+    digest = hashlib.sha1(np.round(y, 6).tobytes()).hexdigest()[:8]
+    name = getattr(profile, "__name__", "profile")
+    if not name.isidentifier():
+        name = "profile"
+    return NamedProfile(profile, f"{name}_{digest}")
+
+
+def _name_profile(arguments: dict[str, Any]) -> None:
+    profile = arguments.get("profile")
+    if callable(profile):
+        arguments["profile"] = named_profile(
+            profile, arguments["width1"], arguments["width2"], arguments["length"]
+        )
 
 
 @cell
@@ -66,3 +162,127 @@ def taper(
     c.info["length_um"] = length * c.kcl.dbu
 
     return c
+
+
+def _decimate(
+    x: npt.NDArray[np.float64], y: npt.NDArray[np.float64], tolerance: float
+) -> npt.NDArray[np.bool_]:
+    """Points of a sampled function needed to stay within tolerance of it.
+
+    Ramer-Douglas-Peucker with the vertical distance to the chords.
+    """
+    keep = np.zeros(len(x), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(x) - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        chord = y[i] + (y[j] - y[i]) * (x[i + 1 : j] - x[i]) / (x[j] - x[i])
+        error = np.abs(y[i + 1 : j] - chord)
+        k = int(np.argmax(error))
+        if error[k] > tolerance:
+            m = i + 1 + k
+            keep[m] = True
+            stack += [(i, m), (m, j)]
+    return keep
+
+
+@lru_cache(maxsize=256)
+def taper_profile_points(
+    width1: int,
+    width2: int,
+    length: int,
+    profile: str | Profile = "parabolic",
+    tolerance: float = 0.5,
+) -> npt.NDArray[np.int64]:
+    """Upper edge of a taper as `(N, 2)` array of `(x, half width)`. [dbu]
+
+    The result is cached and read-only.
+
+    Args:
+        width1: Width at the start. [dbu]
+        width2: Width at the end. [dbu]
+        length: Length of the taper. [dbu]
+        profile: Name of a profile in :py:data:`taper_profiles` or `f(t, w1, w2)`.
+        tolerance: Maximum deviation of the edge from the profile before
+            snapping to the grid. [dbu]
+    """
+    f = taper_profiles[profile] if isinstance(profile, str) else profile
+    x = _samples(length)
+    y = np.asarray(f(x / length, width1, width2), dtype=np.float64) / 2
+    keep = _decimate(x, y, tolerance)
+    points = np.stack([np.round(x[keep]), np.round(y[keep])], axis=1).astype(np.int64)
+    points[0, 1] = width1 // 2
+    points[-1, 1] = width2 // 2
+    points.setflags(write=False)
+    return points
+
+
+def _taper_polygon(points: npt.NDArray[np.int64], d: int) -> kdb.Polygon:
+    """Polygon of a symmetric taper with the half widths grown by `d`."""
+    y = np.maximum(points[:, 1] + d, 0)
+    top = np.stack([points[:, 0], y], axis=1)
+    return to_polygon(np.concatenate([top, top[::-1] * (1, -1)]))
+
+
+@cell(normalize=_name_profile)
+def taper_profile(
+    width1: int,
+    width2: int,
+    length: int,
+    layer: int,
+    profile: str | Profile = "parabolic",
+    enclosure: LayerEnclosure | None = None,
+    tolerance: float = 0.5,
+) -> KCell:
+    r"""Taper following a width profile [dbu].
+
+    Visualization::
+
+                 ___
+              __/  _│ Slab/Exclude
+            _/  __/ │
+          _/  _/    │
+        │/  _/      │
+        │  /        │ Core
+        │  \_       │
+        │\_  \_     │
+          \_  \__   │
+            \__  \__│
+               \___ │ Slab/Exclude
+
+    The slab/exclude follows the profile at a constant vertical distance.
+
+    Args:
+        width1: Width of the core on the left side. [dbu]
+        width2: Width of the core on the right side. [dbu]
+        length: Length of the taper. [dbu]
+        layer: Layer index / :py:class:~`LayerEnum` of the core.
+        profile: `"linear"`, `"parabolic"`, `"exponential"` or a function
+            `f(t, w1, w2)` returning the width for `t` from 0 to 1, named by
+            :py:func:`named_profile`.
+        enclosure: Definition of the slab/exclude.
+        tolerance: Maximum deviation of the edges from the profile before
+            snapping to the grid. [dbu]
+    """
+    c = KCell()
+    points = taper_profile_points(width1, width2, length, profile, tolerance)
+    c.shapes(layer).insert(_taper_polygon(points, 0))
+
+    c.create_port(name="o1", trans=kdb.Trans(2, False, 0, 0), width=width1, layer=layer)
+    c.create_port(
+        name="o2", trans=kdb.Trans(0, False, length, 0), width=width2, layer=layer
+    )
+
+    for layer_enc, d_min, d_max in enclosure_sections(enclosure):
+        region = kdb.Region(_taper_polygon(points, d_max))
+        if d_min is not None:
+            region -= kdb.Region(_taper_polygon(points, d_min))
+        c.shapes(layer_enc).insert(region)
+
+    c.info["width1_um"] = width1 * c.kcl.dbu
+    c.info["width2_um"] = width2 * c.kcl.dbu
+    c.info["length_um"] = length * c.kcl.dbu
+    c.info["n_points"] = 2 * len(points)
+    return c
@@ -0,0 +1,106 @@
+"""Cell decorator of kgeneric.
+
+:py:func:`cell` is :py:func:`kfactory.cell` with the post-processing steps of
+kgeneric applied to the created cell before it is cached, currently the optional
+vertex reduction of :py:mod:`kgeneric.simplify`, whose tolerance is a parameter
+of the cache key and name. The returned cells are tracked by the bounded cache of
+:py:mod:`kgeneric.cache` and the version key of the factory
+(:py:mod:`kgeneric.version`) is recorded before it builds its first cell.
+The factories accept a `cross_section` (:py:mod:`kgeneric.cross_section`) for
+their `width`, `layer` and `enclosure`; the enclosure is interned
+(:py:mod:`kgeneric.enclosure`), so equal enclosures give the same cells. A
+factory can replace further arguments by canonical values with `normalize`.
+"""
+
+import functools
+import inspect
+from collections.abc import Callable
+from typing import Any, overload
+
+from kfactory import KCell
+from kfactory import cell as kf_cell
+
+from kgeneric.cache import factory_cache, track, tracking
+from kgeneric.cross_section import CrossSection, cross_section_params
+from kgeneric.enclosure import intern_params
+from kgeneric.simplify import (
+    SIMPLIFY_PARAM,
+    simplification_tolerance,
+    simplify_cell,
+)
+from kgeneric.version import record, register
+
+__all__ = ["cell"]
+
+
+@overload
+def cell(_func: Callable[..., KCell], /) -> Callable[..., KCell]: ...
+
+
+@overload
+def cell(
+    *,
+    normalize: Callable[[dict[str, Any]], None] | None = None,
+    **kwargs: Any,
+) -> Callable[[Callable[..., KCell]], Callable[..., KCell]]: ...
+
+
+def cell(
+    _func: Callable[..., KCell] | None = None,
+    /,
+    *,
+    normalize: Callable[[dict[str, Any]], None] | None = None,
+    **kwargs: Any,
+) -> Callable[..., KCell] | Callable[[Callable[..., KCell]], Callable[..., KCell]]:
+    """Decorator to cache and auto name a cell, see :py:func:`kfactory.cell`.
+
+    Args:
+        normalize: Replaces arguments by canonical values in the bound arguments
+            of a call, before the cache lookup and naming.
+        kwargs: Passed to :py:func:`kfactory.cell`.
+    """
+
+    def decorator(f: Callable[..., KCell]) -> Callable[..., KCell]:
+        @functools.wraps(f)
+        def post_processed(*args: Any, **kw: Any) -> KCell:
+            tolerance = kw.pop(SIMPLIFY_PARAM, None)
+            c = f(*args, **kw)
+            if tolerance is not None:
+                simplify_cell(c, tolerance)
+            return c
+
+        cached = kf_cell(post_processed, **kwargs)
+        cache = factory_cache(cached)
+        if cache is None:
+            return cached
+
+        params = cross_section_params(f)
+        interned = intern_params(f)
+        signature = inspect.signature(f)
+
+        @functools.wraps(f)
+        def tracked(
+            *args: Any, cross_section: CrossSection | None = None, **kw: Any
+        ) -> KCell:
+            if cross_section is not None:
+                kw = params(args, kw, cross_section)
+            if interned is not None:
+                args = interned(args, kw)
+            if normalize is not None:
+                bound = signature.bind_partial(*args, **kw)
+                normalize(bound.arguments)
+                args, kw = bound.args, bound.kwargs
+            tolerance = simplification_tolerance()
+            if tolerance is not None:
+                kw[SIMPLIFY_PARAM] = tolerance
+            if not cache:
+                record(tracked)
+            with tracking():
+                c = cached(*args, **kw)
+                track(c, cache)
+            return c
+
+        register(tracked, cache)
+        return tracked
+
+    return decorator if _func is None else decorator(_func)
@@ -6,24 +6,41 @@ end.
 """
 
 import numpy as np
+import numpy.typing as npt
 from kfactory import kdb
-from kfactory.enclosure import LayerEnclosure, extrude_path
-from kfactory.kcell import KCell, LayerEnum, cell
+from kfactory.enclosure import LayerEnclosure
+from kfactory.kcell import KCell, LayerEnum
 from scipy.optimize import brentq  # type: ignore[import]
 from scipy.special import fresnel  # type: ignore[import]
 
+from kgeneric.cells.arrays import extrude_path, snap, to_dpoints
+from kgeneric.cells.decorator import cell
+
 __all__ = [
     "euler_bend_points",
     "euler_sbend_points",
+    "euler_length",
+    "euler_sbend_angle",
+    "euler_sbend_length",
     "bend_euler",
     "bend_s_euler",
 ]
 
 
-def euler_bend_points(
-    angle_amount: float = 90, radius: float = 100, resolution: float = 150
-) -> list[kdb.DPoint]:
-    """Base euler bend, no transformation, emerging from the origin."""
+def euler_length(radius: float, angle_amount: float) -> float:
+    """Backbone length of an euler bend, `4 * R * th` with `th` half the angle.
+
+    Args:
+        radius: Minimum radius of the bend. [um]
+        angle_amount: Angle of the bend in degrees.
+    """
+    return 2 * radius * abs(angle_amount) * np.pi / 180
+
+
+def _euler_bend_array(
+    angle_amount: float, radius: float, resolution: float
+) -> npt.NDArray[np.float64]:
+    """`(N, 2)` backbone of :py:func:`euler_bend_points`."""
     if angle_amount < 0:
         raise ValueError(f"angle_amount should be positive. Got {angle_amount}")
     # End angle
@@ -31,7 +48,7 @@ def euler_bend_points(
 
     # If bend is trivial, return a trivial shape
     if eth == 0:
-        return [kdb.DPoint(0, 0)]
+        return np.zeros((1, 2), dtype=np.float64)
 
     # Curve min radius
     R = radius
@@ -46,47 +63,33 @@ def euler_bend_points(
     a = np.sqrt(R**2 * np.abs(th))
     sq2pi = np.sqrt(2 * np.pi)
 
-    # Function for computing curve coords
-    (fasin, facos) = fresnel(np.sqrt(2 / np.pi) * R * th / a)
-
-    def _xy(s: float) -> kdb.DPoint:
-        if th == 0:
-            return kdb.DPoint(0, 0)
-        elif s <= Ltot / 2:
-            (fsin, fcos) = fresnel(s / (sq2pi * a))
-            X = sq2pi * a * fcos
-            Y = sq2pi * a * fsin
-        else:
-            (fsin, fcos) = fresnel((Ltot - s) / (sq2pi * a))
-            X = (
-                sq2pi
-                * a
-                * (
-                    facos
-                    + np.cos(2 * th) * (facos - fcos)
-                    + np.sin(2 * th) * (fasin - fsin)
-                )
-            )
-            Y = (
-                sq2pi
-                * a
-                * (
-                    fasin
-                    - np.cos(2 * th) * (fasin - fsin)
-                    + np.sin(2 * th) * (facos - fcos)
-                )
-            )
-        return kdb.DPoint(X, Y)
+    fasin, facos = fresnel(np.sqrt(2 / np.pi) * R * th / a)
 
     # Parametric step size
     step = Ltot / int(th * resolution)
+    s = np.arange(int(round(Ltot / step)) + 1) * step
+
+    first = s <= Ltot / 2
+    fsin, fcos = fresnel(np.where(first, s, Ltot - s) / (sq2pi * a))
+    X = np.where(
+        first,
+        fcos,
+        facos + np.cos(2 * th) * (facos - fcos) + np.sin(2 * th) * (fasin - fsin),
+    )
+    Y = np.where(
+        first,
+        fsin,
+        fasin - np.cos(2 * th) * (fasin - fsin) + np.sin(2 * th) * (facos - fcos),
+    )
+    points: npt.NDArray[np.float64] = sq2pi * a * np.stack([X, Y], axis=1)
+    return points
 
-    # Generate points
-    points = []
-    for i in range(int(round(Ltot / step)) + 1):
-        points.append(_xy(i * step))
 
-    return points
+def euler_bend_points(
+    angle_amount: float = 90, radius: float = 100, resolution: float = 150
+) -> list[kdb.DPoint]:
+    """Base euler bend, no transformation, emerging from the origin."""
+    return to_dpoints(_euler_bend_array(angle_amount, radius, resolution))
 
 
 def euler_endpoint(
@@ -100,7 +103,7 @@ def euler_endpoint(
     R = radius
     clockwise = angle_amount < 0
 
-    (fsin, fcos) = fresnel(np.sqrt(2 * th / np.pi))
+    fsin, fcos = fresnel(np.sqrt(2 * th / np.pi))
 
     a = 2 * np.sqrt(2 * np.pi * th) * (np.cos(th) * fcos + np.sin(th) * fsin)
     r = a * R
@@ -113,10 +116,13 @@ def euler_endpoint(
     return X + start_point[0], Y + start_point[1]
 
 
-def euler_sbend_points(
-    offset: float = 5.0, radius: float = 10.0e-6, resolution: float = 150
-) -> list[kdb.DPoint]:
-    """An Euler s-bend with parallel input and output, separated by an offset."""
+def euler_sbend_angle(offset: float, radius: float) -> tuple[float, float]:
+    """Angle of the two bends and length of the straight part of an euler s-bend.
+
+    Returns:
+        The signed angle of the bends in degrees and the signed vertical extra
+        length if the offset cannot be reached by the bends alone.
+    """
 
     # Function to find root of
     def froot(th: float) -> float:
@@ -140,21 +146,38 @@ def euler_sbend_points(
         angle = dir * 90.0
         extra_y = -dir * fb
 
-    spoints = []
-    right_point = []
-    points_left_half = euler_bend_points(abs(angle), radius, resolution)
+    return angle, extra_y
+
+
+def euler_sbend_length(offset: float, radius: float) -> float:
+    """Backbone length of an euler s-bend.
+
+    Args:
+        offset: Offset between left/right. [um]
+        radius: Minimum radius of the bends. [um]
+    """
+    angle, extra_y = euler_sbend_angle(offset, radius)
+    return 2 * euler_length(radius, angle) + abs(extra_y)
+
+
+def _euler_sbend_array(
+    offset: float, radius: float, resolution: float
+) -> npt.NDArray[np.float64]:
+    """`(N, 2)` backbone of :py:func:`euler_sbend_points`."""
+    dir = +1 if offset >= 0 else -1
+    angle, extra_y = euler_sbend_angle(offset, radius)
 
-    # Second bend
-    for pts in points_left_half:
-        r_pt_x = 2 * points_left_half[-1].x - pts.x
-        r_pt_y = 2 * points_left_half[-1].y - pts.y + extra_y * dir
-        pts.y = pts.y * dir
-        r_pt_y = r_pt_y * dir
-        spoints.append(pts)
-        right_point.append(kdb.DPoint(r_pt_x, r_pt_y))
-    spoints += right_point[::-1]
+    left = _euler_bend_array(abs(angle), radius, resolution)
+    # Second bend, point symmetric to the first one
+    right = 2 * left[-1] - left[::-1] + (0, extra_y * dir)
+    return np.concatenate([left, right]) * (1, dir)
 
-    return spoints
+
+def euler_sbend_points(
+    offset: float = 5.0, radius: float = 10.0e-6, resolution: float = 150
+) -> list[kdb.DPoint]:
+    """An Euler s-bend with parallel input and output, separated by an offset."""
+    return to_dpoints(_euler_sbend_array(offset, radius, resolution))
 
 
 @cell
@@ -178,10 +201,10 @@ def bend_euler(
     """
     c = KCell()
     dbu = c.layout().dbu
-    backbone = euler_bend_points(angle, radius=radius, resolution=resolution)
+    backbone = _euler_bend_array(angle, radius, resolution)
 
     extrude_path(
-        target=c,
+        c,
         layer=layer,
         path=backbone,
         width=width,
@@ -192,17 +215,18 @@ def bend_euler(
 
     c.create_port(
         layer=layer,
-        width=int(width / c.kcl.dbu),
-        trans=kdb.Trans(2, False, backbone[0].to_itype(dbu).to_v()),
+        width=round(width / c.kcl.dbu),
+        trans=kdb.Trans(2, False, *snap(backbone[0], dbu).tolist()),
     )
 
     c.create_port(
-        dcplx_trans=kdb.DCplxTrans(1, angle, False, backbone[-1].to_v()),
-        dwidth=width,
+        dcplx_trans=kdb.DCplxTrans(1, angle, False, *backbone[-1].tolist()),
+        dwidth=round(width / c.kcl.dbu) * c.kcl.dbu,
         layer=layer,
     )
 
     c.autorename_ports()
+    c.info["length_um"] = euler_length(radius, angle)
     return c
 
 
@@ -227,13 +251,9 @@ def bend_s_euler(
     """
     c = KCell()
     dbu = c.layout().dbu
-    backbone = euler_sbend_points(
-        offset=offset,
-        radius=radius,
-        resolution=resolution,
-    )
+    backbone = _euler_sbend_array(offset, radius, resolution)
     extrude_path(
-        target=c,
+        c,
         layer=layer,
         path=backbone,
         width=width,
@@ -242,27 +262,24 @@ def bend_s_euler(
         end_angle=0,
     )
 
-    v = backbone[-1] - backbone[0]
-    if v.x < 0:
-        p1 = backbone[-1].to_itype(dbu)
-        p2 = backbone[0].to_itype(dbu)
-    else:
-        p1 = backbone[0].to_itype(dbu)
-        p2 = backbone[-1].to_itype(dbu)
+    p1, p2 = snap(backbone[[0, -1]], dbu).tolist()
+    if p2[0] < p1[0]:
+        p1, p2 = p2, p1
     c.create_port(
         name="o1",
-        trans=kdb.Trans(2, False, p1.to_v()),
-        width=int(width / c.kcl.dbu),
+        trans=kdb.Trans(2, False, *p1),
+        width=round(width / c.kcl.dbu),
         port_type="optical",
         layer=layer,
     )
     c.create_port(
         name="o2",
-        trans=kdb.Trans(0, False, p2.to_v()),
-        width=int(width / c.kcl.dbu),
+        trans=kdb.Trans(0, False, *p2),
+        width=round(width / c.kcl.dbu),
         port_type="optical",
         layer=layer,
     )
+    c.info["length_um"] = euler_sbend_length(offset, radius)
     return c
 
 
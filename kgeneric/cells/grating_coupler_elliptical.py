@@ -3,13 +3,16 @@ from typing import Literal
 
 import kfactory as kf
 import numpy as np
+import numpy.typing as npt
 
+from kgeneric.cells.arrays import to_dpath, to_dpolygon, to_path
+from kgeneric.cells.decorator import cell
 from kgeneric.layers import LAYER
 
 nm = 1e-3
 
 
-@kf.cell
+@cell
 def grating_coupler_elliptical(
     polarization: Literal["te"] | Literal["tm"] = "te",
     taper_length: float = 16.6,
@@ -88,7 +91,6 @@ def grating_coupler_elliptical(
             taper_angle + trenches_extra_angle,
         )
         c.shapes(layer_trench).insert(tooth)
-    kf.kdb.Region(c.shapes(layer_trench))
 
     # Make the taper
     if taper_extent_n_periods == "last":
@@ -100,7 +102,7 @@ def grating_coupler_elliptical(
 
     def _get_taper_pts(
         n_periods_over_grating: float,
-    ) -> tuple[list[kf.kdb.DPoint], float]:
+    ) -> tuple[npt.NDArray[np.float64], float]:
         p_taper = p_start + n_periods_over_grating
         _taper_length = taper_length + (n_periods_over_grating - 1) * _period
 
@@ -123,7 +125,7 @@ def grating_coupler_elliptical(
 
     if layer_taper is not None:
         c.shapes(layer_taper).insert(
-            kf.kdb.DPolygon(taper_pts).transformed(kf.kdb.Trans(taper_offset, 0))
+            to_dpolygon(taper_pts).transformed(kf.kdb.Trans(taper_offset, 0))
         )
         c.create_port(
             name="o1", trans=kf.kdb.Trans.R180, width=wg_width * um, layer=layer_taper
@@ -167,19 +169,21 @@ def grating_tooth(
     return (
         _extracted_from_grating_tooth_15(width, backbone_points)
         if spiked
-        else kf.kdb.Region(kf.kdb.Path(backbone_points, width))
+        else kf.kdb.Region(to_path(backbone_points, width))
     )
 
 
 # TODO Rename this here and in `grating_tooth`
 def _extracted_from_grating_tooth_15(width, backbone_points):
     spike_length = width // 3
-    path = kf.kdb.DPath(backbone_points, width).polygon()
+    path = to_dpath(backbone_points, width).polygon()
     edges = kf.kdb.Edges([path.to_itype(kf.kcl.dbu)])
     bb_edges = kf.kdb.Edges(
         [
-            kf.kdb.DEdge(backbone_points[0], backbone_points[1]).to_itype(kf.kcl.dbu),
-            kf.kdb.DEdge(backbone_points[-1], backbone_points[-2]).to_itype(kf.kcl.dbu),
+            kf.kdb.DEdge(*backbone_points[0], *backbone_points[1]).to_itype(kf.kcl.dbu),
+            kf.kdb.DEdge(*backbone_points[-1], *backbone_points[-2]).to_itype(
+                kf.kcl.dbu
+            ),
         ]
     )
     border_edges = edges.interacting(bb_edges)
@@ -201,14 +205,12 @@ def grating_taper_points(
     taper_angle: float,
     wg_width: float,
     angle_step: float = 1.0,
-) -> list[kf.kdb.Point]:
+) -> npt.NDArray[np.float64]:
     taper_arc = ellipse_arc(
         a, b, taper_length, -taper_angle / 2, taper_angle / 2, angle_step=angle_step
     )
 
-    p0 = kf.kdb.DPoint(x0, wg_width / 2)
-    p1 = kf.kdb.DPoint(x0, -wg_width / 2)
-    return [p0, p1] + taper_arc
+    return np.concatenate([[(x0, wg_width / 2), (x0, -wg_width / 2)], taper_arc])
 
 
 def ellipse_arc(
@@ -218,11 +220,11 @@ def ellipse_arc(
     angle_min: float,
     angle_max: float,
     angle_step: float = 0.5,
-) -> list[kf.kdb.DPoint]:
+) -> npt.NDArray[np.float64]:
     angle = np.arange(angle_min, angle_max + angle_step, angle_step) * np.pi / 180
     xs = a * np.cos(angle) + x0
     ys = b * np.sin(angle)
-    return [kf.kdb.DPoint(x, y) for x, y in zip(xs, ys)]  # np.column_stack([xs, ys])
+    return np.column_stack([xs, ys])
 
 
 grating_coupler_elliptical_te = partial(
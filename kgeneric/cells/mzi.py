@@ -3,7 +3,6 @@ from functools import partial
 from typing import Any
 
 import kfactory as kf
-from kfactory import cell
 from kfactory.enclosure import LayerEnclosure
 from kfactory.kcell import LayerEnum
 from kfactory.routing.optical import route
@@ -11,8 +10,12 @@ from kfactory.typings import CellFactory
 
 from kgeneric.cells.coupler import coupler
 from kgeneric.cells.dbu.straight import straight as straight_dbu
+from kgeneric.cells.decorator import cell
 from kgeneric.cells.euler import bend_euler
 from kgeneric.cells.straight import straight as straight_function
+from kgeneric.collision import CollisionGuard
+from kgeneric.length import chain_length
+from kgeneric.quantized import route_quantized
 
 
 @cell
@@ -39,6 +42,9 @@ def mzi(
 ) -> kf.KCell:
     """Mzi.
 
+    See :py:func:`mzi_routed` for checked or quantized routes between the arms
+    and the combiner.
+
     Args:
         delta_length: bottom arm vertical extra length.
         length_y: vertical length for both and top arms.
@@ -77,6 +83,73 @@ def mzi(
                           Lx
 
     """
+    return _mzi(
+        delta_length=delta_length,
+        length_y=length_y,
+        length_x=length_x,
+        bend=bend,
+        straight=straight,
+        straight_y=straight_y,
+        straight_x_top=straight_x_top,
+        straight_x_bot=straight_x_bot,
+        splitter=splitter,
+        combiner=combiner,
+        with_splitter=with_splitter,
+        port_e1_splitter=port_e1_splitter,
+        port_e0_splitter=port_e0_splitter,
+        port_e0_combiner=port_e0_combiner,
+        width=width,
+        layer=layer,
+        radius=radius,
+        enclosure=enclosure,
+        **kwargs,
+    )
+
+
+@cell
+def mzi_routed(
+    check_collisions: bool = True, quantize_routes: bool = False, **kwargs: Any
+) -> kf.KCell:
+    """Mzi with options for the routes from the arms to the combiner.
+
+    An own factory, so the options do not change the names of :py:func:`mzi`.
+
+    Args:
+        check_collisions: raise a CollisionError if the combiner routes
+            overlap the arms.
+        quantize_routes: build the combiner routes from quantized straight
+            segments instead of one straight per length.
+        kwargs: parameters of :py:func:`mzi`.
+    """
+    return _mzi(
+        check_collisions=check_collisions, quantize_routes=quantize_routes, **kwargs
+    )
+
+
+def _mzi(
+    delta_length: float = 10.0,
+    length_y: float = 2.0,
+    length_x: float | None = 0.1,
+    bend: Callable[..., kf.KCell] = bend_euler,
+    straight: CellFactory = straight_function,
+    straight_y: CellFactory | None = None,
+    straight_x_top: CellFactory | None = None,
+    straight_x_bot: CellFactory | None = None,
+    splitter: CellFactory = coupler,
+    combiner: CellFactory | None = None,
+    with_splitter: bool = True,
+    port_e1_splitter: str = "o3",
+    port_e0_splitter: str = "o4",
+    port_e0_combiner: str = "o1",
+    width: float = 1.0,
+    layer: int | LayerEnum = 0,
+    radius: float = 5.0,
+    enclosure: LayerEnclosure | None = None,
+    check_collisions: bool = False,
+    quantize_routes: bool = False,
+    **kwargs: Any,
+) -> kf.KCell:
+    """Mzi, see :py:func:`mzi` and :py:func:`mzi_routed`."""
     combiner = combiner or splitter
     straight_x_top = straight_x_top or straight
     straight_x_bot = straight_x_bot or straight
@@ -155,15 +228,19 @@ def mzi(
         kf.kdb.Trans(sxt.ports["o2"].x - cp2.ports["o1"].x + 2 * bend_width, 0)
     )
 
-    route(
-        c,
+    route_function = route_quantized if quantize_routes else route
+    _route = (
+        partial(CollisionGuard(c).route, route_function=route_function)
+        if check_collisions
+        else partial(route_function, c)
+    )
+    _route(
         cp2.ports["o2"],
         sxt.ports["o2"],
         straight_connect,
         bend,
     )
-    route(
-        c,
+    _route(
         cp2.ports["o1"],
         sxb.ports["o2"],
         straight_connect,
@@ -177,22 +254,214 @@ def mzi(
         c.add_port(name="o2", port=b5.ports["o1"])
     c.add_ports([port for port in cp2.ports if port.orientation == 0])
     c.autorename_ports()
+    c.info["length_top_um"] = chain_length(c, cp1.ports[port_e1_splitter])[0]
+    c.info["length_bot_um"] = chain_length(c, cp1.ports[port_e0_splitter])[0]
     return c
 
 
-if __name__ == "__main__":
-    from kgeneric import pdk
-    from kgeneric.layers import LAYER
-
-    um = 1 / pdk.kcl.dbu
-    enclosure = LayerEnclosure(
-        [
-            (LAYER.DEEPTRENCH, 2 * um, 3 * um),
-            (LAYER.SLAB90, 2 * um),
-        ],
-        name="WGSLAB",
-        main_layer=LAYER.WG,
+def _mirrored(c: kf.KCell, inst: kf.Instance, mirror: kf.kdb.Trans) -> kf.Instance:
+    """Place a copy of an instance mirrored with `mirror`."""
+    copy = c << inst.cell
+    copy.trans = mirror * inst.trans
+    return copy
+
+
+def _mirrored_bend(c: kf.KCell, inst: kf.Instance, mirror: kf.kdb.Trans) -> kf.Instance:
+    """Place a copy of a bend mirrored with `mirror` and with o1 and o2 swapped.
+
+    Euler bends are not exactly symmetric on the grid, the swapped copy has `o2`
+    towards the combiner like the bends of the routes in :py:func:`mzi`.
+    """
+    o1, o2 = (inst.cell.ports[name].trans for name in ("o1", "o2"))
+    copy = c << inst.cell
+    copy.trans = mirror * inst.trans * o2 * kf.kdb.Trans.M0 * o1.inverted()
+    return copy
+
+
+@cell
+def mzi_frame(
+    length_y: float = 2.0,
+    length_x: float = 0.1,
+    bend: Callable[..., kf.KCell] = bend_euler,
+    straight: CellFactory = straight_function,
+    straight_y: CellFactory | None = None,
+    straight_x_top: CellFactory | None = None,
+    splitter: CellFactory = coupler,
+    combiner: CellFactory | None = None,
+    port_e1_splitter: str = "o3",
+    port_e0_splitter: str = "o4",
+    port_e0_combiner: str = "o1",
+    port_e1_combiner: str = "o2",
+    width: float = 1.0,
+    layer: int | LayerEnum = 0,
+    radius: float = 5.0,
+    enclosure: LayerEnclosure | None = None,
+    **kwargs: Any,
+) -> kf.KCell:
+    """Splitter, combiner and top arm of an MZI, see :py:func:`mzi_incremental`.
+
+    The bottom arm is open below the first bends: `a1` is below the splitter,
+    `a2` below the combiner, both facing south. The remaining ports are the ports
+    of splitter and combiner.
+
+    Args:
+        length_y: vertical length of the top arm.
+        length_x: horizontal length of the arms.
+        bend: 90 degrees bend library.
+        straight: straight function.
+        straight_y: straight for length_y.
+        straight_x_top: top straight for length_x.
+        splitter: splitter function.
+        combiner: combiner function.
+        port_e1_splitter: east top splitter port.
+        port_e0_splitter: east bot splitter port.
+        port_e0_combiner: west bot combiner port.
+        port_e1_combiner: west top combiner port.
+        width: straight width.
+        layer: waveguide layer.
+        radius: bend radius.
+        enclosure: waveguide enclosure.
+        kwargs: combiner/splitter kwargs.
+    """
+    straight_y = straight_y or straight
+    straight_x_top = straight_x_top or straight
+    c = kf.KCell()
+    b = bend(width=width, layer=layer, radius=radius, enclosure=enclosure)
+    kwargs.pop("kwargs", "")
+    kwargs |= {"width": width, "layer": layer, "enclosure": enclosure}
+    cp1 = c << splitter(**kwargs)
+    cp2 = c << (combiner(**kwargs) if combiner else cp1.cell)
+    sy = straight_y(length=length_y, width=width, layer=layer, enclosure=enclosure)
+
+    b1 = c << b
+    b1.connect("o1", cp1.ports[port_e1_splitter])
+    sytl = c << sy
+    sytl.connect("o1", b1.ports["o2"])
+    b2 = c << b
+    b2.connect("o2", sytl.ports["o2"])
+    sxt = c << straight_x_top(
+        length=length_x, width=width, layer=layer, enclosure=enclosure
     )
+    sxt.connect("o1", b2.ports["o1"])
+    b5 = c << b
+    b5.connect("o1", cp1.ports[port_e0_splitter], mirror=True)
+
+    # the right side is the left side mirrored at the center of the top straight
+    mirror = kf.kdb.Trans(2, True, sxt.ports["o1"].x + sxt.ports["o2"].x, 0)
+    _mirrored_bend(c, b1, mirror)
+    _mirrored(c, sytl, mirror)
+    _mirrored(c, b2, mirror)
+    b8 = _mirrored_bend(c, b5, mirror)
+    p0 = (mirror * cp1.ports[port_e0_splitter].trans).disp
+    cp2.transform(kf.kdb.Trans(p0 - cp2.ports[port_e0_combiner].trans.disp))
+
+    c.add_ports(
+        [p for p in cp1.ports if p.name not in (port_e1_splitter, port_e0_splitter)]
+    )
+    c.add_ports(
+        [p for p in cp2.ports if p.name not in (port_e1_combiner, port_e0_combiner)]
+    )
+    c.autorename_ports()
+    c.add_port(name="a1", port=b5.ports["o2"])
+    c.add_port(name="a2", port=b8.ports["o1"])
+    c.info["length_top_um"] = 4 * b.info["length_um"] + 2 * length_y + length_x
+    c.info["length_bend_um"] = b.info["length_um"]
+    return c
+
+
+@cell
+def mzi_incremental(
+    delta_length: float = 10.0,
+    length_y: float = 2.0,
+    length_x: float = 0.1,
+    bend: Callable[..., kf.KCell] = bend_euler,
+    straight: CellFactory = straight_function,
+    straight_y: CellFactory | None = None,
+    straight_x_top: CellFactory | None = None,
+    straight_x_bot: CellFactory | None = None,
+    splitter: CellFactory = coupler,
+    combiner: CellFactory | None = None,
+    width: float = 1.0,
+    layer: int | LayerEnum = 0,
+    radius: float = 5.0,
+    enclosure: LayerEnclosure | None = None,
+    **kwargs: Any,
+) -> kf.KCell:
+    """Mzi for sweeps of `delta_length`.
+
+    Same layout as :py:func:`mzi`, but splitter, combiner, the top arm and the
+    first bends of the bottom arm are an instance of the cached
+    :py:func:`mzi_frame`. The bottom arm is placed from cached cells at the ports
+    of the frame, so a new `delta_length` only creates the vertical straight of
+    the bottom arm, which is used for both of its sides.
+
+    Args:
+        delta_length: bottom arm vertical extra length.
+        length_y: vertical length for both and top arms.
+        length_x: horizontal length.
+        bend: 90 degrees bend library.
+        straight: straight function.
+        straight_y: straight for length_y and delta_length.
+        straight_x_top: top straight for length_x.
+        straight_x_bot: bottom straight for length_x.
+        splitter: splitter function.
+        combiner: combiner function.
+        width: straight width.
+        layer: waveguide layer.
+        radius: bend radius.
+        enclosure: waveguide enclosure.
+        kwargs: combiner/splitter kwargs.
+    """
+    straight_y = straight_y or straight
+    straight_x_bot = straight_x_bot or straight
+    c = kf.KCell()
+    frame = c << mzi_frame(
+        length_y=length_y,
+        length_x=length_x,
+        bend=bend,
+        straight=straight,
+        straight_y=straight_y,
+        straight_x_top=straight_x_top,
+        splitter=splitter,
+        combiner=combiner,
+        width=width,
+        layer=layer,
+        radius=radius,
+        enclosure=enclosure,
+        **kwargs,
+    )
+    b = bend(width=width, layer=layer, radius=radius, enclosure=enclosure)
+    sy = straight_y(
+        length=delta_length / 2 + length_y,
+        width=width,
+        layer=layer,
+        enclosure=enclosure,
+    )
+
+    syl = c << sy
+    syl.connect("o1", frame.ports["a1"])
+    b6 = c << b
+    b6.connect("o1", syl.ports["o2"])
+    sxb = c << straight_x_bot(
+        length=length_x, width=width, layer=layer, enclosure=enclosure
+    )
+    sxb.connect("o1", b6.ports["o2"])
+    mirror = kf.kdb.Trans(2, True, frame.ports["a1"].x + frame.ports["a2"].x, 0)
+    _mirrored_bend(c, b6, mirror)
+    _mirrored(c, syl, mirror)
+
+    c.add_ports([p for p in frame.ports if p.name not in ("a1", "a2")])
+    info = frame.cell.info
+    c.info["length_top_um"] = info["length_top_um"]
+    c.info["length_bot_um"] = (
+        4 * info["length_bend_um"] + delta_length + 2 * length_y + length_x
+    )
+    return c
+
+
+if __name__ == "__main__":
+    from kgeneric.gpdk import enclosure_slab as enclosure
+
     c = mzi(length_x=1, with_splitter=True, enclosure=enclosure)
     c.draw_ports()
     r0 = c.insts[0]
@@ -0,0 +1,126 @@
+"""Ring and racetrack resonators.
+
+See :py:mod:`kgeneric.cells.dbu.ring` for the layout of the instances.
+"""
+
+from kfactory import KCell, LayerEnum, kcl
+from kfactory.enclosure import LayerEnclosure
+
+from kgeneric.cells.dbu.ring import ring_double as ring_double_dbu
+from kgeneric.cells.dbu.ring import ring_single as ring_single_dbu
+from kgeneric.cross_section import with_cross_section
+from kgeneric.layers import LAYER
+
+__all__ = [
+    "racetrack",
+    "ring_double",
+    "ring_double_dbu",
+    "ring_single",
+    "ring_single_dbu",
+]
+
+
+@with_cross_section
+def ring_single(
+    gap: float = 0.2,
+    radius: float = 10,
+    width: float = 0.5,
+    layer: int | LayerEnum = LAYER.WG,
+    enclosure: LayerEnclosure | None = None,
+    length_x: float = 0,
+    length_y: float = 0,
+) -> KCell:
+    """Ring resonator with one bus waveguide [um].
+
+    Args:
+        gap: Gap between bus and ring. [um]
+        radius: Radius of the bends. [um]
+        width: Width of the core of ring and bus. [um]
+        layer: Layer index / :py:class:~`LayerEnum` of the core.
+        enclosure: Definition of the slab/exclude.
+        length_x: Length of the straights parallel to the bus. [um]
+        length_y: Length of the straights perpendicular to the bus. [um]
+    """
+    return ring_single_dbu(
+        width=round(width / kcl.dbu),
+        radius=round(radius / kcl.dbu),
+        gap=round(gap / kcl.dbu),
+        layer=layer,
+        enclosure=enclosure,
+        length_x=round(length_x / kcl.dbu),
+        length_y=round(length_y / kcl.dbu),
+    )
+
+
+@with_cross_section
+def racetrack(
+    gap: float = 0.2,
+    radius: float = 10,
+    length_x: float = 10,
+    length_y: float = 0,
+    width: float = 0.5,
+    layer: int | LayerEnum = LAYER.WG,
+    enclosure: LayerEnclosure | None = None,
+) -> KCell:
+    """Racetrack resonator with one bus waveguide [um].
+
+    Args:
+        gap: Gap between bus and racetrack. [um]
+        radius: Radius of the bends. [um]
+        length_x: Length of the straights parallel to the bus. [um]
+        length_y: Length of the straights perpendicular to the bus. [um]
+        width: Width of the core of racetrack and bus. [um]
+        layer: Layer index / :py:class:~`LayerEnum` of the core.
+        enclosure: Definition of the slab/exclude.
+    """
+    return ring_single(
+        gap=gap,
+        radius=radius,
+        width=width,
+        layer=layer,
+        enclosure=enclosure,
+        length_x=length_x,
+        length_y=length_y,
+    )
+
+
+@with_cross_section
+def ring_double(
+    gap: float = 0.2,
+    radius: float = 10,
+    width: float = 0.5,
+    layer: int | LayerEnum = LAYER.WG,
+    enclosure: LayerEnclosure | None = None,
+    length_x: float = 0,
+    length_y: float = 0,
+    gap_drop: float | None = None,
+) -> KCell:
+    """Ring resonator with a through and a drop bus [um].
+
+    Args:
+        gap: Gap between through bus and ring. [um]
+        radius: Radius of the bends. [um]
+        width: Width of the core of ring and busses. [um]
+        layer: Layer index / :py:class:~`LayerEnum` of the core.
+        enclosure: Definition of the slab/exclude.
+        length_x: Length of the straights parallel to the busses. [um]
+        length_y: Length of the straights perpendicular to the busses. [um]
+        gap_drop: Gap between drop bus and ring, `gap` if `None`. [um]
+    """
+    return ring_double_dbu(
+        width=round(width / kcl.dbu),
+        radius=round(radius / kcl.dbu),
+        gap=round(gap / kcl.dbu),
+        layer=layer,
+        enclosure=enclosure,
+        length_x=round(length_x / kcl.dbu),
+        length_y=round(length_y / kcl.dbu),
+        gap_drop=None if gap_drop is None else round(gap_drop / kcl.dbu),
+    )
+
+
+if __name__ == "__main__":
+    from kgeneric import gpdk
+
+    c = ring_double(enclosure=gpdk.enclosure_sc, length_x=5)
+    c.show()
@@ -0,0 +1,92 @@
+"""Double spirals for delay lines.
+
+See :py:mod:`kgeneric.cells.dbu.spiral` for the geometry.
+"""
+
+from kfactory import KCell, LayerEnum, kcl
+from kfactory.enclosure import LayerEnclosure
+
+from kgeneric.cells.dbu.spiral import spiral_archimedean as spiral_archimedean_dbu
+from kgeneric.cells.dbu.spiral import spiral_euler as spiral_euler_dbu
+from kgeneric.cross_section import with_cross_section
+
+__all__ = [
+    "spiral_archimedean",
+    "spiral_archimedean_dbu",
+    "spiral_euler",
+    "spiral_euler_dbu",
+]
+
+
+@with_cross_section
+def spiral_archimedean(
+    width: float = 0.5,
+    radius: float = 10,
+    pitch: float = 3,
+    turns: int = 3,
+    layer: int | LayerEnum = 0,
+    enclosure: LayerEnclosure | None = None,
+    angle_step: float = 1,
+) -> KCell:
+    """Archimedean double spiral [um].
+
+    Args:
+        width: Width of the core. [um]
+        radius: Radius of the arcs of the center. [um]
+        pitch: Distance between neighboring windings. [um]
+        turns: Number of turns of each arm.
+        layer: Layer index / :py:class:~`LayerEnum` of the core.
+        enclosure: Definition of the slab/exclude.
+        angle_step: Angle between the points of the backbone in degrees.
+    """
+    return spiral_archimedean_dbu(
+        width=round(width / kcl.dbu),
+        radius=round(radius / kcl.dbu),
+        pitch=round(pitch / kcl.dbu),
+        turns=turns,
+        layer=layer,
+        enclosure=enclosure,
+        angle_step=angle_step,
+    )
+
+
+@with_cross_section
+def spiral_euler(
+    width: float = 0.5,
+    radius: float = 10,
+    pitch: float = 3,
+    length: float = 60,
+    turns: int = 3,
+    layer: int | LayerEnum = 0,
+    enclosure: LayerEnclosure | None = None,
+    resolution: float = 150,
+) -> KCell:
+    """Racetrack double spiral of euler bends [um].
+
+    Args:
+        width: Width of the core. [um]
+        radius: Minimum radius of the innermost bends. [um]
+        pitch: Distance between neighboring straights. [um]
+        length: Length of the straights. [um]
+        turns: Number of turns of each arm.
+        layer: Layer index / :py:class:~`LayerEnum` of the core.
+        enclosure: Definition of the slab/exclude.
+        resolution: Angle resolution of the bends.
+    """
+    return spiral_euler_dbu(
+        width=round(width / kcl.dbu),
+        radius=round(radius / kcl.dbu),
+        pitch=round(pitch / kcl.dbu),
+        length=round(length / kcl.dbu),
+        turns=turns,
+        layer=layer,
+        enclosure=enclosure,
+        resolution=resolution,
+    )
+
+
+if __name__ == "__main__":
+    from kgeneric import LAYER, gpdk
+
+    c = spiral_euler(layer=LAYER.WG, enclosure=gpdk.enclosure_sc)
+    c.show()
@@ -15,15 +15,16 @@ A straight is a rectangle of material with excludes and/or slab around it::
 The slabs and excludes can be given in the form of an :py:class:~`Enclosure`.
 """
 
-
 from kfactory import KCell, LayerEnum, kcl
 from kfactory.enclosure import LayerEnclosure
 
 from kgeneric.cells.dbu.straight import straight as straight_dbu
+from kgeneric.cross_section import with_cross_section
 
 __all__ = ["straight", "straight_dbu"]
 
 
+@with_cross_section
 def straight(
     width: float,
     length: float,
@@ -51,7 +52,7 @@ def straight(
         enclosure: Definition of slabs/excludes. [um]
     """
     return straight_dbu(
-        int(width / kcl.dbu), int(length / kcl.dbu), layer, enclosure=enclosure
+        round(width / kcl.dbu), round(length / kcl.dbu), layer, enclosure=enclosure
     )
 
 
@@ -1,18 +1,20 @@
-r"""Tapers, linear only.
-
-TODO: Non-linear tapers.
+r"""Tapers, linear and following a width profile.
 
+See :py:mod:`kgeneric.cells.dbu.taper` for the available profiles.
 """
 
-
 from kfactory import KCell, LayerEnum, kcl
 from kfactory.enclosure import LayerEnclosure
 
+from kgeneric.cells.dbu.taper import Profile
 from kgeneric.cells.dbu.taper import taper as taper_dbu
+from kgeneric.cells.dbu.taper import taper_profile as taper_profile_dbu
+from kgeneric.cross_section import with_cross_section
 
-__all__ = ["taper", "taper_dbu"]
+__all__ = ["taper", "taper_dbu", "taper_profile", "taper_profile_dbu"]
 
 
+@with_cross_section
 def taper(
     width1: float,
     width2: float,
@@ -45,9 +47,43 @@ def taper(
         enclosure: Definition of the slab/exclude.
     """
     return taper_dbu(
-        width1=int(width1 / kcl.dbu),
-        width2=int(width2 / kcl.dbu),
-        length=int(length / kcl.dbu),
+        width1=round(width1 / kcl.dbu),
+        width2=round(width2 / kcl.dbu),
+        length=round(length / kcl.dbu),
+        layer=layer,
+        enclosure=enclosure,
+    )
+
+
+@with_cross_section
+def taper_profile(
+    width1: float = 0.5,
+    width2: float = 3,
+    length: float = 10,
+    layer: int | LayerEnum = 0,
+    profile: str | Profile = "parabolic",
+    enclosure: LayerEnclosure | None = None,
+    tolerance: float = 0.5,
+) -> KCell:
+    r"""Taper following a width profile [um].
+
+    Args:
+        width1: Width of the core on the left side. [um]
+        width2: Width of the core on the right side. [um]
+        length: Length of the taper. [um]
+        layer: Layer index / :py:class:~`LayerEnum` of the core.
+        profile: `"linear"`, `"parabolic"`, `"exponential"` or a function
+            `f(t, w1, w2)` returning the width for `t` from 0 to 1.
+        enclosure: Definition of the slab/exclude.
+        tolerance: Maximum deviation of the edges from the profile before
+            snapping to the grid. [dbu]
+    """
+    return taper_profile_dbu(
+        width1=round(width1 / kcl.dbu),
+        width2=round(width2 / kcl.dbu),
+        length=round(length / kcl.dbu),
         layer=layer,
+        profile=profile,
         enclosure=enclosure,
+        tolerance=tolerance,
     )
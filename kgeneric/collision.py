@@ -0,0 +1,208 @@
+"""Collision checks for routed waveguides.
+
+The routers place straights and bends without looking at what is already in the
+target cell. A :py:class:`CollisionGuard` keeps a per-layer box-tree index
+(a :py:class:`klayout.db.Shapes` container) of the geometry of a cell and checks
+new instances only against the shapes overlapping their bounding boxes::
+
+    guard = CollisionGuard(c)
+    guard.route(p1, p2, route_function=route_sc)
+    guard.route(p3, p4, route_function=route_sc)  # also checked against route 1
+
+Instances placed through the guard are added to the index incrementally, so the
+cell is only flattened once per layer, when the layer is first checked.
+"""
+
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from kfactory import KCell, LayerEnum, kdb
+from kfactory.kcell import Instance, Port
+from kfactory.routing.optical import route
+
+__all__ = ["CollisionError", "CollisionGuard"]
+
+_shape_flags = kdb.Shapes.SPolygons | kdb.Shapes.SBoxes | kdb.Shapes.SPaths
+
+
+class CollisionError(ValueError):
+    """Raised if new instances overlap existing geometry of a cell."""
+
+    def __init__(self, cell: KCell, collisions: dict[int, kdb.Region]):
+        """Create a new collision error.
+
+        Args:
+            cell: Cell in which the collision happened.
+            collisions: Overlapping region per layer index.
+        """
+        self.collisions = collisions
+        locations = ", ".join(
+            f"{cell.kcl.get_info(layer)}: {region.bbox()}"
+            for layer, region in collisions.items()
+        )
+        super().__init__(f"Collision in {cell.name}: {locations}")
+
+
+class CollisionGuard:
+    """Box-tree index of the geometry of a cell to check new instances against.
+
+    Attributes:
+        c: The guarded cell.
+        layers: Layers which are checked. If `None`, the layers of the ports of
+            the routed instances are checked.
+        marker_layer: If set, collisions are drawn on this layer instead of
+            raising a :py:class:`CollisionError`.
+        collisions: All collisions found so far per layer.
+    """
+
+    def __init__(
+        self,
+        c: KCell,
+        layers: Iterable[int | LayerEnum] | None = None,
+        marker_layer: int | LayerEnum | None = None,
+    ) -> None:
+        """Create a guard for a cell.
+
+        Args:
+            c: Cell to guard.
+            layers: Layers to check. `None` checks the port layers of new instances.
+            marker_layer: Draw collisions on this layer instead of raising.
+        """
+        self.c = c
+        self.layers = None if layers is None else list(layers)
+        self.marker_layer = marker_layer
+        self.collisions: dict[int, kdb.Region] = {}
+        self._index: dict[int, kdb.Shapes] = {}
+        self._n_indexed = len(c.insts)
+
+    def _layer_index(self, layer: int, exclude: Iterable[Instance] = ()) -> kdb.Shapes:
+        """Get the index of a layer, flatten the cell into it on first access.
+
+        Args:
+            layer: Layer index.
+            exclude: Instances of the cell which should not be indexed, i.e. the
+                instances which are about to be checked.
+        """
+        if layer not in self._index:
+            excluded = {id(inst) for inst in exclude}
+            shapes = kdb.Shapes()
+            shapes.insert(self.c.shapes(layer))
+            for inst in self.c.insts:
+                if id(inst) not in excluded:
+                    shapes.insert(_instance_region(inst, layer))
+            self._index[layer] = shapes
+        return self._index[layer]
+
+    def _layers(self, insts: Iterable[Instance]) -> list[int]:
+        if self.layers is not None:
+            return self.layers
+        return sorted({port.layer for inst in insts for port in inst.ports})
+
+    def sync(self) -> None:
+        """Index all instances added to the cell since the last sync or route.
+
+        Instances that were placed directly with `c << cell` are not known to
+        the guard until they are synced.
+        """
+        new_insts = list(self.c.insts)[self._n_indexed :]
+        self.add(*new_insts)
+
+    def add(self, *insts: Instance) -> None:
+        """Add instances to the index without checking them.
+
+        Args:
+            insts: Instances to add. They must already be placed in the cell.
+        """
+        for layer in self._index:
+            shapes = self._index[layer]
+            for inst in insts:
+                shapes.insert(_instance_region(inst, layer))
+        self._n_indexed = len(self.c.insts)
+
+    def check(self, *insts: Instance) -> dict[int, kdb.Region]:
+        """Check instances against the index.
+
+        Only shapes of the index which overlap the bounding box of a polygon of
+        the instances are taken into account. Shapes which only touch (such as
+        two waveguides connected at a port) are not a collision.
+
+        Args:
+            insts: Instances to check.
+
+        Returns:
+            Overlapping region per layer index. Empty if there are no collisions.
+        """
+        collisions: dict[int, kdb.Region] = {}
+        for layer in self._layers(insts):
+            index = self._layer_index(layer, exclude=insts)
+            new_region = kdb.Region()
+            for inst in insts:
+                new_region.insert(_instance_region(inst, layer))
+            new_region.merge()
+            nearby = kdb.Region()
+            for poly in new_region.each():
+                for shape in index.each_overlapping(_shape_flags, poly.bbox()):
+                    nearby.insert(shape.polygon)
+            overlap = new_region & nearby
+            if not overlap.is_empty():
+                collisions[layer] = overlap
+        return collisions
+
+    def place(self, *insts: Instance) -> list[Instance]:
+        """Check instances and add them to the index.
+
+        Args:
+            insts: Newly placed instances.
+
+        Raises:
+            CollisionError: If the instances overlap existing geometry and no
+                `marker_layer` is set.
+        """
+        collisions = self.check(*insts)
+        if collisions:
+            for layer, region in collisions.items():
+                if layer in self.collisions:
+                    self.collisions[layer] += region
+                else:
+                    self.collisions[layer] = region
+            if self.marker_layer is None:
+                raise CollisionError(self.c, collisions)
+            for region in collisions.values():
+                self.c.shapes(self.marker_layer).insert(region)
+        self.add(*insts)
+        return list(insts)
+
+    def route(
+        self,
+        p1: Port,
+        p2: Port,
+        *args: Any,
+        route_function: Callable[..., Any] = route,
+        **kwargs: Any,
+    ) -> list[Instance]:
+        """Route between two ports and check the route for collisions.
+
+        Args:
+            p1: Start port.
+            p2: End port.
+            args: Passed to `route_function` after the ports.
+            route_function: Router placing instances in the cell, called as
+                `route_function(c, p1, p2, *args, **kwargs)`.
+            kwargs: Passed to `route_function`.
+
+        Returns:
+            The instances placed by the route.
+        """
+        self.sync()
+        n = len(self.c.insts)
+        route_function(self.c, p1, p2, *args, **kwargs)
+        return self.place(*list(self.c.insts)[n:])
+
+
+def _instance_region(inst: Instance, layer: int) -> kdb.Region:
+    """Flat region of an instance (or instance array) on a layer."""
+    cell_region = kdb.Region(inst.cell.begin_shapes_rec(layer))
+    region = kdb.Region()
+    for trans in inst.cell_inst.each_cplx_trans():
+        region.insert(cell_region.transformed(trans))
+    return region
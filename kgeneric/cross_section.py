@@ -0,0 +1,196 @@
+"""Cross sections of waveguides.
+
+A :py:class:`CrossSection` bundles the width and layer of the core with the
+sections of its enclosure, so a technology defines them once::
+
+    xs_sc = CrossSection(500, LAYER.WG, enclosure_sc)
+
+    straight_dbu(length=10_000, cross_section=xs_sc)
+    bend_euler(radius=10, cross_section=xs_sc)
+
+Factories decorated with :py:func:`kgeneric.cells.cell` and the um wrappers
+decorated with :py:func:`with_cross_section` accept a `cross_section`, which
+sets the parameters `width`, `layer` and `enclosure` not given explicitly. The
+cells and their names are the same as with the parameters given one by one.
+
+The sections of an enclosure are converted once to a tuple of
+`(layer, d_min, d_max)` (:py:func:`enclosure_sections`) and to the offsets of
+the edges of every strip from the backbone (:py:func:`section_edges`), both are
+cached and used by the extrusion of all cells.
+"""
+
+import functools
+import hashlib
+import inspect
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from kfactory import KCell, LayerEnum, kcl
+from kfactory.enclosure import LayerEnclosure
+
+__all__ = [
+    "CrossSection",
+    "Section",
+    "cross_section_params",
+    "enclosure_sections",
+    "section_edges",
+    "with_cross_section",
+]
+
+Section = tuple[int, int | None, int]
+
+
+@functools.lru_cache(maxsize=1024)
+def enclosure_sections(enclosure: LayerEnclosure | None) -> tuple[Section, ...]:
+    """Sections of an enclosure as `(layer, d_min, d_max)`. [dbu]
+
+    `d_min` is `None` for sections reaching into the core.
+    """
+    if enclosure is None:
+        return ()
+    return tuple(
+        (layer, section.d_min, section.d_max)
+        for layer, layer_section in enclosure.layer_sections.items()
+        for section in layer_section.sections
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def section_edges(
+    width: int, enclosure: LayerEnclosure | None
+) -> tuple[tuple[int, ...], npt.NDArray[np.float64]]:
+    """Layers and edge offsets of the strips of an enclosure around a core.
+
+    A section without `d_min` is one strip over the core, a section with `d_min`
+    two strips on either side of it.
+
+    Args:
+        width: Width of the core. [dbu]
+        enclosure: Slab/exclude definition. [dbu]
+
+    Returns:
+        The layer of each strip and the `(N, 2)` offsets of its left and right
+        edge from the backbone (left of the backbone is positive). [dbu]
+    """
+    w = width / 2
+    layers: list[int] = []
+    edges: list[tuple[float, float]] = []
+    for layer, d_min, d_max in enclosure_sections(enclosure):
+        if d_min is None:
+            layers.append(layer)
+            edges.append((w + d_max, -w - d_max))
+        else:
+            layers.extend((layer, layer))
+            edges.extend([(w + d_max, w + d_min), (-w - d_min, -w - d_max)])
+    array = np.array(edges, dtype=np.float64).reshape(-1, 2)
+    array.flags.writeable = False
+    return tuple(layers), array
+
+
+@dataclass(frozen=True)
+class CrossSection:
+    """Core and enclosure of a waveguide.
+
+    Cross sections are immutable and compare and hash by width, layer and the
+    sections of the enclosure; the hash is calculated once.
+
+    Attributes:
+        width: Width of the core. [dbu]
+        layer: Layer of the core.
+        enclosure: Slab/exclude definition. [dbu]
+        name: Name used in cell names, derived from the content if empty.
+        sections: Sections of the enclosure as `(layer, d_min, d_max)`. [dbu]
+        layers: Layer of every strip of the enclosure.
+        edges: `(N, 2)` offsets of the edges of the strips. [dbu]
+    """
+
+    width: int
+    layer: int | LayerEnum
+    enclosure: LayerEnclosure | None = field(default=None, compare=False)
+    name: str = field(default="", compare=False)
+    sections: tuple[Section, ...] = field(init=False)
+    layers: tuple[int, ...] = field(init=False, compare=False)
+    edges: npt.NDArray[np.float64] = field(init=False, compare=False, repr=False)
+    _hash: int = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Convert the enclosure to sections and edges."""
+        if self.width // 2 * 2 != self.width:
+            raise ValueError("The width must be a multiple of 2 database units")
+        sections = enclosure_sections(self.enclosure)
+        layers, edges = section_edges(self.width, self.enclosure)
+        key = (self.width, int(self.layer), sections)
+        object.__setattr__(self, "sections", sections)
+        object.__setattr__(self, "layers", layers)
+        object.__setattr__(self, "edges", edges)
+        object.__setattr__(self, "_hash", hash(key))
+        if not self.name:
+            digest = hashlib.sha1(repr(key).encode()).hexdigest()[:8]
+            object.__setattr__(self, "name", f"xs_{digest}")
+
+    def __hash__(self) -> int:
+        """Hash of width, layer and sections."""
+        return self._hash
+
+    @property
+    def dwidth(self) -> float:
+        """Width of the core, without floating point noise. [um]"""
+        return round(self.width * float(kcl.dbu), 9)
+
+    @classmethod
+    def from_um(
+        cls,
+        width: float,
+        layer: int | LayerEnum,
+        enclosure: LayerEnclosure | None = None,
+        name: str = "",
+    ) -> "CrossSection":
+        """Cross section with the width of the core in um."""
+        return cls(round(width / kcl.dbu), layer, enclosure, name)
+
+
+def cross_section_params(
+    f: Callable[..., Any],
+) -> Callable[[tuple[Any, ...], dict[str, Any], CrossSection], dict[str, Any]]:
+    """Function setting the parameters of `f` which a cross section defines.
+
+    The width is given in dbu if the `width` parameter of `f` is annotated as
+    `int`, otherwise in um.
+    """
+    sig = inspect.signature(f)
+    names = [n for n in ("width", "layer", "enclosure") if n in sig.parameters]
+    dbu = "width" in sig.parameters and sig.parameters["width"].annotation in (
+        int,
+        "int",
+    )
+
+    def params(
+        args: tuple[Any, ...], kwargs: dict[str, Any], xs: CrossSection
+    ) -> dict[str, Any]:
+        given = sig.bind_partial(*args, **kwargs).arguments
+        values = {
+            "width": xs.width if dbu else xs.dwidth,
+            "layer": xs.layer,
+            "enclosure": xs.enclosure,
+        }
+        return kwargs | {n: values[n] for n in names if n not in given}
+
+    return params
+
+
+def with_cross_section(f: Callable[..., KCell]) -> Callable[..., KCell]:
+    """Let a factory take `width`, `layer` and `enclosure` from a cross section."""
+    params = cross_section_params(f)
+
+    @functools.wraps(f)
+    def wrapper(
+        *args: Any, cross_section: CrossSection | None = None, **kwargs: Any
+    ) -> KCell:
+        if cross_section is not None:
+            kwargs = params(args, kwargs, cross_section)
+        return f(*args, **kwargs)
+
+    return wrapper
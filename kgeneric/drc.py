@@ -0,0 +1,316 @@
+"""Design rule checks of the generic PDK.
+
+A rule deck is a sequence of rules defined in Python::
+
+    rules = [
+        MinWidth(LAYER.WG, 0.15),
+        MinSpace(LAYER.WG, 0.15),
+        MinEnclosure(LAYER.WG, 1.95, outer=LAYER.WGCLAD),
+        MinArea(LAYER.WG, 0.05),
+    ]
+    results = check_drc(c, rules)  # {"WG.width": Region, ...}
+    drc_markers(c, results, rules).show()
+
+:py:func:`check_drc` runs all rules of a deck in one pass of a
+:py:class:`klayout.db.TilingProcessor`. The layout is cut into tiles which are
+checked in parallel threads, each tile sees the (flattened) shapes within the
+tile and a border around it, so the memory does not grow with the size of the
+layout and full reticles are checked in the same way as single cells. The
+distances are measured between facing edges (projection metrics). The
+border is the largest distance of the rules, the markers are clipped to their
+tile and merged afterwards. The checked cell is not modified,
+:py:func:`drc_markers` draws the markers of each rule on its marker layer
+(:py:attr:`LAYER.DRC_MARKER` by default) of a new cell instantiating it.
+
+:py:class:`MinArea` assembles polygons from the shapes of one tile and its
+border, it only checks polygons whose bounding box is smaller than its `extent`.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from kfactory import KCell, LayerEnum, kdb
+
+from kgeneric.layers import LAYER
+
+__all__ = [
+    "GENERIC_RULES",
+    "MinArea",
+    "MinEnclosure",
+    "MinSpace",
+    "MinWidth",
+    "Rule",
+    "check_drc",
+    "drc_markers",
+    "violations",
+]
+
+
+# distances between facing edges only, so the corners of polygons and the
+# chords of bends do not count as violations; edges meeting at more than 80°
+# are not checked against each other, e.g. the end face of a taper or bend at
+# a port and its sides, which meet at slightly less than 90° after snapping
+_PROJECTION = "false, Metrics.Projection, 80"
+
+
+def _layer_name(layer: int | LayerEnum) -> str:
+    return layer.name if isinstance(layer, LayerEnum) else str(layer)
+
+
+@dataclass(frozen=True)
+class Rule(ABC):
+    """Base class of the rules of a deck.
+
+    Attributes:
+        layer: Checked layer.
+        value: Limit of the rule. [um] or [um^2]
+        marker: Layer of the markers of violations.
+    """
+
+    layer: int | LayerEnum
+    value: float
+    marker: int | LayerEnum = LAYER.DRC_MARKER
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Name of the rule, e.g. `WG.width`."""
+
+    @property
+    def layers(self) -> tuple[int | LayerEnum, ...]:
+        """Layers read by the rule."""
+        return (self.layer,)
+
+    @property
+    def border(self) -> float:
+        """Context needed around a tile to check it. [um]"""
+        return self.value
+
+    @abstractmethod
+    def expression(self, inputs: dict[int, str], dbu: float) -> str:
+        """Tiling processor expression of the markers of the rule.
+
+        Args:
+            inputs: Input variable of each layer index.
+            dbu: Database unit of the layout. [um]
+        """
+
+
+@dataclass(frozen=True)
+class MinWidth(Rule):
+    """Minimum width of the polygons of a layer. [um]"""
+
+    @property
+    def name(self) -> str:
+        """Name of the rule, e.g. `WG.width`."""
+        return f"{_layer_name(self.layer)}.width"
+
+    def expression(self, inputs: dict[int, str], dbu: float) -> str:
+        """Edge pairs closer than the width, as polygons."""
+        d = round(self.value / dbu)
+        return f"{inputs[self.layer]}.width_check({d}, {_PROJECTION}).polygons"
+
+
+@dataclass(frozen=True)
+class MinSpace(Rule):
+    """Minimum space between the polygons of a layer. [um]"""
+
+    @property
+    def name(self) -> str:
+        """Name of the rule, e.g. `WG.space`."""
+        return f"{_layer_name(self.layer)}.space"
+
+    def expression(self, inputs: dict[int, str], dbu: float) -> str:
+        """Edge pairs closer than the space, as polygons."""
+        d = round(self.value / dbu)
+        return f"{inputs[self.layer]}.space_check({d}, {_PROJECTION}).polygons"
+
+
+@dataclass(frozen=True)
+class MinEnclosure(Rule):
+    """Minimum enclosure of a layer by another layer. [um]
+
+    The enclosing layer is drawn beside the core by the enclosures of kgeneric
+    (`d_min = 0`), the distance is measured to the outline of both layers.
+    Markers touching the boundary of the checked cell or the faces of its ports
+    are ignored, the core ends there and is enclosed by the connected cell.
+
+    Attributes:
+        outer: Layer which has to enclose `layer`.
+        required: Polygons of `layer` not touching `outer` violate the rule as a
+            whole. Off in :py:data:`GENERIC_RULES`, the grating couplers of the
+            generic PDK are drawn without cladding.
+    """
+
+    outer: int | LayerEnum = LAYER.WGCLAD
+    required: bool = False
+
+    @property
+    def name(self) -> str:
+        """Name of the rule, e.g. `WG.enclosure.WGCLAD`."""
+        return f"{_layer_name(self.layer)}.enclosure.{_layer_name(self.outer)}"
+
+    @property
+    def layers(self) -> tuple[int | LayerEnum, ...]:
+        """The enclosed and the enclosing layer."""
+        return self.layer, self.outer
+
+    def expression(self, inputs: dict[int, str], dbu: float) -> str:
+        """Edge pairs closer than the enclosure and the polygons not enclosed.
+
+        `faces` are the edges of the cell boundary and the port faces.
+        """
+        inner, outer = inputs[self.layer], inputs[self.outer]
+        d = round(self.value / dbu)
+        markers = (
+            f"{inner}.enclosed_check({inner} + {outer}, {d}, {_PROJECTION})"
+            ".polygons.not_interacting(faces)"
+        )
+        if self.required:
+            markers += f" + {inner}.not_interacting({outer})"
+        return markers
+
+
+@dataclass(frozen=True)
+class MinArea(Rule):
+    """Minimum area of the polygons of a layer. [um^2]
+
+    Attributes:
+        extent: Polygons with a larger width or height are not checked. [um]
+    """
+
+    extent: float = 10
+
+    @property
+    def name(self) -> str:
+        """Name of the rule, e.g. `WG.area`."""
+        return f"{_layer_name(self.layer)}.area"
+
+    @property
+    def border(self) -> float:
+        """Polygons up to the extent have to be complete in some tile."""
+        return self.extent
+
+    def expression(self, inputs: dict[int, str], dbu: float) -> str:
+        """Polygons smaller than the area which are complete in the tile.
+
+        `_tile` is `nil` if the layout fits into a single tile.
+        """
+        area = round(self.value / dbu**2)
+        frame = round(self.extent / dbu)
+        small = f"{inputs[self.layer]}.merged.with_area(0, {area}, false)"
+        return f"(_tile ? {small}.inside(_tile.sized({frame})) : {small})"
+
+
+GENERIC_RULES: tuple[Rule, ...] = (
+    MinWidth(LAYER.WG, 0.15),
+    MinSpace(LAYER.WG, 0.15),
+    MinEnclosure(LAYER.WG, 1.95, outer=LAYER.WGCLAD),
+    MinArea(LAYER.WG, 0.05),
+)
+"""Rules of the generic PDK.
+
+The enclosure is that of `gpdk.enclosure_sc` (2 um) less the deviation of the
+discretized bends.
+"""
+
+
+def _faces(c: KCell) -> kdb.Edges:
+    """Edges of the bounding box and the port faces of a cell. [dbu]"""
+    faces = kdb.Edges(c.bbox())
+    for port in c.ports:
+        if port._trans:
+            face = kdb.Edge(0, -port.width // 2, 0, port.width // 2)
+            faces.insert(face.transformed(port.trans))
+        else:
+            w = port.d.width / 2
+            dface = kdb.DEdge(0, -w, 0, w).transformed(port.dcplx_trans)
+            faces.insert(dface.to_itype(c.kcl.dbu))
+    return faces
+
+
+def check_drc(
+    c: KCell,
+    rules: Iterable[Rule] = GENERIC_RULES,
+    tile_size: float = 500,
+    threads: int | None = None,
+) -> dict[str, kdb.Region]:
+    """Check a cell and its children against a rule deck.
+
+    Args:
+        c: Cell to check.
+        rules: Rules to check.
+        tile_size: Width and height of the tiles. [um]
+        threads: Number of worker threads, the number of CPUs if `None`.
+
+    Returns:
+        The merged markers of each rule. [dbu]
+    """
+    rules = list(rules)
+    layout = c.kcl.layout
+    dbu = layout.dbu
+    tp = kdb.TilingProcessor()
+    tp.dbu = dbu
+    tp.threads = threads or os.cpu_count() or 1
+    tp.tile_size(tile_size, tile_size)
+    border = max((rule.border for rule in rules), default=0)
+    tp.tile_border(border, border)
+    # the processor does not keep the edges alive
+    faces = _faces(c)
+    tp.var("faces", faces)
+
+    inputs: dict[int, str] = {}
+    for rule in rules:
+        for layer in rule.layers:
+            if layer not in inputs:
+                inputs[layer] = f"l{len(inputs)}"
+                tp.input(inputs[layer], layout, c.cell_index(), layer)
+
+    results: dict[str, kdb.Region] = {}
+    for i, rule in enumerate(rules):
+        region = results.setdefault(rule.name, kdb.Region())
+        tp.output(f"o{i}", region)
+        tp.queue(f"_output(o{i}, {rule.expression(inputs, dbu)})")
+    tp.execute(f"DRC of {c.name}")
+
+    for region in results.values():
+        region.merge()
+    return results
+
+
+def drc_markers(
+    c: KCell, results: dict[str, kdb.Region], rules: Iterable[Rule] = GENERIC_RULES
+) -> KCell:
+    """Cell with an instance of a checked cell and the markers of the violations.
+
+    Args:
+        c: Checked cell.
+        results: Markers of :py:func:`check_drc`. [dbu]
+        rules: Rules of the check, for their marker layers.
+    """
+    markers = KCell(f"{c.name}_DRC", kcl=c.kcl)
+    markers << c
+    for rule in {rule.name: rule for rule in rules}.values():
+        region = results.get(rule.name)
+        if region is not None and not region.is_empty():
+            markers.shapes(rule.marker).insert(region)
+    return markers
+
+
+def violations(results: dict[str, kdb.Region]) -> dict[str, int]:
+    """Number of markers of the rules with violations."""
+    return {name: r.count() for name, r in results.items() if not r.is_empty()}
+
+
+if __name__ == "__main__":
+    from kgeneric import cells, gpdk
+
+    c = KCell("drc_demo")
+    c << gpdk.straight_sc()
+    narrow = c << cells.straight(width=0.1, length=5, layer=LAYER.WG)
+    narrow.d.move((0, 10))
+    results = check_drc(c)
+    print(violations(results))
+    drc_markers(c, results).show()
@@ -0,0 +1,158 @@
+"""Interned layer enclosures.
+
+A :py:class:`kfactory.LayerEnclosure` is mutable, its hash is calculated from
+its name and sections on every call and two enclosures with the same sections
+but different names are different cache keys and give different cell names.
+
+:py:func:`intern_enclosure` returns one canonical, immutable
+:py:class:`InternedEnclosure` per name, main layer and sections. Enclosures
+without a name are named by kfactory from their sections. The hash is
+calculated once::
+
+    slab = layer_enclosure([(LAYER.SLAB90, 2000)], name="WGSLAB")
+    same = LayerEnclosure([(LAYER.SLAB90, 2000)], name="WGSLAB")
+    assert intern_enclosure(same) is slab
+    assert intern_enclosure(LayerEnclosure([(LAYER.SLAB90, 2000)])) is not slab
+
+The factories decorated with :py:func:`kgeneric.cells.cell` intern their
+`enclosure` argument, so cells built with equal enclosures share their cache
+entry and name, independent of the order in which the enclosures are used.
+"""
+
+import inspect
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from kfactory import LayerEnum
+from kfactory.enclosure import LayerEnclosure, Section
+from pydantic import PrivateAttr
+
+from kgeneric.cross_section import enclosure_sections
+
+__all__ = [
+    "NO_ENCLOSURE",
+    "InternedEnclosure",
+    "intern_enclosure",
+    "intern_params",
+    "layer_enclosure",
+]
+
+Key = tuple[str | None, int | None, tuple[tuple[int, int | None, int], ...]]
+
+
+class InternedEnclosure(LayerEnclosure):
+    """Canonical enclosure returned by :py:func:`intern_enclosure`.
+
+    Interned enclosures must not be modified, :py:meth:`add_section` and the
+    assignment of fields raise a `TypeError`.
+    """
+
+    _key: Key = PrivateAttr()
+    _hash: int = PrivateAttr()
+    _sealed: bool = PrivateAttr(default=False)
+
+    def __hash__(self) -> int:
+        """Hash of name, main layer and sections, calculated once."""
+        return self._hash
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Fields cannot be set on sealed enclosures."""
+        if getattr(self, "_sealed", False) and not name.startswith("_"):
+            raise TypeError(f"Interned enclosure {self.name} cannot be modified")
+        super().__setattr__(name, value)
+
+    def add_section(self, layer: LayerEnum | int, sec: Section) -> None:
+        """Interned enclosures cannot be modified."""
+        raise TypeError(f"Interned enclosure {self.name} cannot be modified")
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        """Unpickle to the canonical enclosure of the process."""
+        return layer_enclosure, (_sections(self._key), self._key[0], self._key[1])
+
+
+_enclosures: dict[Key, InternedEnclosure] = {}
+
+
+def _key(enclosure: LayerEnclosure) -> Key:
+    main_layer = enclosure.main_layer
+    return (
+        enclosure._name,
+        None if main_layer is None else int(main_layer),
+        tuple(
+            (int(layer), d_min, d_max)
+            for layer, d_min, d_max in enclosure_sections(enclosure)
+        ),
+    )
+
+
+def _sections(key: Key) -> list[tuple[int, int] | tuple[int, int, int]]:
+    return [
+        (layer, d_max) if d_min is None else (layer, d_min, d_max)
+        for layer, d_min, d_max in key[2]
+    ]
+
+
+def intern_enclosure(enclosure: LayerEnclosure) -> InternedEnclosure:
+    """Canonical enclosure with the name, main layer and sections of an enclosure."""
+    if isinstance(enclosure, InternedEnclosure):
+        return enclosure
+    key = _key(enclosure)
+    interned = _enclosures.get(key)
+    if interned is None:
+        # the pydantic plugin only knows the fields, not LayerEnclosure.__init__
+        interned = InternedEnclosure(  # type: ignore[call-arg]
+            sections=_sections(key),
+            name=enclosure._name,
+            main_layer=enclosure.main_layer,
+            kcl=enclosure.kcl,
+        )
+        interned._key = key
+        interned._hash = hash(key)
+        interned._sealed = True
+        _enclosures[key] = interned
+    return interned
+
+
+def layer_enclosure(
+    sections: Sequence[tuple[LayerEnum | int, int] | tuple[LayerEnum | int, int, int]],
+    name: str | None = None,
+    main_layer: LayerEnum | int | None = None,
+) -> InternedEnclosure:
+    """Interned enclosure, see :py:class:`kfactory.LayerEnclosure`.
+
+    Args:
+        sections: `(layer, d_max)` or `(layer, d_min, d_max)`. [dbu]
+        name: Name, from the sections if `None`.
+        main_layer: Main layer of the enclosure.
+    """
+    return intern_enclosure(
+        LayerEnclosure(sections=sections, name=name, main_layer=main_layer)
+    )
+
+
+NO_ENCLOSURE = layer_enclosure([])
+"""Enclosure without sections."""
+
+
+def intern_params(
+    f: Callable[..., Any],
+) -> Callable[[tuple[Any, ...], dict[str, Any]], tuple[Any, ...]] | None:
+    """Function interning the `enclosure` argument of `f`, `None` if it has none."""
+    parameters = list(inspect.signature(f).parameters)
+    if "enclosure" not in parameters:
+        return None
+    index = parameters.index("enclosure")
+
+    def params(args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple[Any, ...]:
+        if len(args) > index:
+            if isinstance(args[index], LayerEnclosure):
+                args = (
+                    *args[:index],
+                    intern_enclosure(args[index]),
+                    *args[index + 1 :],
+                )
+        elif isinstance(kwargs.get("enclosure"), LayerEnclosure):
+            kwargs["enclosure"] = intern_enclosure(kwargs["enclosure"])
+        return args
+
+    return params
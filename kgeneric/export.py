@@ -0,0 +1,302 @@
+"""OASIS export and streamed GDS libraries.
+
+:py:func:`write` writes a single cell, choosing the format from the suffix of the
+file name. OASIS is written with CBLOCK compression and in strict mode by
+default; `.gds` and `.gds.gz` stay available as fallback. :py:func:`write_library`
+writes several top cells into one OASIS (or GDS) file in one pass, so all of
+its cells have to be in the layout at the same time::
+
+    write_library(sweep, "sweep.oas")
+
+A :py:class:`GdsLibraryWriter` streams many top cells (e.g. a parameter sweep or
+the dies of an assembly) into one GDS file while they are produced::
+
+    with GdsLibraryWriter("sweep.gds.gz") as writer:
+        for length in lengths:
+            writer.add(straight(width=1, length=length, layer=LAYER.WG))
+
+Every added cell is written out right away, together with all children which
+have not been written yet. The structures are spooled to a temporary file next
+to the output, since klayout expects the meta data (ports and info) of all cells
+in front of them; closing the writer puts the merged meta data first and copies
+the spooled structures behind it. The library never has to be built in memory as
+a whole and cells can be released by the caller once added.
+
+OASIS libraries are not streamed. The cell, text and property names are
+referenced by numbers which klayout assigns per written file, also inside the
+CBLOCK of every cell, so separately written cells could only be joined by
+decompressing and renumbering all of their records.
+"""
+
+import gzip
+import mmap
+import shutil
+import struct
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO, Literal
+
+from kfactory import KCell, KCLayout, kcl, kdb
+from kfactory.kcell import default_save
+
+__all__ = [
+    "save_options",
+    "file_format",
+    "write",
+    "write_library",
+    "GdsLibraryWriter",
+]
+
+Format = Literal["OASIS", "GDS2"]
+
+# GDS record types
+_BGNSTR = 0x0502
+_STRNAME = 0x0606
+_ENDSTR = 0x0700
+_ENDLIB = 0x0400
+_SNAME = 0x1206
+_ENDEL = 0x1100
+_CONTEXT_INFO = "$$$CONTEXT_INFO$$$"
+
+
+def save_options(
+    format: Format = "OASIS",
+    compression_level: int = 2,
+    cblocks: bool = True,
+    strict: bool = True,
+) -> kdb.SaveLayoutOptions:
+    """Save options for OASIS or GDS.
+
+    Args:
+        format: `"OASIS"` or `"GDS2"`.
+        compression_level: OASIS shape compression (0-10), i.e. how hard the
+            writer searches for repetitions.
+        cblocks: Write the OASIS cells in deflate compressed CBLOCKs.
+        strict: Write strict mode OASIS (name tables with offsets).
+    """
+    options = default_save()
+    options.format = format
+    options.oasis_compression_level = compression_level
+    options.oasis_write_cblocks = cblocks
+    options.oasis_strict_mode = strict
+    return options
+
+
+def file_format(filename: str | Path) -> Format:
+    """Format of a file from its suffix (`.oas`, `.gds` or `.gds.gz`)."""
+    suffixes = Path(filename).suffixes
+    if suffixes[-1:] == [".oas"]:
+        return "OASIS"
+    if suffixes[-1:] == [".gds"] or suffixes[-2:] == [".gds", ".gz"]:
+        return "GDS2"
+    raise ValueError(f"Unknown layout format of {filename}, use .oas, .gds or .gds.gz")
+
+
+def write(
+    c: KCell,
+    filename: str | Path,
+    compression_level: int = 2,
+    cblocks: bool = True,
+    strict: bool = True,
+) -> None:
+    """Write a cell and its hierarchy with ports and info.
+
+    Args:
+        c: Top cell.
+        filename: Output file, the format is taken from the suffix.
+        compression_level: OASIS shape compression (0-10).
+        cblocks: Write OASIS CBLOCKs.
+        strict: Write strict mode OASIS.
+    """
+    c.write(
+        filename,
+        save_options(file_format(filename), compression_level, cblocks, strict),
+    )
+
+
+def write_library(
+    cells: Iterable[KCell],
+    filename: str | Path,
+    compression_level: int = 2,
+    cblocks: bool = True,
+    strict: bool = True,
+) -> None:
+    """Write several top cells and their hierarchies into one file in one pass.
+
+    Use :py:class:`GdsLibraryWriter` to stream GDS libraries instead.
+
+    Args:
+        cells: Top cells, all of the same layout.
+        filename: Output file, the format is taken from the suffix.
+        compression_level: OASIS shape compression (0-10).
+        cblocks: Write OASIS CBLOCKs.
+        strict: Write strict mode OASIS.
+    """
+    cells = list(cells)
+    if not cells:
+        raise ValueError(f"No cells to write to {filename}")
+    layout = cells[0].kcl
+    options = save_options(file_format(filename), compression_level, cblocks, strict)
+    options.clear_cells()
+    for c in cells:
+        if c.kcl is not layout:
+            raise ValueError(f"{c.name} does not belong to {layout.name}")
+        _set_meta_data(c)
+        options.add_cell(c.cell_index())
+    layout.layout.write(str(filename), options)
+
+
+def _set_meta_data(c: KCell) -> None:
+    """Store ports and info of a cell and its children as meta data."""
+    for ci in c.called_cells():
+        c.kcl[ci].set_meta_data()
+    c.set_meta_data()
+
+
+def _gds_string(data: bytes | mmap.mmap, start: int, end: int) -> str:
+    """Decode the string of a GDS record."""
+    return data[start + 4 : end].rstrip(b"\0").decode()
+
+
+def _gds_records(data: bytes) -> list[tuple[int, int, int]]:
+    """Split a GDS stream into `(start, end, record_type)`."""
+    records = []
+    pos = 0
+    while pos < len(data):
+        length, record_type = struct.unpack_from(">HH", data, pos)
+        if length < 4:
+            raise ValueError(f"Invalid GDS record at byte {pos}")
+        records.append((pos, pos + length, record_type))
+        pos += length
+    return records
+
+
+class GdsLibraryWriter:
+    """Stream many top cells into one GDS file.
+
+    OASIS cannot be streamed, see :py:func:`write_library`.
+
+    Attributes:
+        filename: Output file.
+        cells: Names of all cells written so far.
+    """
+
+    def __init__(
+        self,
+        filename: str | Path,
+        layout: KCLayout = kcl,
+        write_context_info: bool = True,
+    ) -> None:
+        """Open a library file.
+
+        Args:
+            filename: Output file, `.gds` or `.gds.gz` (compressed with gzip).
+            layout: Layout the cells belong to.
+            write_context_info: Write the meta data (ports and info) of the
+                cells.
+        """
+        if file_format(filename) != "GDS2":
+            raise ValueError(
+                f"Only GDS can be streamed, use write_library for {filename}"
+            )
+        self.filename = Path(filename)
+        self.layout = layout
+        self.write_context_info = write_context_info
+        self.cells: set[str] = set()
+        self._header = b""
+        self._spool: BinaryIO | None = None
+        self._context_header = b""
+        self._context: dict[str, bytes] = {}
+        self._closed = False
+
+    def __enter__(self) -> "GdsLibraryWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def add(self, c: KCell) -> None:
+        """Add a top cell and its hierarchy to the library.
+
+        Children which are already in the library are not written again.
+        """
+        if self._closed:
+            raise ValueError(f"{self.filename} is already closed")
+        if c.kcl is not self.layout:
+            raise ValueError(f"{c.name} does not belong to {self.layout.name}")
+        _set_meta_data(c)
+        options = save_options("GDS2")
+        options.write_context_info = self.write_context_info
+        options.select_cell(c.cell_index())
+        data = self.layout.layout.write_bytes(options)
+        records = _gds_records(data)
+
+        if self._spool is None:
+            first = next(i for i, r in enumerate(records) if r[2] == _BGNSTR)
+            self._header = data[: records[first][0]]
+            self._spool = tempfile.TemporaryFile(dir=self.filename.parent)
+
+        # Cells are copied as they are. The meta data of all cells (ports, info)
+        # is kept in one context structure per file, which klayout writes per
+        # call; its elements are collected per cell and written on close.
+        start: int | None = None
+        element: int | None = None
+        name = ""
+        sname = ""
+        for begin, end, record_type in records:
+            if record_type == _BGNSTR:
+                start = begin
+            elif record_type == _STRNAME:
+                name = _gds_string(data, begin, end)
+                if name == _CONTEXT_INFO and not self._context_header:
+                    self._context_header = data[start:end]
+            elif name == _CONTEXT_INFO and record_type not in (_ENDSTR, _ENDLIB):
+                if element is None:
+                    element, sname = begin, ""
+                if record_type == _SNAME:
+                    sname = _gds_string(data, begin, end)
+                elif record_type == _ENDEL:
+                    self._context.setdefault(sname, data[element:end])
+                    element = None
+            elif record_type == _ENDSTR and start is not None:
+                if name != _CONTEXT_INFO and name not in self.cells:
+                    self._spool.write(data[start:end])
+                    self.cells.add(name)
+                start = None
+                name = ""
+
+    def close(self) -> None:
+        """Finish the file."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._spool is None:
+            raise ValueError(f"No cells were added to {self.filename}")
+        with (
+            gzip.open(self.filename, "wb")
+            if self.filename.suffix == ".gz"
+            else open(self.filename, "wb")
+        ) as f:
+            f.write(self._header)
+            if self._context:
+                f.write(self._context_header)
+                for element in self._context.values():
+                    f.write(element)
+                f.write(struct.pack(">HH", 4, _ENDSTR))
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, f)
+            f.write(struct.pack(">HH", 4, _ENDLIB))
+        self._spool.close()
+
+
+if __name__ == "__main__":
+    from kgeneric import cells
+
+    write(cells.mzi(), "mzi.oas")
@@ -0,0 +1,202 @@
+"""Fan-out of the optical ports of a cell to a row of grating couplers.
+
+The grating couplers are placed below the cell as a single array instance of
+one grating coupler cell at a fixed pitch, facing up::
+
+                  ┌──────────┐
+             ┌────┤          ├────┐
+             │ ┌──┤  device  ├──┐ │
+             │ │  └──────────┘  │ │
+             │ └─────┐    ┌─────┘ │
+        ┌────┘       │    │       └────┐
+        │            │    │            │
+        GC           GC   GC           GC
+
+The ports are assigned to the grating couplers counterclockwise starting at
+the top of the device: west facing ports from top to bottom, south facing ports
+from left to right and east facing ports from bottom to top. Every port leaves
+the device to the side it is facing, drops down on its own track and runs to its
+grating coupler on its own channel below the device. A track less than two bend
+radii off its grating coupler joins it with an s-bend instead of two bends in
+its channel. The tracks and channels are ordered so that no two routes cross,
+and all routes are placed with :py:func:`kfactory.routing.optical.place90`.
+
+The routes have the width and layer of their device port. A taper adapts them to
+the width of the grating coupler port if the widths differ.
+"""
+
+from collections.abc import Callable
+from functools import partial
+
+from kfactory import KCell, kdb
+from kfactory.enclosure import LayerEnclosure
+from kfactory.kcell import Port
+from kfactory.routing.optical import place90
+
+from kgeneric import gpdk
+from kgeneric.cells.dbu.bezier import bend_s
+from kgeneric.cells.dbu.euler import bend_euler
+from kgeneric.cells.dbu.straight import straight
+from kgeneric.cells.dbu.taper import taper
+from kgeneric.cells.decorator import cell
+from kgeneric.tech import TECH
+
+__all__ = ["fanout_grating_couplers"]
+
+
+@cell
+def fanout_grating_couplers(
+    component: KCell,
+    grating_coupler: KCell | None = None,
+    pitch: float = 127.0,
+    distance: float | None = None,
+    spacing: float = 5.0,
+    port_type: str = "optical",
+    radius: float = TECH.radius_sc,
+    enclosure: LayerEnclosure | None = gpdk.enclosure_sc,
+    taper_length: float = 10.0,
+) -> KCell:
+    """Route all ports of a component to an array of grating couplers.
+
+    The fibre ports of the grating couplers are exposed as `fl1`, `fl2`, ...
+    in the order of the assignment.
+
+    Args:
+        component: Device to fan out. Ports facing north are not supported.
+        grating_coupler: Grating coupler with an optical port `o1` facing west at
+            its origin and a fibre port `FL`. Defaults to the strip grating
+            coupler of the generic PDK.
+        pitch: Pitch of the grating couplers. [um]
+        distance: Distance of the grating coupler ports below the component.
+            `None` uses the minimum distance for the channels. [um]
+        spacing: Spacing of parallel routes. [um]
+        port_type: Type of the ports which are routed.
+        radius: Radius of the euler bends of the routes. [um]
+        enclosure: Enclosure of the routes.
+        taper_length: Length of the tapers between routes and grating couplers
+            of different widths. [um]
+    """
+    c = KCell()
+    dbu = c.kcl.dbu
+    gc = grating_coupler or gpdk.grating_coupler_sc()
+    _pitch = round(pitch / dbu)
+    _spacing = round(spacing / dbu)
+    _radius = round(radius / dbu)
+    _taper_length = round(taper_length / dbu)
+
+    ref = c << component
+    bbox = ref.bbox()
+    ports = [p.copy() for p in ref.ports if p.port_type == port_type]
+    for p in ports:
+        p.trans.mirror = False
+    if any(p.trans.angle == 1 for p in ports):
+        raise ValueError(
+            "Ports facing north cannot be fanned out, rotate the component: "
+            f"{[p.name for p in ports if p.trans.angle == 1]}"
+        )
+
+    # counterclockwise from the top, with the x position of the vertical track
+    west = sorted((p for p in ports if p.trans.angle == 2), key=lambda p: -p.y)
+    south = sorted((p for p in ports if p.trans.angle == 3), key=lambda p: p.x)
+    east = sorted((p for p in ports if p.trans.angle == 0), key=lambda p: p.y)
+    ports = west + south + east
+    n = len(ports)
+
+    def bend90(port: Port) -> KCell:
+        return bend_euler(port.width, _radius, port.layer, enclosure)
+
+    def route_functions(port: Port) -> tuple[Callable[..., KCell], KCell]:
+        return partial(straight, layer=port.layer, enclosure=enclosure), bend90(port)
+
+    # the footprint of an euler bend depends on its radius only
+    r = _radius
+    if ports:
+        b1, b2 = bend90(ports[0]).ports
+        r = max(abs(b1.x - b2.x), abs(b1.y - b2.y))
+    gc_width = gc.ports["o1"].width
+    tapered = any(p.width != gc_width for p in ports)
+    x0 = bbox.center().x - (n - 1) * _pitch // 2
+    gc_xs = [x0 + k * _pitch for k in range(n)]
+
+    # Side tracks are placed from the device outwards. A track which would end
+    # up too close to its grating coupler for two bends snaps onto it.
+    tracks = [p.x for p in ports]
+    if west:
+        x = min(p.x for p in west) - r
+        for k in reversed(range(len(west))):
+            if 0 < x - gc_xs[k] < 2 * r:
+                x = gc_xs[k]
+            tracks[k] = x
+            x -= _spacing
+    if east:
+        x = max(p.x for p in east) + r
+        for k in range(n - len(east), n):
+            if 0 < gc_xs[k] - x < 2 * r:
+                x = gc_xs[k]
+            tracks[k] = x
+            x += _spacing
+
+    # Routes running left take deeper channels the further right they start,
+    # routes running right the further left they start. Horizontal sections of
+    # routes running in different directions never overlap and share channels.
+    left = [k for k in range(n) if gc_xs[k] < tracks[k]]
+    right = [k for k in range(n) if gc_xs[k] > tracks[k]][::-1]
+    levels = {k: level for level, k in enumerate(left)} | {
+        k: level for level, k in enumerate(right)
+    }
+    n_levels = max(len(left), len(right), 1)
+
+    y_channel = bbox.bottom - 2 * r
+    y_min = y_channel - r - (n_levels - 1) * _spacing
+    if tapered:
+        y_min -= _taper_length
+    y0 = bbox.bottom - round(distance / dbu) if distance is not None else y_min
+    if y0 > y_min:
+        raise ValueError(
+            f"{distance=} is too small for {n_levels} channels, the minimum is "
+            f"{(bbox.bottom - y_min) * dbu}"
+        )
+    gc_trans = kdb.Trans(3, False, x0, y0)
+    c.create_inst(gc, gc_trans, a=kdb.Vector(_pitch, 0), b=kdb.Vector(), na=n)
+
+    for k, (port, track, gc_x) in enumerate(zip(ports, tracks, gc_xs)):
+        element = kdb.Trans(gc_x - x0, 0) * gc_trans
+        gc_port = gc.ports["o1"].copy(element)
+        dx = gc_x - track
+        pts = [port.trans.disp.to_p()]
+        if port.x != track:
+            pts.append(kdb.Point(track, port.y))
+        if port.width != gc_width:
+            t = c << taper(gc_width, port.width, _taper_length, port.layer, enclosure)
+            t.connect("o1", gc_port)
+            gc_port = t.ports["o2"]
+        end = port
+        if dx and abs(dx) < 2 * r:
+            # too close for two bends, an s-bend takes the corners of the channel
+            y = y_channel - levels[k] * _spacing
+            sbend = c << bend_s(
+                port.width, abs(dx), 2 * r, port.layer, enclosure=enclosure
+            )
+            sbend.transform(kdb.Trans(3, dx < 0, track, y + r))
+            pts.append(sbend.ports["o1"].trans.disp.to_p())
+            place90(c, port, sbend.ports["o1"], pts, *route_functions(port))
+            end = sbend.ports["o2"]
+            pts = [end.trans.disp.to_p()]
+        elif dx:
+            y = y_channel - levels[k] * _spacing
+            pts += [kdb.Point(track, y), kdb.Point(gc_x, y)]
+        pts.append(gc_port.trans.disp.to_p())
+        if pts[0] != pts[-1]:
+            place90(c, end, gc_port, pts, *route_functions(port))
+        c.add_port(gc.ports["FL"].copy(element), name=f"fl{k + 1}")
+
+    c.info["n_ports"] = n
+    c.info["pitch_um"] = pitch
+    return c
+
+
+if __name__ == "__main__":
+    from kgeneric import cells
+
+    c = fanout_grating_couplers(cells.coupler())
+    c.show()
@@ -1,50 +1,31 @@
-""" Example on how to build a generic PDK."""
-from functools import partial
+"""Example on how to build a generic PDK."""
 
-import kfactory as kf
+from functools import partial
 
 from kgeneric import cells
+from kgeneric.cross_section import CrossSection
+from kgeneric.enclosure import layer_enclosure
 from kgeneric.layers import LAYER
 from kgeneric.tech import TECH
 
-enclosure_sc = kf.LayerEnclosure(name="WGSTD", sections=[(LAYER.WGCLAD, 0, 2000)])
-
-bend_s_sc = partial(
-    cells.bend_s,
-    width=TECH.width_sc,
-    height=10,
-    length=20,
-    layer=LAYER.WG,
-    enclosure=enclosure_sc,
-)
-straight_sc = partial(
-    cells.straight,
-    length=10,
-    width=TECH.width_sc,
-    layer=LAYER.WG,
-    enclosure=enclosure_sc,
-)
-straight_dbu_sc = partial(
-    cells.straight_dbu,
-    length=int(10e3),
-    width=int(TECH.width_sc * 1e3),
-    layer=LAYER.WG,
-    enclosure=enclosure_sc,
+enclosure_sc = layer_enclosure(name="WGSTD", sections=[(LAYER.WGCLAD, 0, 2000)])
+enclosure_slab = layer_enclosure(
+    name="WGSLAB",
+    sections=[(LAYER.DEEPTRENCH, 2000, 3000), (LAYER.SLAB90, 2000)],
+    main_layer=LAYER.WG,
 )
+xs_sc = CrossSection.from_um(TECH.width_sc, LAYER.WG, enclosure_sc, name="SC")
+
+bend_s_sc = partial(cells.bend_s, height=10, length=20, cross_section=xs_sc)
+straight_sc = partial(cells.straight, length=10, cross_section=xs_sc)
+straight_dbu_sc = partial(cells.straight_dbu, length=int(10e3), cross_section=xs_sc)
 
-bend_euler_sc = partial(
-    cells.bend_euler,
-    width=TECH.width_sc,
-    layer=LAYER.WG,
-    radius=TECH.radius_sc,
-    enclosure=enclosure_sc,
+bend_euler_sc = partial(cells.bend_euler, radius=TECH.radius_sc, cross_section=xs_sc)
+bend_euler_dbu_sc = partial(
+    cells.dbu.bend_euler, radius=int(TECH.radius_sc * 1e3), cross_section=xs_sc
 )
 bend_circular_sc = partial(
-    cells.bend_circular,
-    width=TECH.width_sc,
-    layer=LAYER.WG,
-    radius=TECH.radius_sc,
-    enclosure=enclosure_sc,
+    cells.bend_circular, radius=TECH.radius_sc, cross_section=xs_sc
 )
 
 taper_sc = partial(
@@ -52,8 +33,20 @@ taper_sc = partial(
     width1=TECH.width_sc,
     width2=TECH.width_sc * 2,
     length=10,
-    layer=LAYER.WG,
-    enclosure=enclosure_sc,
+    cross_section=xs_sc,
+)
+
+taper_parabolic_sc = partial(
+    cells.taper_profile,
+    width1=TECH.width_sc,
+    width2=TECH.width_sc * 2,
+    length=10,
+    profile="parabolic",
+    cross_section=xs_sc,
+)
+ring_single_sc = partial(cells.ring_single, radius=TECH.radius_sc, cross_section=xs_sc)
+spiral_euler_sc = partial(
+    cells.spiral_euler, radius=TECH.radius_sc, cross_section=xs_sc
 )
 
 grating_coupler_sc = partial(cells.grating_coupler_elliptical, wg_width=TECH.width_sc)
@@ -0,0 +1,130 @@
+"""Optical path length of cells, instances and port-connected chains.
+
+The optical cells of kgeneric record the length of their backbone in
+`info["length_um"]` (closed form for straights, circular and euler bends,
+quadrature for bezier bends). The functions here sum these lengths over
+instances without flattening anything::
+
+    length = chain_length(c, c.ports["o1"])
+
+walks from the port through all instances connected port to port and adds up
+their lengths, e.g. along a route placed with :py:func:`kgeneric.routing.route_sc`.
+"""
+
+from collections.abc import Iterable
+
+from kfactory import KCell, kdb
+from kfactory.kcell import Instance, Port
+
+__all__ = [
+    "LengthError",
+    "cell_length",
+    "instance_length",
+    "route_length",
+    "chain_length",
+    "delay",
+]
+
+c0 = 299_792_458.0  # speed of light in vacuum [m/s]
+
+
+class LengthError(KeyError):
+    """Raised if a cell doesn't record its length."""
+
+
+def cell_length(c: KCell) -> float:
+    """Backbone length of a cell. [um]
+
+    Raises:
+        LengthError: If the cell has no `length_um` in its info.
+    """
+    try:
+        return float(c.info["length_um"])
+    except AttributeError as e:
+        raise LengthError(f"{c.name} has no length_um in its info") from e
+
+
+def instance_length(inst: Instance) -> float:
+    """Backbone length of an instance, arrays count every element. [um]"""
+    return cell_length(inst.cell) * int(inst.size())
+
+
+def route_length(insts: Iterable[Instance]) -> float:
+    """Total backbone length of the instances of a route. [um]"""
+    return sum(instance_length(inst) for inst in insts)
+
+
+def _outer_ports(inst: Instance) -> list[kdb.Trans]:
+    """Port transformations of an instance in the parent cell.
+
+    For arrays, ports connected between the elements of the array are dropped.
+    """
+    cell_ports = [port.trans for port in inst.cell.ports]
+    if inst.size() == 1:
+        return [inst.trans * trans for trans in cell_ports]
+    all_ports = [
+        element * trans
+        for element in inst.cell_inst.each_trans()
+        for trans in cell_ports
+    ]
+    positions = [trans.disp for trans in all_ports]
+    return [trans for trans in all_ports if positions.count(trans.disp) == 1]
+
+
+def chain_length(
+    c: KCell, start: Port, end: Port | None = None
+) -> tuple[float, list[Instance]]:
+    """Length of a chain of port-connected two-port instances.
+
+    Starting at `start`, the instance with a port at the same position facing
+    the opposite direction is added to the chain and the walk continues at its
+    other port. The walk stops
+    at `end`, at a position without (unvisited) instance or at an instance which
+    does not have exactly two ports (e.g. a coupler).
+
+    Args:
+        c: Cell containing the instances.
+        start: Port to start from, in the coordinates of `c`.
+        end: Optional port to stop at.
+
+    Returns:
+        The length in um and the instances of the chain.
+    """
+    ports: dict[tuple[int, int, int], list[tuple[int, list[kdb.Trans]]]] = {}
+    insts = list(c.insts)
+    for i, inst in enumerate(insts):
+        outer = _outer_ports(inst)
+        for trans in outer:
+            key = (trans.disp.x, trans.disp.y, trans.angle)
+            ports.setdefault(key, []).append((i, outer))
+
+    length = 0.0
+    chain: list[Instance] = []
+    visited: set[int] = set()
+    trans = start.trans
+    end_position = None if end is None else end.trans.disp
+
+    while end_position is None or trans.disp != end_position:
+        key = (trans.disp.x, trans.disp.y, (trans.angle + 2) % 4)
+        candidates = [(i, outer) for i, outer in ports.get(key, []) if i not in visited]
+        if not candidates:
+            break
+        i, outer = candidates[0]
+        if len(outer) != 2:
+            break
+        visited.add(i)
+        length += instance_length(insts[i])
+        chain.append(insts[i])
+        trans = outer[1] if outer[0].disp == trans.disp else outer[0]
+
+    return length, chain
+
+
+def delay(length: float, ng: float) -> float:
+    """Group delay of a waveguide. [ps]
+
+    Args:
+        length: Optical path length. [um]
+        ng: Group index.
+    """
+    return length * 1e-6 * ng / c0 * 1e12
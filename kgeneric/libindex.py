@@ -0,0 +1,349 @@
+"""Index of GDS libraries for loading single cells on demand.
+
+Reading a cell from a library with :py:meth:`kfactory.KCLayout.read` parses the
+whole file. A :py:class:`LibraryIndex` stores the byte range of every structure
+of a GDS file, the names of its children, the byte range of its meta data (ports
+and info) and a fingerprint in a sidecar file (`lib.gds` -> `lib.gds.idx.json`)::
+
+    index = LibraryIndex.build("lib.gds")
+    index.save()
+
+    index = LibraryIndex.load("lib.gds")
+    index.fingerprint("mzi_DL10")     # without touching the library
+    c = index.read_cell("mzi_DL10")   # reads only the mzi and its children
+
+The version keys of the factories which built the cells
+(:py:mod:`kgeneric.version`) can be stored in the index as well, a cell whose
+factory changed since is rebuilt instead of read::
+
+    index.record_versions(*sweep)
+    if not index.is_current("mzi_DL10"):
+        ...
+
+The index records the size and modification time of the library and is rejected
+if either changed since. The library is memory mapped and a small GDS stream
+containing only the cell, its children and their meta data is assembled from it.
+Loading a cell therefore costs the same for a library of one or of many cells.
+
+Only uncompressed GDS libraries can be indexed. OASIS files written with CBLOCKs
+and `.gds.gz` files have no byte ranges which can be read independently.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from kfactory import KCell, KCLayout, kcl, kdb
+from kfactory.kcell import default_save
+
+from kgeneric.export import (
+    _BGNSTR,
+    _CONTEXT_INFO,
+    _ENDEL,
+    _ENDLIB,
+    _ENDSTR,
+    _SNAME,
+    _STRNAME,
+    _gds_string,
+)
+from kgeneric.version import (
+    cell_factory,
+    cell_version,
+    factory_name,
+    factory_version,
+    import_factory,
+)
+
+__all__ = ["INDEX_SUFFIX", "LibraryIndex", "fingerprint", "index_filename"]
+
+INDEX_SUFFIX = ".idx.json"
+_INDEX_VERSION = 2
+
+Entry = dict[str, Any]
+
+
+def index_filename(filename: str | Path) -> Path:
+    """Sidecar index file of a library."""
+    filename = Path(filename)
+    return filename.with_name(filename.name + INDEX_SUFFIX)
+
+
+def _records(data: bytes | mmap.mmap) -> Iterator[tuple[int, int, int]]:
+    """Iterate over the `(start, end, record_type)` of a GDS stream."""
+    pos = 0
+    size = len(data)
+    while pos < size:
+        length, record_type = struct.unpack_from(">HH", data, pos)
+        if length < 4:
+            raise ValueError(f"Invalid GDS record at byte {pos}")
+        yield pos, pos + length, record_type
+        pos += length
+        if record_type == _ENDLIB:
+            return
+
+
+def _fingerprint(data: bytes | mmap.mmap, start: int, end: int) -> str:
+    return hashlib.sha256(data[start:end]).hexdigest()
+
+
+def fingerprint(c: KCell) -> str:
+    """Fingerprint of a cell as it would be written to a GDS library.
+
+    Only the structure of the cell itself is hashed, children are referenced by
+    name and have their own fingerprints.
+    """
+    options = default_save()
+    options.format = "GDS2"
+    options.write_context_info = False
+    options.select_cell(c.cell_index())
+    data = c.kcl.layout.write_bytes(options)
+    start = 0
+    for begin, end, record_type in _records(data):
+        if record_type == _BGNSTR:
+            start = begin
+        elif record_type == _STRNAME and _gds_string(data, begin, end) == c.name:
+            for _, end, record_type in _records(data[start:]):
+                if record_type == _ENDSTR:
+                    return _fingerprint(data, start, start + end)
+    raise ValueError(f"{c.name} was not written")
+
+
+class LibraryIndex:
+    """Byte ranges, children and fingerprints of the cells of a GDS library.
+
+    Attributes:
+        filename: The library.
+        size: Size of the library when it was indexed. [bytes]
+        mtime_ns: Modification time of the library when it was indexed. [ns]
+        header: Byte range of the library header.
+        context_header: Byte range of the header of the meta data structure.
+        cells: Per cell name, `offset`, `length`, `fingerprint`, `children`,
+            the byte range of its meta data in `meta` (or `None`) and, if
+            recorded, the import path of its factory in `factory` and the
+            version key of the factory in `factory_version`.
+    """
+
+    def __init__(
+        self,
+        filename: str | Path,
+        size: int,
+        mtime_ns: int,
+        header: tuple[int, int],
+        context_header: tuple[int, int] | None,
+        cells: dict[str, Entry],
+    ) -> None:
+        """Create an index, use :py:meth:`build` or :py:meth:`load` instead."""
+        self.filename = Path(filename)
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.header = header
+        self.context_header = context_header
+        self.cells = cells
+
+    def __contains__(self, name: str) -> bool:
+        """Whether a cell is in the library."""
+        return name in self.cells
+
+    def __len__(self) -> int:
+        """Number of cells in the library."""
+        return len(self.cells)
+
+    @classmethod
+    def build(cls, filename: str | Path) -> "LibraryIndex":
+        """Index a GDS library by scanning its records once."""
+        filename = Path(filename)
+        cells: dict[str, Entry] = {}
+        meta: dict[str, tuple[int, int]] = {}
+        header = (0, 0)
+        context_header = None
+        with (
+            open(filename, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            start = 0
+            element = 0
+            name = ""
+            sname = ""
+            children: set[str] = set()
+            for begin, end, record_type in _records(data):
+                if record_type == _BGNSTR:
+                    if header == (0, 0):
+                        header = (0, begin)
+                    start = begin
+                    children = set()
+                elif record_type == _STRNAME:
+                    name = _gds_string(data, begin, end)
+                    if name == _CONTEXT_INFO:
+                        context_header = (start, end - start)
+                    element = end
+                elif record_type == _SNAME:
+                    sname = _gds_string(data, begin, end)
+                    children.add(sname)
+                elif record_type == _ENDEL:
+                    if name == _CONTEXT_INFO:
+                        meta[sname] = (element, end - element)
+                    element = end
+                elif record_type == _ENDSTR:
+                    if name != _CONTEXT_INFO:
+                        cells[name] = {
+                            "offset": start,
+                            "length": end - start,
+                            "fingerprint": _fingerprint(data, start, end),
+                            "children": sorted(children),
+                        }
+                    name = ""
+            stat = os.fstat(f.fileno())
+        for name, entry in cells.items():
+            entry["meta"] = meta.get(name)
+        return cls(
+            filename, stat.st_size, stat.st_mtime_ns, header, context_header, cells
+        )
+
+    @classmethod
+    def load(cls, filename: str | Path) -> "LibraryIndex":
+        """Load the sidecar index of a library.
+
+        Raises:
+            FileNotFoundError: If the library has no index.
+            ValueError: If the library changed since it was indexed.
+        """
+        filename = Path(filename)
+        with open(index_filename(filename)) as f:
+            index = json.load(f)
+        if index["version"] != _INDEX_VERSION:
+            raise ValueError(f"Unsupported index version {index['version']}")
+        result = cls(
+            filename,
+            index["size"],
+            index["mtime_ns"],
+            tuple(index["header"]),
+            tuple(index["context_header"]) if index["context_header"] else None,
+            index["cells"],
+        )
+        result._check(filename.stat())
+        return result
+
+    def _check(self, stat: os.stat_result) -> None:
+        """Raise a `ValueError` if the library changed since it was indexed."""
+        if (stat.st_size, stat.st_mtime_ns) != (self.size, self.mtime_ns):
+            raise ValueError(f"{self.filename} changed since it was indexed")
+
+    def save(self) -> Path:
+        """Write the index next to the library and return its file name."""
+        filename = index_filename(self.filename)
+        with open(filename, "w") as f:
+            json.dump(
+                {
+                    "version": _INDEX_VERSION,
+                    "size": self.size,
+                    "mtime_ns": self.mtime_ns,
+                    "header": self.header,
+                    "context_header": self.context_header,
+                    "cells": self.cells,
+                },
+                f,
+            )
+        return filename
+
+    def fingerprint(self, name: str) -> str:
+        """Fingerprint of a cell in the library."""
+        return str(self.cells[name]["fingerprint"])
+
+    def matches(self, c: KCell) -> bool:
+        """Whether a cell and all its children are unchanged in the library."""
+        cells = [c] + [c.kcl[ci] for ci in c.called_cells()]
+        return all(
+            cell.name in self.cells
+            and self.cells[cell.name]["fingerprint"] == fingerprint(cell)
+            for cell in cells
+        )
+
+    def record_versions(self, *cells: KCell) -> None:
+        """Store the version keys of the factories of cells and their children.
+
+        Cells which were not built by a kgeneric factory are skipped.
+        """
+        for c in cells:
+            for cell in [c] + [c.kcl[ci] for ci in c.called_cells()]:
+                factory = cell_factory(cell)
+                if cell.name in self.cells and factory is not None:
+                    self.cells[cell.name]["factory"] = factory_name(factory)
+                    self.cells[cell.name]["factory_version"] = cell_version(cell)
+
+    def is_current(self, name: str) -> bool:
+        """Whether a cell was built by the current version of its factory.
+
+        Cells without a recorded version are not current.
+        """
+        entry = self.cells[name]
+        if "factory_version" not in entry:
+            return False
+        try:
+            factory = import_factory(entry["factory"])
+        except (ImportError, AttributeError):
+            return False
+        return bool(entry["factory_version"] == factory_version(factory))
+
+    def hierarchy(self, name: str) -> list[str]:
+        """Names of a cell and all its children, children first."""
+        order: list[str] = []
+        seen: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in seen:
+                return
+            seen.add(name)
+            for child in self.cells[name]["children"]:
+                visit(child)
+            order.append(name)
+
+        visit(name)
+        return order
+
+    def cell_bytes(self, name: str) -> bytes:
+        """A GDS stream with only a cell, its children and their meta data."""
+        names = self.hierarchy(name)
+        with (
+            open(self.filename, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            self._check(os.fstat(f.fileno()))
+            offset, length = self.header
+            parts = [data[offset : offset + length]]
+            metas = [
+                self.cells[n]["meta"]
+                for n in names
+                if self.cells[n]["meta"] is not None
+            ]
+            if metas and self.context_header is not None:
+                offset, length = self.context_header
+                parts.append(data[offset : offset + length])
+                parts.extend(data[offset : offset + length] for offset, length in metas)
+                parts.append(struct.pack(">HH", 4, _ENDSTR))
+            for n in names:
+                entry = self.cells[n]
+                parts.append(data[entry["offset"] : entry["offset"] + entry["length"]])
+        parts.append(struct.pack(">HH", 4, _ENDLIB))
+        return b"".join(parts)
+
+    def read_cell(self, name: str, layout: KCLayout = kcl) -> KCell:
+        """Read a single cell with its children into a layout.
+
+        Cells which already exist in the layout (by name) are kept and not read
+        again.
+        """
+        options = kdb.LoadLayoutOptions()
+        options.cell_conflict_resolution = (
+            kdb.LoadLayoutOptions.CellConflictResolution.SkipNewCell
+        )
+        existing = {cell.cell_index() for cell in layout.layout.each_cell()}
+        layout.layout.read_bytes(self.cell_bytes(name), options)
+        for cell in layout.layout.each_cell():
+            if cell.cell_index() not in existing:
+                KCell(name=cell.name, kdb_cell=cell, kcl=layout).get_meta_data()
+        return layout[name]
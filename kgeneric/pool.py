@@ -0,0 +1,367 @@
+"""Parallel cell generation in worker processes.
+
+The cells of kgeneric are created in the global :py:data:`kfactory.kcl` of the
+running process. A :py:class:`CellPool` builds cells in worker processes, each
+with its own private layout, and merges the results back into a target layout
+(by default :py:data:`kfactory.kcl`)::
+
+    with CellPool() as pool:
+        rings = pool.map("ring_single", [{"gap": gap} for gap in gaps])
+
+Factories are given by their name in `kcl.factories` or as picklable callables
+(module level functions or partials of them, e.g. the cells of
+:py:mod:`kgeneric.gpdk`). A worker returns the cell and its children with
+:py:func:`kgeneric.serialize.dumps`.
+
+The :py:class:`CellMerger` copies such a cell tree into the target bottom up.
+Cells are identified by a fingerprint of their shapes, instances, ports and info
+(:py:func:`geometry_fingerprint`), not by their name: a child which is already in
+the target (e.g. the same bend built by several workers or in the main process)
+is reused instead of copied, the instances of the merged cells point to it. Only
+locked cells, i.e. the cells returned by `@cell` factories, are reused. A cell
+with the name of a different cell in the target is renamed.
+
+The workers of a :py:class:`CellPool` also return the factory and cache key of
+each cell (:py:func:`cache_keys`). Cells merged into :py:data:`kfactory.kcl` are
+entered into the caches of their factories, so calling the factory in the main
+process returns the merged cell instead of building it again.
+"""
+
+import hashlib
+import pickle
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from types import TracebackType
+from typing import Any
+
+from kfactory import KCell, KCLayout, kcl, kdb
+from kfactory.kcell import KCellSettings, Port
+
+from kgeneric.cache import factory_cache, set_cache_limit, track
+from kgeneric.serialize import dumps, loads
+from kgeneric.version import cell_factory, factory_name, registered_factory
+
+__all__ = [
+    "CacheKeys",
+    "Factory",
+    "geometry_fingerprint",
+    "build_bytes",
+    "build_keyed",
+    "cache_keys",
+    "CellMerger",
+    "CellPool",
+]
+
+Factory = str | Callable[..., KCell]
+
+CacheKeys = dict[str, tuple[str, Any]]
+"""Import path of the factory and cache key of cells by their name."""
+
+
+def _instance_key(cell_inst: kdb.CellInstArray, child: str) -> str:
+    trans = cell_inst.cplx_trans if cell_inst.is_complex() else cell_inst.trans
+    key = f"{child} {trans}"
+    if cell_inst.is_regular_array():
+        key += f" {cell_inst.a} {cell_inst.b} {cell_inst.na} {cell_inst.nb}"
+    return key
+
+
+def _value(value: int | float | str) -> str:
+    """Info value, cells read from GDS meta data lose the last digits of floats."""
+    return f"{value:.10g}" if isinstance(value, float) else str(value)
+
+
+def geometry_fingerprint(c: KCell, children: Mapping[int, str]) -> str:
+    """Fingerprint of the content of a cell, independent of names and layouts.
+
+    Args:
+        c: The cell.
+        children: Fingerprints of the child cells by cell index.
+    """
+    h = hashlib.sha256()
+    layers = [
+        (c.kcl.get_info(layer).to_s(), layer)
+        for layer in c.kcl.layer_indexes()
+        if not c.shapes(layer).is_empty()
+    ]
+    for info, layer in sorted(layers):
+        h.update(info.encode())
+        shapes = sorted((s.polygon or s).to_s() for s in c.shapes(layer).each())
+        h.update("\n".join(shapes).encode())
+    insts = [
+        _instance_key(inst.cell_inst, children[inst.cell_index])
+        for inst in c.each_inst()
+    ]
+    h.update("\n".join(sorted(insts)).encode())
+    ports = [
+        f"{p.name} {c.kcl.get_info(p.layer)} {p.width} {p.port_type} "
+        f"{p.trans if p._trans else p.dcplx_trans}"
+        for p in c.ports
+    ]
+    h.update("\n".join(sorted(ports)).encode())
+    info = [f"{name}={_value(value)}" for name, value in c.info.model_dump().items()]
+    h.update("\n".join(sorted(info)).encode())
+    return h.hexdigest()
+
+
+def _factory(factory: Factory) -> Callable[..., KCell]:
+    return kcl.factories[factory] if isinstance(factory, str) else factory
+
+
+def build_bytes(factory: Factory, settings: Mapping[str, Any]) -> bytes:
+    """Build a cell and return it serialized with its children.
+
+    This runs in the workers of a :py:class:`CellPool`.
+    """
+    return dumps(_factory(factory)(**settings))
+
+
+def cache_keys(c: KCell) -> CacheKeys:
+    """Factories and cache keys of a cell and its children.
+
+    Cells not built by a kgeneric factory and keys which cannot be pickled (e.g.
+    with a lambda as parameter) are skipped.
+    """
+    keys: CacheKeys = {}
+    for ci in {*c.called_cells(), c.cell_index()}:
+        child = c.kcl[ci]
+        factory = cell_factory(child)
+        cache = None if factory is None else factory_cache(factory)
+        if factory is None or cache is None:
+            continue
+        key = next((k for k, v in cache.items() if v is child), None)
+        if key is None:
+            continue
+        try:
+            pickle.dumps(key)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            continue
+        keys[child.name] = (factory_name(factory), key)
+    return keys
+
+
+def build_keyed(
+    factory: Factory, settings: Mapping[str, Any]
+) -> tuple[bytes, CacheKeys]:
+    """Build a cell, return it serialized and the cache keys of its cells.
+
+    This runs in the workers of a :py:class:`CellPool`.
+    """
+    c = _factory(factory)(**settings)
+    return dumps(c), cache_keys(c)
+
+
+def _copy_port(port: Port, kcl: KCLayout) -> Port:
+    """Copy of a port in another layout."""
+    copy = Port(
+        name=port.name,
+        width=port.width,
+        layer=kcl.layout.layer(port.kcl.get_info(port.layer)),
+        trans=kdb.Trans.R0,
+        kcl=kcl,
+        port_type=port.port_type,
+        info=port.info.model_dump(),
+    )
+    if port._trans:
+        copy.trans = port.trans
+    else:
+        copy.dcplx_trans = port.dcplx_trans
+    return copy
+
+
+class CellMerger:
+    """Merge cell trees from other layouts into a target layout.
+
+    Attributes:
+        target: The layout the cells are merged into.
+        added: Number of cells copied into the target.
+        reused: Number of cells which were found in the target.
+    """
+
+    def __init__(self, target: KCLayout = kcl) -> None:
+        """Create a merger, the target is indexed on the first merge."""
+        self.target = target
+        self.added = 0
+        self.reused = 0
+        self._fingerprints: dict[int, str] = {}
+        self._cells: dict[str, int] = {}
+        self._source = KCLayout("kgeneric_pool")
+
+    def _index(self) -> None:
+        """Fingerprint the locked cells of the target which are not indexed."""
+        layout = self.target.layout
+        for ci in layout.each_cell_bottom_up():
+            if ci in self._fingerprints:
+                continue
+            c = self.target.kcells.get(ci)
+            if (
+                c is None
+                or not c._locked
+                or any(child not in self._fingerprints for child in c.each_child_cell())
+            ):
+                continue
+            fp = geometry_fingerprint(c, self._fingerprints)
+            self._fingerprints[ci] = fp
+            self._cells.setdefault(fp, ci)
+
+    def _cache(
+        self, name: str, keys: Mapping[str, tuple[str, Any]] | None
+    ) -> tuple[dict[Any, KCell], Any] | None:
+        """Factory cache and key of a cell merged into :py:data:`kfactory.kcl`."""
+        if keys is None or self.target is not kcl or name not in keys:
+            return None
+        path, key = keys[name]
+        factory = registered_factory(path)
+        cache = None if factory is None else factory_cache(factory)
+        return None if cache is None else (cache, key)
+
+    def merge(
+        self, c: KCell, keys: Mapping[str, tuple[str, Any]] | None = None
+    ) -> KCell:
+        """Copy a cell and its children from another layout into the target.
+
+        Args:
+            c: Cell to merge.
+            keys: Factories and cache keys of the cells (:py:func:`cache_keys`).
+                The cells are looked up in and entered into the factory caches
+                if the target is :py:data:`kfactory.kcl`.
+
+        Returns:
+            The cell in the target, either the copy or an identical existing cell.
+        """
+        if c.kcl is self.target:
+            raise ValueError(f"{c.name} is already in the target layout")
+        self._index()
+        layout = self.target.layout
+        source: dict[int, str] = {}
+        mapping: dict[int, int] = {}
+        tree = {*c.called_cells(), c.cell_index()}
+        for ci in c.kcl.layout.each_cell_bottom_up():
+            if ci not in tree:
+                continue
+            src = c.kcl[ci]
+            fp = geometry_fingerprint(src, source)
+            source[ci] = fp
+            if fp in self._cells and layout.cell(self._cells[fp]) is not None:
+                mapping[ci] = self._cells[fp]
+                self.reused += 1
+                continue
+            cached = self._cache(src.name, keys)
+            if cached is not None and cached[1] in cached[0]:
+                mapping[ci] = cached[0][cached[1]].cell_index()
+                self.reused += 1
+                continue
+            name = src.name
+            if layout.has_cell(name):
+                name = layout.unique_cell_name(name)
+            new = KCell(name=name, kcl=self.target)
+            new._kdb_cell.copy_shapes(src._kdb_cell)
+            for inst in src.each_inst():
+                cell_inst = inst.cell_inst.dup()
+                cell_inst.cell_index = mapping[inst.cell_index]
+                new._kdb_cell.insert(cell_inst)
+            for port in src.ports:
+                new.add_port(_copy_port(port, self.target), keep_mirror=True)
+            for key, value in src.info.model_dump().items():
+                new.info[key] = value
+            new._settings = KCellSettings(**src.settings.model_dump())
+            new._locked = True
+            if cached is not None:
+                cached[0][cached[1]] = new
+                track(new, cached[0])
+            mapping[ci] = new.cell_index()
+            self._fingerprints[new.cell_index()] = fp
+            self._cells[fp] = new.cell_index()
+            self.added += 1
+        return self.target[mapping[c.cell_index()]]
+
+    def merge_bytes(
+        self, data: bytes, keys: Mapping[str, tuple[str, Any]] | None = None
+    ) -> KCell:
+        """Merge a cell serialized by :py:func:`build_bytes`.
+
+        The cells are loaded into a layout of the merger which is cleared again
+        after the merge.
+        """
+        try:
+            return self.merge(loads(data, self._source), keys)
+        finally:
+            self._source.layout.clear()
+            self._source.kcells.clear()
+
+
+class CellPool:
+    """Build cells in worker processes and merge them into a layout.
+
+    Attributes:
+        merger: Merges the results, its counters report the reused cells.
+    """
+
+    def __init__(
+        self,
+        processes: int | None = None,
+        target: KCLayout = kcl,
+        mp_context: BaseContext | None = None,
+    ) -> None:
+        """Start the workers.
+
+        Args:
+            processes: Number of workers, the number of CPUs if `None`.
+            target: Layout the cells are merged into.
+            mp_context: Multiprocessing context (e.g. `"spawn"`) of the workers.
+        """
+        self.merger = CellMerger(target)
+        self._executor: Executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=mp_context,
+            initializer=_initialize,
+        )
+
+    def build(self, jobs: Iterable[tuple[Factory, Mapping[str, Any]]]) -> list[KCell]:
+        """Build cells from `(factory, settings)` pairs.
+
+        The results are merged in the order of the jobs.
+        """
+        futures = [
+            self._executor.submit(build_keyed, factory, dict(settings))
+            for factory, settings in jobs
+        ]
+        return [self.merger.merge_bytes(*future.result()) for future in futures]
+
+    def map(
+        self, factory: Factory, settings: Iterable[Mapping[str, Any]]
+    ) -> list[KCell]:
+        """Build cells of one factory, e.g. a parameter sweep."""
+        return self.build((factory, s) for s in settings)
+
+    def close(self) -> None:
+        """Shut the workers down."""
+        self._executor.shutdown()
+
+    def __enter__(self) -> "CellPool":
+        """Use the pool as context manager, it is closed on exit."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close the pool."""
+        self.close()
+
+
+def _initialize(max_cells: int | None = None, max_bytes: int | None = None) -> None:
+    """Import kgeneric in a worker, registering its factories.
+
+    Args:
+        max_cells: Maximum number of cells kept in the layout of the worker.
+        max_bytes: Maximum estimated memory of the cells kept in the worker.
+            The limit inherited from the parent is kept if both are `None`.
+    """
+    import kgeneric  # noqa: F401
+
+    if max_cells is not None or max_bytes is not None:
+        set_cache_limit(max_cells, max_bytes)
@@ -0,0 +1,175 @@
+"""Length-quantized straights.
+
+Every route places a straight of a new length in dbu, so a large routed design
+ends up with one straight cell per distinct length. Here arbitrary lengths are
+broken into a small set of pre-built segments instead: a regular array of
+`max_segment` long straights and the binary decomposition of the rest::
+
+    length = n * max_segment + sum(2**k * min_segment) + remainder
+
+The number of different straight cells per width is therefore bounded by
+`log2(max_segment / min_segment) + min_segment + 1`, independent of the number of
+routes, and the total length stays exact.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+from kfactory import KCell, kdb
+from kfactory.kcell import Instance, Port
+from kfactory.routing.optical import route
+
+__all__ = ["straight_segments", "place_straight_quantized", "route_quantized"]
+
+
+def straight_segments(
+    length: int, max_segment: int = 2**16, min_segment: int = 1
+) -> list[tuple[int, int]]:
+    """Decompose a length into quantized segments.
+
+    Args:
+        length: Total length. [dbu]
+        max_segment: Longest segment, longer lengths use multiples of it. [dbu]
+        min_segment: Quantum of the binary decomposition. [dbu]
+
+    Returns:
+        List of `(segment_length, count)`, longest segment first.
+    """
+    if length < 0:
+        raise ValueError(f"length must be positive, got {length=}")
+    if not 0 < min_segment <= max_segment:
+        raise ValueError(
+            f"0 < min_segment <= max_segment is required, got {min_segment=}, "
+            f"{max_segment=}"
+        )
+    n, rest = divmod(length, max_segment)
+    segments = [(max_segment, n)] if n else []
+    quanta, remainder = divmod(rest, min_segment)
+    k = quanta.bit_length() - 1
+    while k >= 0:
+        if quanta >> k & 1:
+            segments.append((min_segment << k, 1))
+        k -= 1
+    if remainder:
+        segments.append((remainder, 1))
+    return segments
+
+
+def place_straight_quantized(
+    c: KCell,
+    width: int,
+    length: int,
+    straight_factory: Callable[..., KCell],
+    trans: kdb.Trans = kdb.Trans(),
+    max_segment: int = 2**16,
+    min_segment: int = 1,
+) -> list[Instance]:
+    """Place a straight as chain of quantized segments.
+
+    Args:
+        c: Target cell.
+        width: Width of the straight. [dbu]
+        length: Length of the straight. [dbu]
+        straight_factory: Function taking `width` and `length` in dbu and returning
+            a straight from (0, 0) to (length, 0), such as
+            :py:func:`~kgeneric.cells.straight_dbu`.
+        trans: Transformation of the whole straight.
+        max_segment: Longest segment, repetitions of it are placed as array. [dbu]
+        min_segment: Quantum of the binary decomposition. [dbu]
+
+    Returns:
+        The placed instances.
+    """
+    insts: list[Instance] = []
+    x = 0
+    for segment, n in straight_segments(length, max_segment, min_segment):
+        cell = straight_factory(width=width, length=segment)
+        t = trans * kdb.Trans(x, 0)
+        if n > 1:
+            insts.append(
+                c.create_inst(
+                    cell, t, a=trans * kdb.Vector(segment, 0), b=kdb.Vector(), na=n
+                )
+            )
+        else:
+            insts.append(c.create_inst(cell, t))
+        x += segment * n
+    return insts
+
+
+def route_quantized(
+    c: KCell,
+    p1: Port,
+    p2: Port,
+    straight_factory: Callable[..., KCell],
+    bend90_cell: KCell,
+    max_segment: int = 2**16,
+    min_segment: int = 1,
+    **kwargs: Any,
+) -> list[Instance]:
+    """Optical route with quantized straights.
+
+    The route is placed with :py:func:`kfactory.routing.optical.route` in a
+    scratch cell using port only placeholder straights. It is copied into `c` with
+    the placeholders replaced by quantized segments.
+
+    Args:
+        c: Cell in which the route is placed.
+        p1: Start port.
+        p2: End port.
+        straight_factory: Function taking `width` and `length` in dbu and returning
+            a straight from (0, 0) to (length, 0).
+        bend90_cell: 90° bend for the corners.
+        max_segment: Longest segment. [dbu]
+        min_segment: Quantum of the binary decomposition. [dbu]
+        kwargs: Passed to :py:func:`kfactory.routing.optical.route`.
+
+    Returns:
+        The placed instances.
+    """
+    placeholders: dict[tuple[int, int], KCell] = {}
+
+    def placeholder(width: int, length: int) -> KCell:
+        length = round(length)
+        if (width, length) not in placeholders:
+            ph = KCell(kcl=c.kcl)
+            ph.create_port(
+                name="o1", trans=kdb.Trans(2, False, 0, 0), layer=p1.layer, width=width
+            )
+            ph.create_port(
+                name="o2",
+                trans=kdb.Trans(0, False, length, 0),
+                layer=p1.layer,
+                width=width,
+            )
+            placeholders[width, length] = ph
+        return placeholders[width, length]
+
+    # route into a scratch cell and copy the route into c, replacing placeholders
+    scratch = KCell(kcl=c.kcl)
+    route(scratch, p1, p2, placeholder, bend90_cell, **kwargs)
+
+    ph_cells = {
+        ph.cell_index(): width_length for width_length, ph in placeholders.items()
+    }
+    route_insts: list[Instance] = []
+    for inst in scratch.insts:
+        if inst.cell_index in ph_cells:
+            width, length = ph_cells[inst.cell_index]
+            route_insts.extend(
+                place_straight_quantized(
+                    c,
+                    width,
+                    length,
+                    straight_factory,
+                    trans=inst.trans,
+                    max_segment=max_segment,
+                    min_segment=min_segment,
+                )
+            )
+        else:
+            route_insts.append(c.create_inst(inst.cell, inst.trans))
+    c.kcl.delete_cell(scratch)
+    for ph in placeholders.values():
+        c.kcl.delete_cell(ph)
+    return route_insts
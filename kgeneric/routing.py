@@ -1,11 +1,235 @@
+from collections.abc import Callable, Sequence
 from functools import partial
+from typing import Any
 
 import kfactory as kf
+import numpy as np
+from kfactory import kdb
+from kfactory.routing.manhattan import route_manhattan
+from kfactory.routing.optical import place90
 
-from kgeneric import gpdk
+from kgeneric import cells, gpdk
+from kgeneric.cross_section import CrossSection
+from kgeneric.length import cell_length, route_length
+from kgeneric.quantized import route_quantized
+from kgeneric.tech import TECH
 
-route_sc = partial(
-    kf.routing.optical.route,
+
+def route_sc(
+    c: kf.KCell,
+    p1: kf.Port,
+    p2: kf.Port,
+    length_key: str | None = None,
+    **kwargs: Any,
+) -> list[kf.Instance]:
+    """Route with strip straights and euler bends.
+
+    Args:
+        c: Cell in which the route is placed.
+        p1: Start port.
+        p2: End port.
+        length_key: If set, store the backbone length of the route in
+            `c.info[length_key]`. [um]
+        kwargs: Passed to :py:func:`kfactory.routing.optical.route`.
+
+    Returns:
+        The placed instances.
+    """
+    return route_xs(
+        c,
+        p1,
+        p2,
+        cross_section=gpdk.xs_sc,
+        radius=TECH.radius_sc,
+        length_key=length_key,
+        **kwargs,
+    )
+
+
+def route_xs(
+    c: kf.KCell,
+    p1: kf.Port,
+    p2: kf.Port,
+    cross_section: CrossSection,
+    radius: float = 10,
+    length_key: str | None = None,
+    **kwargs: Any,
+) -> list[kf.Instance]:
+    """Route with straights and euler bends of a cross section.
+
+    Args:
+        c: Cell in which the route is placed.
+        p1: Start port.
+        p2: End port.
+        cross_section: Core and enclosure of the straights and bends.
+        radius: Radius of the bends. [um]
+        length_key: If set, store the backbone length of the route in
+            `c.info[length_key]`. [um]
+        kwargs: Passed to :py:func:`kfactory.routing.optical.route`.
+
+    Returns:
+        The placed instances.
+    """
+    n = len(c.insts)
+    kf.routing.optical.route(
+        c,
+        p1,
+        p2,
+        straight_factory=partial(cells.straight_dbu, cross_section=cross_section),
+        bend90_cell=cells.bend_euler(radius=radius, cross_section=cross_section),
+        **kwargs,
+    )
+    insts = list(c.insts)[n:]
+    if length_key is not None:
+        c.info[length_key] = route_length(insts)
+    return insts
+
+
+route_sc_quantized = partial(
+    route_quantized,
+    straight_factory=gpdk.straight_dbu_sc,
+    bend90_cell=gpdk.bend_euler_sc(),
+)
+
+
+def route_length_matched(
+    c: kf.KCell,
+    ports1: Sequence[kf.Port],
+    ports2: Sequence[kf.Port],
+    straight_factory: Callable[..., kf.KCell],
+    bend90_cell: kf.KCell,
+    delta_lengths: Sequence[float] | None = None,
+    tolerance: float = 0.002,
+    side: int = 1,
+    start_straight: int = 0,
+    end_straight: int = 0,
+) -> list[float]:
+    r"""Route several channels with matched backbone lengths.
+
+    Every channel is routed manhattan first. The lengths of all channels are
+    then calculated in closed form from the straight segments and the length of
+    the bend (`bend90_cell.info["length_um"]`) and the extra lengths are solved
+    for all channels at once. The extra length of a channel is added with a
+    detour in its longest straight segment::
+
+              ┌──┐
+              │  │ h
+        ──────┘  └──────
+
+    which adds `2 * h + 4 * (bend_length - 2 * r)`, `r` being the size of the bend.
+
+    Args:
+        c: Cell in which the routes are placed.
+        ports1: Start ports.
+        ports2: End ports.
+        straight_factory: Function taking `width` and `length` in dbu.
+        bend90_cell: 90° bend with `length_um` in its info.
+        delta_lengths: Target length of each channel relative to the shortest
+            target. `None` matches all channels to the same length. [um]
+        tolerance: Maximum deviation of the lengths from their targets. [um]
+        side: Side of the detours, 1 for left and -1 for right of the direction
+            of the route.
+        start_straight: Minimum straight after the start ports. [dbu]
+        end_straight: Minimum straight before the end ports. [dbu]
+
+    Returns:
+        Backbone length of each channel. [um]
+    """
+    if len(ports1) != len(ports2):
+        raise ValueError(
+            f"ports1 and ports2 must have the same length, got {len(ports1)} "
+            f"and {len(ports2)}"
+        )
+    dbu = c.kcl.dbu
+    b1, b2 = (p for p in bend90_cell.ports if p.port_type == "optical")
+    r = max(abs(b1.x - b2.x), abs(b1.y - b2.y))
+    bend_length = cell_length(bend90_cell) / dbu
+
+    starts = [p.copy() for p in ports1]
+    ends = [p.copy() for p in ports2]
+    for p in starts + ends:
+        p.trans.mirror = False
+    pts_list = [
+        np.array(
+            [
+                (pt.x, pt.y)
+                for pt in route_manhattan(
+                    p1,
+                    p2,
+                    bend90_radius=r,
+                    start_straight=start_straight,
+                    end_straight=end_straight,
+                )
+            ],
+            dtype=np.int64,
+        )
+        for p1, p2 in zip(starts, ends)
+    ]
+    n_pts = np.array([len(pts) for pts in pts_list])
+    segments = np.concatenate([np.diff(pts, axis=0) for pts in pts_list])
+    seg_lengths = np.abs(segments).sum(axis=1)
+    offsets = np.concatenate([[0], np.cumsum(n_pts - 1)[:-1]])
+    lengths = np.add.reduceat(seg_lengths, offsets) - (n_pts - 2) * (
+        2 * r - bend_length
+    )
+
+    deltas = (
+        np.zeros(len(pts_list))
+        if delta_lengths is None
+        else np.asarray(delta_lengths, dtype=np.float64) / dbu
+    )
+    min_extra = 4 * bend_length - 4 * r
+    tol = tolerance / dbu
+    base = np.max(lengths - deltas)
+    extras = base + deltas - lengths
+    if np.any((extras > tol) & (extras < min_extra)):
+        extras += min_extra
+    heights = np.where(
+        extras > tol, np.round((extras - 4 * (bend_length - 2 * r)) / 2), 0
+    ).astype(np.int64)
+    achieved = lengths + np.where(
+        heights > 0, 2 * heights + 4 * (bend_length - 2 * r), 0
+    )
+    if np.any(np.abs(achieved - (lengths + extras)) > tol):
+        raise ValueError("Could not match the lengths within the tolerance")
+
+    # longest segment of each channel
+    seg_ends = offsets + n_pts - 1
+    longest = np.array(
+        [o + np.argmax(seg_lengths[o:e]) for o, e in zip(offsets, seg_ends)]
+    )
+    for i, (p1, p2, pts) in enumerate(zip(starts, ends, pts_list)):
+        if heights[i] > 0:
+            j = longest[i] - offsets[i]
+            if seg_lengths[longest[i]] < 6 * r:
+                raise ValueError(
+                    f"Channel {i} has no straight segment long enough for a detour"
+                    f" (needs {6 * r} dbu)"
+                )
+            a = pts[j]
+            u = segments[longest[i]] // seg_lengths[longest[i]]
+            n = side * np.array([-u[1], u[0]])
+            m = a + u * (seg_lengths[longest[i]] // 2)
+            detour = [
+                m - u * r,
+                m - u * r + n * heights[i],
+                m + u * r + n * heights[i],
+                m + u * r,
+            ]
+            pts = np.concatenate([pts[: j + 1], detour, pts[j + 1 :]])
+        place90(
+            c,
+            p1,
+            p2,
+            [kdb.Point(int(x), int(y)) for x, y in pts],
+            straight_factory,
+            bend90_cell,
+        )
+    return [float(length) * dbu for length in achieved]
+
+
+route_sc_length_matched = partial(
+    route_length_matched,
     straight_factory=gpdk.straight_dbu_sc,
     bend90_cell=gpdk.bend_euler_sc(),
 )
@@ -18,7 +242,5 @@ if __name__ == "__main__":
     sr = c << gpdk.straight_sc()
     sr.d.move((50, 50))
 
-    route_sc(
-        c, p1=sl.ports["o2"], p2=sr.ports["o1"], straight_factory=gpdk.straight_dbu_sc
-    )
+    route_sc(c, p1=sl.ports["o2"], p2=sr.ports["o1"])
     c.show()
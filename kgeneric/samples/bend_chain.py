@@ -1,6 +1,7 @@
 import kfactory as kf
 
 from kgeneric import gpdk as pdk
+from kgeneric.cache import prune
 
 if __name__ == "__main__":
     c = kf.KCell("bend_chain")
@@ -11,4 +12,6 @@ if __name__ == "__main__":
     # b2.flatten()
     # c.shapes.(10)
     c.flatten()
+    # the bends are not used anymore
+    prune(c)
     c.show()
@@ -0,0 +1,422 @@
+"""Compact binary serialization of cells for the transfer between processes.
+
+:py:func:`dumps` writes a cell and all its children into one buffer. The names,
+port names and types, settings and info of the cells are stored in a small JSON
+header, the bulk data in packed little endian arrays behind it:
+
+- `vertices`: `(N, 2)` `int32` coordinates of all polygon contours, the
+  coordinate type of klayout. [dbu]
+- `contours`: number of vertices of each contour, the hull of a polygon is
+  followed by its holes.
+- `polygons`: cell, layer and number of contours of each polygon.
+- `instances`: cell, child, transformation and array of each instance.
+- `ports`: cell, layer, width and transformation of each port.
+
+Boxes and paths are stored as polygons. The cells are ordered children first, so
+they can be created in one pass.
+
+:py:meth:`CellData.from_buffer` parses a buffer without copying it: the arrays
+are numpy views onto the buffer, which can be `bytes`, a `mmap` or the `buf` of a
+:py:class:`multiprocessing.shared_memory.SharedMemory`::
+
+    shm = to_shared_memory(c)
+    # in another process
+    shm = SharedMemory(name)
+    c = loads(shm.buf)
+
+The views keep the buffer exported, a shared memory block can only be closed
+once the :py:class:`CellData` is no longer referenced.
+"""
+
+import json
+import struct
+from collections.abc import Iterator
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from kfactory import KCell, KCLayout, kcl, kdb
+from kfactory.kcell import KCellSettings, Port
+
+from kgeneric.cells.arrays import to_points
+
+__all__ = ["CellData", "dumps", "loads", "to_shared_memory"]
+
+MAGIC = b"KGCELL\x00\x01"
+_HEADER = struct.Struct("<8sQ")
+_ALIGN = 8
+
+POLYGON_DTYPE = np.dtype([("cell", "<u4"), ("layer", "<u2"), ("contours", "<u4")])
+INSTANCE_DTYPE = np.dtype(
+    [
+        ("cell", "<u4"),
+        ("child", "<u4"),
+        ("complex", "u1"),
+        ("mirror", "u1"),
+        ("angle", "<f8"),
+        ("mag", "<f8"),
+        ("x", "<i8"),
+        ("y", "<i8"),
+        ("na", "<u4"),
+        ("nb", "<u4"),
+        ("a", "<i8", (2,)),
+        ("b", "<i8", (2,)),
+    ]
+)
+PORT_DTYPE = np.dtype(
+    [
+        ("cell", "<u4"),
+        ("layer", "<u2"),
+        ("complex", "u1"),
+        ("mirror", "u1"),
+        ("width", "<i8"),
+        ("angle", "<f8"),
+        ("x", "<f8"),
+        ("y", "<f8"),
+    ]
+)
+
+
+def _tree(c: KCell) -> list[KCell]:
+    """The cell and its children, children first."""
+    tree = {*c.called_cells(), c.cell_index()}
+    return [c.kcl[ci] for ci in c.kcl.layout.each_cell_bottom_up() if ci in tree]
+
+
+def _contours(polygon: kdb.Polygon) -> Iterator[list[kdb.Point]]:
+    yield list(polygon.each_point_hull())
+    for i in range(polygon.holes()):
+        yield list(polygon.each_point_hole(i))
+
+
+def _json(value: Any) -> Any:
+    return value if isinstance(value, str | int | float) else str(value)
+
+
+def dumps(c: KCell) -> bytes:
+    """Serialize a cell and its children."""
+    cells = _tree(c)
+    position = {cell.cell_index(): i for i, cell in enumerate(cells)}
+    layers = list(c.kcl.layer_indexes())
+    layer_position = {li: i for i, li in enumerate(layers)}
+
+    coords: list[int] = []
+    contours: list[int] = []
+    polygons: list[tuple[int, int, int]] = []
+    instances: list[tuple[Any, ...]] = []
+    ports: list[tuple[Any, ...]] = []
+    header_cells: list[dict[str, Any]] = []
+    shape_types = kdb.Shapes.SPolygons | kdb.Shapes.SBoxes | kdb.Shapes.SPaths
+    for i, cell in enumerate(cells):
+        texts: list[list[Any]] = []
+        for layer in layers:
+            shapes = cell.shapes(layer)
+            for shape in shapes.each(shape_types):
+                n = 0
+                for contour in _contours(shape.polygon):
+                    coords.extend(v for p in contour for v in (p.x, p.y))
+                    contours.append(len(contour))
+                    n += 1
+                polygons.append((i, layer_position[layer], n))
+            texts.extend(
+                [layer_position[layer], shape.text.to_s()]
+                for shape in shapes.each(kdb.Shapes.STexts)
+            )
+        for inst in cell.each_inst():
+            ca = inst.cell_inst
+            t = ca.cplx_trans
+            instances.append(
+                (
+                    i,
+                    position[ca.cell_index],
+                    ca.is_complex(),
+                    t.is_mirror(),
+                    t.angle,
+                    t.mag,
+                    t.disp.x,
+                    t.disp.y,
+                    ca.na if ca.is_regular_array() else 1,
+                    ca.nb if ca.is_regular_array() else 1,
+                    (ca.a.x, ca.a.y),
+                    (ca.b.x, ca.b.y),
+                )
+            )
+        for port in cell.ports:
+            pt: kdb.Trans | kdb.DCplxTrans
+            angle: float
+            if port._trans:
+                pt = port.trans
+                angle = pt.angle * 90
+            else:
+                pt = port.dcplx_trans
+                angle = pt.angle
+            ports.append(
+                (
+                    i,
+                    layer_position[port.layer],
+                    port._trans is None,
+                    pt.is_mirror(),
+                    port.width,
+                    angle,
+                    pt.disp.x,
+                    pt.disp.y,
+                )
+            )
+        header_cells.append(
+            {
+                "name": cell.name,
+                "locked": cell._locked,
+                "info": cell.info.model_dump(),
+                "settings": {
+                    k: _json(v) for k, v in cell.settings.model_dump().items()
+                },
+                "ports": [
+                    [p.name, p.port_type, p.info.model_dump()] for p in cell.ports
+                ],
+                "texts": texts,
+            }
+        )
+
+    arrays = {
+        "vertices": np.array(coords, dtype="<i4").reshape(-1, 2),
+        "contours": np.array(contours, dtype="<u4"),
+        "polygons": np.array(polygons, dtype=POLYGON_DTYPE),
+        "instances": np.array(instances, dtype=INSTANCE_DTYPE),
+        "ports": np.array(ports, dtype=PORT_DTYPE),
+    }
+
+    offset = 0
+    index = {}
+    for name, array in arrays.items():
+        index[name] = [offset, len(array)]
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps(
+        {
+            "dbu": c.kcl.dbu,
+            "layers": [c.kcl.get_info(li).to_s() for li in layers],
+            "cells": header_cells,
+            "arrays": index,
+        },
+        separators=(",", ":"),
+    ).encode()
+    header += b" " * (-(_HEADER.size + len(header)) % _ALIGN)
+
+    parts = [_HEADER.pack(MAGIC, len(header)), header]
+    for array in arrays.values():
+        data = array.tobytes()
+        parts.append(data + b"\0" * (-len(data) % _ALIGN))
+    return b"".join(parts)
+
+
+class CellData:
+    """View of a serialized cell tree.
+
+    Attributes:
+        header: Names, settings, info, port names and texts of the cells, the
+            layers and the database unit.
+        vertices: `(N, 2)` coordinates of all contours. [dbu]
+        contours: Number of vertices per contour.
+        polygons: Cell, layer and number of contours per polygon.
+        instances: Cell, child and transformation per instance.
+        ports: Cell, layer, width and transformation per port.
+    """
+
+    vertices: npt.NDArray[np.int32]
+    contours: npt.NDArray[np.uint32]
+    polygons: npt.NDArray[np.void]
+    instances: npt.NDArray[np.void]
+    ports: npt.NDArray[np.void]
+
+    def __init__(self, header: dict[str, Any], arrays: dict[str, np.ndarray]):
+        """Create the view, use :py:meth:`from_buffer` instead."""
+        self.header = header
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    @classmethod
+    def from_buffer(cls, buffer: bytes | memoryview) -> "CellData":
+        """Parse a buffer written by :py:func:`dumps` without copying it."""
+        view = memoryview(buffer)
+        magic, size = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("Not a serialized kgeneric cell")
+        header = json.loads(bytes(view[_HEADER.size : _HEADER.size + size]))
+        start = _HEADER.size + size
+        arrays = {}
+        dtypes = {
+            "vertices": np.dtype(("<i4", 2)),
+            "contours": np.dtype("<u4"),
+            "polygons": POLYGON_DTYPE,
+            "instances": INSTANCE_DTYPE,
+            "ports": PORT_DTYPE,
+        }
+        for name, (offset, count) in header.pop("arrays").items():
+            arrays[name] = np.frombuffer(
+                view, dtype=dtypes[name], count=count, offset=start + offset
+            )
+        return cls(header, arrays)
+
+    def to_kcell(self, kcl: KCLayout = kcl) -> KCell:
+        """Create the cells in a layout and return the top cell.
+
+        Cells which already exist in the layout (by name) are kept and not
+        created again.
+        """
+        if not np.isclose(kcl.dbu, self.header["dbu"]):
+            raise ValueError(
+                f"dbu of the layout {kcl.dbu} differs from {self.header['dbu']}"
+            )
+        layers = [
+            kcl.layout.layer(kdb.LayerInfo.from_string(s))
+            for s in self.header["layers"]
+        ]
+        polygon_ends = np.cumsum(self.polygons["contours"])
+        vertex_ends = np.cumsum(self.contours)
+        polygon_cells = np.searchsorted(
+            self.polygons["cell"], np.arange(len(self.header["cells"]) + 1)
+        )
+        instance_cells = np.searchsorted(
+            self.instances["cell"], np.arange(len(self.header["cells"]) + 1)
+        )
+        port_cells = np.searchsorted(
+            self.ports["cell"], np.arange(len(self.header["cells"]) + 1)
+        )
+
+        created: list[KCell] = []
+        for i, header in enumerate(self.header["cells"]):
+            if kcl.layout.has_cell(header["name"]):
+                created.append(kcl[header["name"]])
+                continue
+            c = KCell(name=header["name"], kcl=kcl)
+            self._insert_polygons(
+                c,
+                layers,
+                polygon_cells[i],
+                polygon_cells[i + 1],
+                polygon_ends,
+                vertex_ends,
+            )
+            for layer, text in header["texts"]:
+                c.shapes(layers[layer]).insert(kdb.Text.from_s(text))
+            for inst in self.instances[instance_cells[i] : instance_cells[i + 1]]:
+                c._kdb_cell.insert(
+                    _cell_inst(created[inst["child"]].cell_index(), inst)
+                )
+            for (name, port_type, info), port in zip(
+                header["ports"],
+                self.ports[port_cells[i] : port_cells[i + 1]],
+            ):
+                c.add_port(
+                    _port(kcl, layers, name, port_type, info, port), keep_mirror=True
+                )
+            for name, value in header["info"].items():
+                c.info[name] = value
+            c._settings = KCellSettings(**header["settings"])
+            c._locked = header["locked"]
+            created.append(c)
+        return created[-1]
+
+    def _insert_polygons(
+        self,
+        c: KCell,
+        layers: list[int],
+        start: int,
+        stop: int,
+        polygon_ends: npt.NDArray[np.integer[Any]],
+        vertex_ends: npt.NDArray[np.integer[Any]],
+    ) -> None:
+        """Insert the polygons `start:stop`, one region per layer."""
+        regions: dict[int, list[kdb.Polygon]] = {}
+        for p in range(start, stop):
+            c_stop = polygon_ends[p]
+            c_start = c_stop - self.polygons["contours"][p]
+            v = vertex_ends[c_start:c_stop]
+            v_start = v[0] - self.contours[c_start]
+            hull = self.vertices[v_start : v[0]]
+            polygon = kdb.Polygon(to_points(hull))
+            for h_start, h_stop in zip(v[:-1], v[1:]):
+                polygon.insert_hole(to_points(self.vertices[h_start:h_stop]))
+            regions.setdefault(self.polygons["layer"][p], []).append(polygon)
+        for layer, polygons in regions.items():
+            c.shapes(layers[layer]).insert(kdb.Region(polygons))
+
+
+def _cell_inst(ci: int, inst: np.void) -> kdb.CellInstArray:
+    if inst["complex"]:
+        trans: kdb.Trans | kdb.ICplxTrans = kdb.ICplxTrans(
+            float(inst["mag"]),
+            float(inst["angle"]),
+            bool(inst["mirror"]),
+            int(inst["x"]),
+            int(inst["y"]),
+        )
+    else:
+        trans = kdb.Trans(
+            int(round(inst["angle"] / 90)) % 4,
+            bool(inst["mirror"]),
+            int(inst["x"]),
+            int(inst["y"]),
+        )
+    if inst["na"] == 1 and inst["nb"] == 1:
+        return kdb.CellInstArray(ci, trans)
+    return kdb.CellInstArray(
+        ci,
+        trans,
+        kdb.Vector(*inst["a"].tolist()),
+        kdb.Vector(*inst["b"].tolist()),
+        int(inst["na"]),
+        int(inst["nb"]),
+    )
+
+
+def _port(
+    kcl: KCLayout,
+    layers: list[int],
+    name: str | None,
+    port_type: str,
+    info: dict[str, Any],
+    port: np.void,
+) -> Port:
+    p = Port(
+        name=name,
+        width=int(port["width"]),
+        layer=layers[port["layer"]],
+        trans=kdb.Trans.R0,
+        kcl=kcl,
+        port_type=port_type,
+        info=info,
+    )
+    if port["complex"]:
+        p.dcplx_trans = kdb.DCplxTrans(
+            1,
+            float(port["angle"]),
+            bool(port["mirror"]),
+            float(port["x"]),
+            float(port["y"]),
+        )
+    else:
+        p.trans = kdb.Trans(
+            int(round(port["angle"] / 90)) % 4,
+            bool(port["mirror"]),
+            int(port["x"]),
+            int(port["y"]),
+        )
+    return p
+
+
+def loads(buffer: bytes | memoryview, kcl: KCLayout = kcl) -> KCell:
+    """Create a serialized cell tree in a layout and return the top cell."""
+    return CellData.from_buffer(buffer).to_kcell(kcl)
+
+
+def to_shared_memory(c: KCell) -> SharedMemory:
+    """Serialize a cell into a new shared memory block.
+
+    The caller owns the block and has to `close` and `unlink` it once the
+    receiver has loaded the cell.
+    """
+    data = dumps(c)
+    shm = SharedMemory(create=True, size=len(data))
+    shm.buf[: len(data)] = data  # type: ignore[index]
+    return shm
@@ -0,0 +1,322 @@
+"""Local cell generation service.
+
+A :py:class:`CellService` keeps a pool of warm worker processes which have
+kgeneric imported and its factories registered, and serves cells over a Unix
+socket or a localhost TCP port::
+
+    python -m kgeneric.service --socket /tmp/kgeneric.sock
+
+Clients request a cell by the name of its factory in `kcl.factories` and its
+settings and receive it serialized with :py:func:`kgeneric.serialize.dumps`::
+
+    async with await CellClient.connect("/tmp/kgeneric.sock") as client:
+        c = await client.cell("ring_single", gap=0.3)
+
+The settings are completed with the defaults of the factory, results are cached
+by factory and settings and shared by all clients. A request for a cell which is
+being built already waits for that build instead of starting another one.
+
+Every message is framed by its length as little endian `uint64`. A request is a
+JSON object `{"factory": ..., "settings": {...}}`, so the settings have to be
+JSON values (layers as their index). A response starts with a status byte, `0`
+followed by the serialized cell or `1` followed by the error message.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import multiprocessing
+import os
+import struct
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.synchronize import Barrier
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from kfactory import KCell, KCLayout, kcl
+
+from kgeneric.pool import _initialize, build_bytes
+from kgeneric.serialize import loads
+
+__all__ = ["ServiceError", "CellService", "CellClient", "request_key"]
+
+_SIZE = struct.Struct("<Q")
+_OK = b"\0"
+_ERROR = b"\1"
+_WARM_UP_TIMEOUT = 600
+
+
+class ServiceError(RuntimeError):
+    """Raised by a client if the service could not build a cell."""
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    (size,) = _SIZE.unpack(await reader.readexactly(_SIZE.size))
+    return await reader.readexactly(size)
+
+
+def _write_frame(writer: asyncio.StreamWriter, *parts: bytes) -> None:
+    writer.write(_SIZE.pack(sum(len(part) for part in parts)))
+    writer.writelines(parts)
+
+
+def request_key(factory: str, settings: Mapping[str, Any]) -> str:
+    """Cache key of a request.
+
+    The settings are bound to the signature of the factory with its defaults, so
+    the key is independent of their order and of whether defaults are given.
+
+    Raises:
+        KeyError: If the factory is not registered.
+        TypeError: If the settings do not match the signature of the factory.
+    """
+    bound = inspect.signature(kcl.factories[factory]).bind_partial(**settings)
+    bound.apply_defaults()
+    return json.dumps(
+        [factory, bound.arguments], sort_keys=True, separators=(",", ":"), default=repr
+    )
+
+
+_barrier: Barrier | None = None
+
+
+def _initialize_worker(
+    barrier: Barrier, max_cells: int | None, max_bytes: int | None
+) -> None:
+    """Import kgeneric in a worker and limit the cells kept in its layout."""
+    global _barrier
+    _barrier = barrier
+    _initialize(max_cells, max_bytes)
+
+
+def _warm_up() -> None:
+    """Wait until every worker has been initialized.
+
+    Each worker blocks in its first call until all have taken one, so the calls
+    of :py:meth:`CellService.start` are spread over all workers.
+    """
+    if _barrier is not None:
+        _barrier.wait(timeout=_WARM_UP_TIMEOUT)
+
+
+class CellService:
+    """Build cells in warm workers, cache them and serve them to clients.
+
+    Attributes:
+        hits: Requests answered from the cache.
+        misses: Requests which started a build.
+        coalesced: Requests which waited for a build started by another request.
+    """
+
+    def __init__(
+        self,
+        processes: int | None = None,
+        cache_size: int = 1024,
+        worker_cache_limit: tuple[int | None, int | None] = (10_000, None),
+    ) -> None:
+        """Create the service, the workers are started by :py:meth:`start`.
+
+        Args:
+            processes: Number of workers, the number of CPUs if `None`.
+            cache_size: Maximum number of cached cells, the least recently
+                requested ones are dropped first.
+            worker_cache_limit: Maximum number of cells and memory of the cells
+                kept in the layout of each worker, see
+                :py:func:`kgeneric.cache.set_cache_limit`.
+        """
+        self.processes = processes
+        self.cache_size = cache_size
+        self.worker_cache_limit = worker_cache_limit
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._pending: dict[str, asyncio.Task[bytes]] = {}
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        """Start the workers and wait until all have imported kgeneric."""
+        processes = self.processes or os.cpu_count() or 1
+        barrier = multiprocessing.Barrier(processes)
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_initialize_worker,
+            initargs=(barrier, *self.worker_cache_limit),
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._executor, _warm_up) for _ in range(processes))
+        )
+
+    async def build(self, factory: str, settings: Mapping[str, Any]) -> bytes:
+        """Serialized cell of a factory, from the cache if possible.
+
+        The build runs in its own task, cancelling one of the requests waiting
+        for it does not cancel it for the others.
+        """
+        if self._executor is None:
+            raise RuntimeError("The service is not started")
+        key = request_key(factory, settings)
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        task = self._pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._build(key, factory, dict(settings)))
+            self._pending[key] = task
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _build(self, key: str, factory: str, settings: dict[str, Any]) -> bytes:
+        """Build a cell in a worker and cache it."""
+        try:
+            data = await asyncio.get_running_loop().run_in_executor(
+                self._executor, build_bytes, factory, settings
+            )
+        finally:
+            del self._pending[key]
+        self._cache[key] = data
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return data
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer the requests of one client until it disconnects."""
+        try:
+            while True:
+                try:
+                    frame = await _read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    request = json.loads(frame)
+                    data = await self.build(request["factory"], request["settings"])
+                except Exception as e:
+                    _write_frame(writer, _ERROR, f"{type(e).__name__}: {e}".encode())
+                else:
+                    _write_frame(writer, _OK, data)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(
+        self, path: str | Path | None = None, host: str = "127.0.0.1", port: int = 0
+    ) -> asyncio.Server:
+        """Start the workers and listen on a Unix socket or a TCP port.
+
+        Args:
+            path: Unix socket, a TCP port on `host` is used if `None`.
+            host: Host of the TCP server.
+            port: TCP port, a free port is chosen if 0.
+        """
+        await self.start()
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self) -> None:
+        """Stop listening and shut the workers down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+class CellClient:
+    """Connection to a :py:class:`CellService`.
+
+    Requests of one client are answered in order, use several clients for
+    concurrent requests.
+    """
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Create a client, use :py:meth:`connect` instead."""
+        self._reader = reader
+        self._writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(
+        cls, path: str | Path | None = None, host: str = "127.0.0.1", port: int = 0
+    ) -> "CellClient":
+        """Connect to a service on a Unix socket or a TCP port."""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def get(self, factory: str, **settings: Any) -> bytes:
+        """Serialized cell of a factory.
+
+        Raises:
+            ServiceError: If the service could not build the cell.
+        """
+        request = json.dumps({"factory": factory, "settings": settings}).encode()
+        async with self._lock:
+            _write_frame(self._writer, request)
+            await self._writer.drain()
+            response = await _read_frame(self._reader)
+        if response[:1] != _OK:
+            raise ServiceError(response[1:].decode())
+        return response[1:]
+
+    async def cell(
+        self, factory: str, layout: KCLayout = kcl, **settings: Any
+    ) -> KCell:
+        """Cell of a factory, created in a layout."""
+        return loads(await self.get(factory, **settings), layout)
+
+    async def close(self) -> None:
+        """Close the connection."""
+        self._writer.close()
+        await self._writer.wait_closed()
+
+    async def __aenter__(self) -> "CellClient":
+        """Use the client as async context manager, it is closed on exit."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close the client."""
+        await self.close()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    service = CellService(args.processes, args.cache_size)
+    server = await service.serve(args.socket, args.host, args.port)
+    for socket in server.sockets:
+        print(f"kgeneric service on {socket.getsockname()}")
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", help="Unix socket, TCP if not given")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    asyncio.run(_main(parser.parse_args()))
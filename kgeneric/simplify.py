@@ -0,0 +1,167 @@
+"""Vertex reduction of the polygons of cells.
+
+Curved cells sample their backbones with a fixed resolution, which leaves many
+vertices that are (almost) collinear after snapping to the grid. klayout already
+drops exactly collinear vertices; :py:func:`simplify_cell` additionally removes
+all vertices which are closer than `tolerance` to the contour without them
+(Douglas-Peucker on every hull and hole).
+
+The reduction can be applied to every cell created by kgeneric by enabling it
+before the cells are created::
+
+    with simplification(tolerance=1):
+        c = bend_euler(width=1, radius=10, layer=LAYER.WG)
+    c.info["vertices_removed"]
+
+The tolerance is added to the parameters of the cells created within the
+context as `simplify_tolerance`, so simplified cells have their own cache entries
+and names (e.g. `bend_euler_W1000_..._ST1`) and the cells created without
+simplification or with another tolerance are not returned for them.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import numpy as np
+import numpy.typing as npt
+from kfactory import KCell, kdb
+
+from kgeneric.cells.arrays import to_polygon
+
+__all__ = [
+    "SIMPLIFY_PARAM",
+    "simplify_contour",
+    "simplify_polygon",
+    "simplify_cell",
+    "simplification",
+    "set_simplification",
+    "simplification_tolerance",
+]
+
+SIMPLIFY_PARAM = "simplify_tolerance"
+"""Parameter of the cells with the tolerance of their simplification."""
+
+_tolerance: float | None = None
+
+
+def simplification_tolerance() -> float | None:
+    """Tolerance of the automatic simplification, `None` if it is disabled."""
+    return _tolerance
+
+
+def set_simplification(tolerance: float | None) -> None:
+    """Enable (tolerance in dbu) or disable (`None`) the simplification of cells."""
+    global _tolerance
+    _tolerance = tolerance
+
+
+@contextmanager
+def simplification(tolerance: float = 1) -> Iterator[None]:
+    """Simplify all kgeneric cells created within the context.
+
+    Args:
+        tolerance: Maximum distance of removed vertices from the contour. [dbu]
+    """
+    previous = _tolerance
+    set_simplification(tolerance)
+    try:
+        yield
+    finally:
+        set_simplification(previous)
+
+
+def _douglas_peucker(points: npt.NDArray[np.int64], tolerance: float) -> list[int]:
+    """Indices of an open polyline to keep, first and last are always kept."""
+    keep = [0, len(points) - 1]
+    stack = [(0, len(points) - 1)]
+    p = points.astype(np.float64)
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        d = p[j] - p[i]
+        norm = np.hypot(*d)
+        v = p[i + 1 : j] - p[i]
+        if norm:
+            distance = np.abs(d[0] * v[:, 1] - d[1] * v[:, 0]) / norm
+        else:
+            distance = np.hypot(v[:, 0], v[:, 1])
+        k = int(np.argmax(distance))
+        if distance[k] > tolerance:
+            m = i + 1 + k
+            keep.append(m)
+            stack += [(i, m), (m, j)]
+    return sorted(keep)
+
+
+def simplify_contour(
+    points: npt.NDArray[np.int64], tolerance: float
+) -> npt.NDArray[np.int64]:
+    """Simplify a closed contour given as `(N, 2)` array.
+
+    The contour is split at its first point and the point farthest from it and
+    both halves are simplified with Douglas-Peucker.
+
+    Args:
+        points: Vertices of the contour. [dbu]
+        tolerance: Maximum distance of removed vertices from the contour. [dbu]
+    """
+    if len(points) <= 4:
+        return points
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    first = _douglas_peucker(points[: far + 1], tolerance)
+    second = _douglas_peucker(np.concatenate([points[far:], points[:1]]), tolerance)
+    keep = first + [far + i for i in second[1:-1]]
+    if len(keep) < 3:
+        return points
+    return points[keep]
+
+
+def _contour(points: Iterator[kdb.Point]) -> npt.NDArray[np.int64]:
+    return np.array([(p.x, p.y) for p in points], dtype=np.int64)
+
+
+def simplify_polygon(polygon: kdb.Polygon, tolerance: float) -> kdb.Polygon:
+    """Simplify the hull and the holes of a polygon.
+
+    Args:
+        polygon: Polygon to simplify.
+        tolerance: Maximum distance of removed vertices from the contour. [dbu]
+    """
+    return to_polygon(
+        simplify_contour(_contour(polygon.each_point_hull()), tolerance),
+        holes=[
+            simplify_contour(_contour(polygon.each_point_hole(i)), tolerance)
+            for i in range(polygon.holes())
+        ],
+    )
+
+
+def simplify_cell(c: KCell, tolerance: float = 1) -> int:
+    """Simplify all polygons of a cell (not its children) in place.
+
+    The number of vertices after and the number of removed vertices are stored
+    in `c.info["vertices"]` and `c.info["vertices_removed"]`.
+
+    Args:
+        c: Cell to simplify.
+        tolerance: Maximum distance of removed vertices from the contour. [dbu]
+
+    Returns:
+        The number of removed vertices.
+    """
+    before = 0
+    after = 0
+    for layer in c.kcl.layer_indexes():
+        for shape in c.shapes(layer).each(kdb.Shapes.SPolygons):
+            polygon = shape.polygon
+            n = polygon.num_points()
+            simplified = simplify_polygon(polygon, tolerance)
+            m = simplified.num_points()
+            if m < n:
+                shape.polygon = simplified
+            before += n
+            after += min(m, n)
+    c.info["vertices"] = after
+    c.info["vertices_removed"] = before - after
+    return before - after
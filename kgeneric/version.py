@@ -0,0 +1,293 @@
+"""Version keys of cell factories.
+
+The cells of a factory are cached by their parameters only. Editing the body of
+the factory, a helper it calls or a module constant it reads (`TECH`, `LAYER`,
+the enclosures of :py:mod:`kgeneric.gpdk`) leaves stale cells behind. The
+version key of a factory hashes all of its inputs besides the parameters:
+
+- the compiled code and the default arguments of the function,
+- the values of the public module level names it reads, e.g. `TECH.width_sc`;
+  private module level data (`_entries`) is runtime state and skipped,
+- the version keys of the kgeneric functions and factories it calls, so a
+  change in `straight` changes the keys of `coupler` and `mzi` as well.
+
+Functions of other packages are represented by their name and the version of
+their package. The key describes the code which is running, so a source file
+edited on disk changes the keys of a new process (or after a reload), not of the
+running one; the keys depend on the Python version.
+
+:py:func:`refresh` compares the current keys with those recorded when the
+factories built their first cell and releases the cells of changed factories
+only, the next call builds them again::
+
+    euler.extrude_path = my_extrude_path
+    refresh()  # ["bend_euler", "bend_s_euler"]
+
+Persistent libraries store the keys of their cells in their index, only cells
+whose factories changed have to be built again, see
+:py:meth:`kgeneric.libindex.LibraryIndex.record_versions`.
+"""
+
+import enum
+import functools
+import hashlib
+import importlib
+import importlib.metadata
+import inspect
+import sys
+import types
+from collections.abc import Callable, Iterable
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import numpy as np
+from kfactory import KCell, KCLayout
+from pydantic import BaseModel
+
+from kgeneric import cache as _cache
+
+__all__ = [
+    "cell_factory",
+    "cell_version",
+    "factory_name",
+    "factory_version",
+    "import_factory",
+    "record",
+    "refresh",
+    "register",
+    "registered_factory",
+]
+
+_PACKAGE = "kgeneric"
+_PYTHON = f"{sys.version_info.major}.{sys.version_info.minor}"
+
+_factories: "WeakKeyDictionary[Callable[..., KCell], dict[Any, KCell]]" = (
+    WeakKeyDictionary()
+)
+_recorded: "WeakKeyDictionary[Callable[..., KCell], str]" = WeakKeyDictionary()
+
+
+def _own(obj: Any) -> bool:
+    return (getattr(obj, "__module__", None) or "").split(".")[0] == _PACKAGE
+
+
+@functools.cache
+def _package_version(module: str) -> str:
+    try:
+        return importlib.metadata.version(module.split(".")[0])
+    except (importlib.metadata.PackageNotFoundError, ValueError):
+        return ""
+
+
+def _external(obj: Any) -> str:
+    module = getattr(obj, "__module__", None) or ""
+    name = getattr(obj, "__qualname__", None) or type(obj).__qualname__
+    return f"{module}.{name}@{_package_version(module)}"
+
+
+def _names(code: types.CodeType) -> set[str]:
+    """Global and attribute names used by code and its nested functions."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _names(const)
+    return names
+
+
+class _Hasher:
+    """Describe the inputs of functions, memoizing each function once."""
+
+    def __init__(self) -> None:
+        self.versions: dict[int, str] = {}
+
+    def function(self, f: Callable[..., Any]) -> str:
+        f = inspect.unwrap(f)
+        key = id(f)
+        if key in self.versions:
+            return self.versions[key]
+        # recursive functions refer to themselves by name
+        self.versions[key] = f"recursive {f.__qualname__}"
+        parts = [
+            _PYTHON,
+            f.__module__,
+            f.__qualname__,
+            self.code(f.__code__),
+            self.value(f.__defaults__),
+            self.value(f.__kwdefaults__),
+        ]
+        if f.__closure__:
+            parts.extend(self.value(cell.cell_contents) for cell in f.__closure__)
+        names = _names(f.__code__)
+        for name in sorted(names):
+            if name not in f.__globals__:
+                continue
+            value = f.__globals__[name]
+            if name.startswith("_") and not callable(value):
+                # private module state like the tracked cells of the cache
+                continue
+            parts.append(f"{name}={self.value(value)}")
+            if isinstance(value, types.ModuleType) and _own(value):
+                parts.extend(
+                    f"{name}.{attr}={self.value(getattr(value, attr))}"
+                    for attr in sorted(names)
+                    if hasattr(value, attr)
+                )
+        version = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+        self.versions[key] = version
+        return version
+
+    def code(self, code: types.CodeType) -> str:
+        """Bytecode, names and constants of code and its nested functions."""
+        consts = [
+            self.code(c) if isinstance(c, types.CodeType) else self.value(c)
+            for c in code.co_consts
+        ]
+        return "|".join([code.co_code.hex(), ",".join(code.co_names), ",".join(consts)])
+
+    def value(self, value: Any) -> str:
+        """Stable description of a value read by a factory."""
+        if value is None or isinstance(value, bool | int | float | str | bytes):
+            return repr(value)
+        if isinstance(value, enum.Enum):
+            return f"{type(value).__qualname__}.{value.name}={value.value!r}"
+        if isinstance(value, list | tuple | set | frozenset):
+            items = [self.value(v) for v in value]
+            if isinstance(value, set | frozenset):
+                items.sort()
+            return f"{type(value).__name__}({', '.join(items)})"
+        if isinstance(value, dict):
+            items = sorted(
+                f"{self.value(k)}: {self.value(v)}" for k, v in value.items()
+            )
+            return f"{{{', '.join(items)}}}"
+        if isinstance(value, functools.partial):
+            items = [self.value(v) for v in (value.func, value.args, value.keywords)]
+            return f"partial({', '.join(items)})"
+        if isinstance(value, types.ModuleType):
+            return value.__name__ if _own(value) else _external(value)
+        if isinstance(value, types.FunctionType):
+            return self.function(value) if _own(value) else _external(value)
+        if isinstance(value, type):
+            if issubclass(value, enum.Enum):
+                return self.value({m.name: m.value for m in value})
+            if _own(value):
+                return self.value(
+                    {k: v for k, v in vars(value).items() if not k.startswith("__")}
+                )
+            return _external(value)
+        if callable(value):
+            return _external(value)
+        if isinstance(value, KCLayout | KCell):
+            return f"{type(value).__qualname__}({value.name})"
+        if isinstance(value, np.ndarray):
+            return f"ndarray({hashlib.sha256(value.tobytes()).hexdigest()})"
+        if isinstance(value, BaseModel):
+            return f"{type(value).__qualname__}{self.value(value.model_dump())}"
+        if _own(type(value)) and hasattr(value, "__dict__"):
+            attrs = {
+                k: v
+                for k, v in inspect.getmembers(value)
+                if not k.startswith("_") and not callable(v)
+            }
+            return f"{type(value).__qualname__}{self.value(attrs)}"
+        description = repr(value)
+        return type(value).__qualname__ if " at 0x" in description else description
+
+
+def factory_version(factory: Callable[..., KCell]) -> str:
+    """Version key of a factory, a function or a `functools.partial` of one."""
+    hasher = _Hasher()
+    if isinstance(factory, functools.partial):
+        return hashlib.sha256(hasher.value(factory).encode()).hexdigest()
+    return hasher.function(factory)
+
+
+def register(factory: Callable[..., KCell], cache: dict[Any, KCell]) -> None:
+    """Register a factory and its cache, done by :py:func:`kgeneric.cells.cell`."""
+    _factories[factory] = cache
+
+
+def record(factory: Callable[..., KCell]) -> None:
+    """Record the version key of a factory before it builds its first cell."""
+    _recorded[factory] = factory_version(factory)
+
+
+def cell_factory(c: KCell) -> Callable[..., KCell] | None:
+    """The factory which built a cell, if it is known.
+
+    For the um factories which convert their parameters and call a dbu factory
+    (e.g. `ring_single`), this is the dbu factory.
+    """
+    entry = _cache._entries.get(_cache._key(c))
+    if entry is None:
+        return None
+    for factory, cache in _factories.items():
+        if cache is entry.cache:
+            return factory
+    return None
+
+
+def cell_version(c: KCell) -> str | None:
+    """Version key of the factory which built a cell, if it is known."""
+    factory = cell_factory(c)
+    if factory is None:
+        return None
+    return _recorded.get(factory) or factory_version(factory)
+
+
+def factory_name(factory: Callable[..., KCell]) -> str:
+    """Import path of a factory, e.g. `kgeneric.cells.dbu.ring:ring_single`."""
+    return f"{factory.__module__}:{factory.__qualname__}"
+
+
+def registered_factory(name: str) -> Callable[..., KCell] | None:
+    """Registered factory with an import path of :py:func:`factory_name`.
+
+    Unlike :py:func:`import_factory`, this is the cached factory, also if the
+    module exports it wrapped, e.g. by :py:func:`kgeneric.cross_section.with_cross_section`.
+    """
+    return next((f for f in _factories if factory_name(f) == name), None)
+
+
+def import_factory(name: str) -> Callable[..., KCell]:
+    """Factory of an import path returned by :py:func:`factory_name`."""
+    module, qualname = name.split(":")
+    factory: Any = importlib.import_module(module)
+    for attr in qualname.split("."):
+        factory = getattr(factory, attr)
+    return factory  # type: ignore[no-any-return]
+
+
+def refresh(factories: Iterable[Callable[..., KCell]] | None = None) -> list[str]:
+    """Release the cells of the factories whose version key changed.
+
+    The changed factories build their cells again on the next call. Pinned cells
+    and cells which are instantiated in a cell of an unchanged factory or in a
+    cell not created by a factory are kept, but dropped from the factory cache.
+
+    Args:
+        factories: Factories to check, all factories which built a cell if
+            `None`.
+
+    Returns:
+        The names of the changed factories.
+    """
+    hasher = _Hasher()
+    changed: list[str] = []
+    stale: list[KCell] = []
+    for factory in list(_recorded if factories is None else factories):
+        version = _recorded.get(factory)
+        if version is None or hasher.function(factory) == version:
+            continue
+        changed.append(factory.__name__)
+        cache = _factories[factory]
+        stale.extend(
+            c
+            for c in cache.values()
+            if _cache._alive(c) and _cache._key(c) not in _cache._pinned
+        )
+        cache.clear()
+        del _recorded[factory]
+    if stale:
+        _cache.release(*stale)
+    return changed
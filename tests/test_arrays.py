@@ -0,0 +1,56 @@
+import kfactory as kf
+import numpy as np
+from kfactory import kdb
+from kfactory.enclosure import extrude_path as kf_extrude_path
+
+from kgeneric import LAYER, gpdk
+from kgeneric.cells.arrays import (
+    extrude_path,
+    insert_polygons,
+    snap,
+    to_dpoints,
+    to_points,
+    to_polygon,
+)
+
+
+def test_snap_like_to_itype() -> None:
+    """Rounding half away from zero, the same as `DPoint.to_itype`."""
+    a = np.array([[0.0005, -0.0005], [0.0015, -0.0025], [1.2344, -7.0]])
+    expected = [kdb.DPoint(x, y).to_itype(0.001) for x, y in a]
+    assert to_points(a, 0.001) == expected
+    assert snap(np.array([3, -4])).tolist() == [3, -4]
+
+
+def test_polygons() -> None:
+    hull = np.array([(0, 0), (100, 0), (100, 100), (0, 100)])
+    hole = np.array([(10, 10), (10, 20), (20, 20), (20, 10)])
+    assert to_polygon(hull, holes=[hole]).area() == 100 * 100 - 10 * 10
+    assert to_dpoints(hull / 1000)[2] == kdb.DPoint(0.1, 0.1)
+
+    shapes = kdb.Shapes()
+    insert_polygons(shapes, [hull, hull + 200, hole])
+    assert shapes.size() == 3
+
+
+def test_extrude_path_like_kfactory() -> None:
+    """Same geometry as the kfactory extrusion of a list of points."""
+    t = np.linspace(0, np.pi / 3, 40)
+    path = 10 * np.stack([np.sin(t), 1 - np.cos(t)], axis=1)
+    enclosure = gpdk.enclosure_sc
+    c_np = kf.KCell()
+    extrude_path(c_np, LAYER.WG, path, 0.5, enclosure, start_angle=0, end_angle=60)
+    c_kf = kf.KCell()
+    kf_extrude_path(
+        c_kf,
+        LAYER.WG,
+        to_dpoints(path),
+        0.5,
+        enclosure,
+        start_angle=0,
+        end_angle=60,
+    )
+    for layer in c_np.kcl.layer_indexes():
+        r_np = kdb.Region(c_np.shapes(layer))
+        r_kf = kdb.Region(c_kf.shapes(layer))
+        assert (r_np ^ r_kf).is_empty()
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from kgeneric import LAYER, cells, gpdk
+from kgeneric.assembly import Die, PlacementError, regular_runs
+
+
+def test_regular_runs() -> None:
+    """Irregular positions split into runs with a constant pitch."""
+    runs = regular_runs([(0, 0), (10, 0), (20, 0), (35, 0), (50, 0), (5, 7)])
+    assert runs == [(0, 0, 10, 3), (35, 0, 15, 2), (5, 7, 0, 1)]
+
+
+def test_die() -> None:
+    """Arrays are one instance each, ports are found and overlaps rejected."""
+    die = Die(size=(5000, 5000))
+    mzi = cells.mzi()
+    mzis = die.place_array(mzi, (200, 200), pitch=(300, 150), columns=10, rows=25)
+    assert len(mzis) == 250
+    assert len(die.c.insts) == 1
+    port = mzis.port("o1", 9, 24)
+    assert (port.x, port.y) == (
+        mzi.ports["o1"].x + 2_900_000,
+        mzi.ports["o1"].y + 3_800_000,
+    )
+
+    with pytest.raises(PlacementError):
+        die.place_array(mzi, (250, 200), pitch=(300, 150))
+    with pytest.raises(PlacementError):
+        die.place_array(mzi, (4950, 4900), pitch=(300, 150))
+    with pytest.raises(PlacementError):
+        die.place_array(mzi, (200, 4000), pitch=(10, 150), columns=3)
+
+    gcs = die.place(
+        gpdk.grating_coupler_sc(),
+        [(100, 4500), (227, 4500), (354, 4500), (600, 4500), (100, 4700)],
+    )
+    assert len(gcs) == 5
+    assert len(gcs.insts) == 3
+    assert len(list(gcs.ports("o1"))) == 5
+
+
+def test_die_gaps_and_spacing() -> None:
+    """Copies are checked one by one, placements in the gaps of arrays fit."""
+    die = Die(size=(1000, 1000), spacing=0.043)
+    assert die.spacing == 43
+    straight = cells.straight(width=0.5, length=10, layer=LAYER.WG)
+    die.place_array(straight, (0, 1), pitch=(20, 20), columns=40, rows=40)
+    die.place(straight, [(0, 11), (780, 31)])
+    short = cells.straight(width=0.5, length=5, layer=LAYER.WG)
+    with pytest.raises(PlacementError, match="overlaps"):
+        die.place(short, [(10.042, 41)])
+    die.place(short, [(10.043, 41)])
+    with pytest.raises(PlacementError, match="overlaps"):
+        die.place(straight, [(300, 990), (305, 990)])
+
+
+def test_die_large_array() -> None:
+    """Arrays at reticle scale are checked without placing every copy."""
+    die = Die(size=(26_000, 33_000))
+    straight = cells.straight(width=0.5, length=10, layer=LAYER.WG)
+    start = time.perf_counter()
+    die.place_array(straight, (0, 1), pitch=(100, 100), columns=160, rows=160)
+    die.place_array(straight, (50, 1), pitch=(100, 100), columns=160, rows=160)
+    assert time.perf_counter() - start < 5
+    with pytest.raises(PlacementError):
+        die.place_array(straight, (15_905, 15_801), pitch=(100, 100))
@@ -0,0 +1,203 @@
+import sys
+from collections.abc import Iterator
+
+import kfactory as kf
+import pytest
+
+from kgeneric import LAYER, cache, cells
+from kgeneric.cache import (
+    cache_info,
+    cache_scope,
+    factory_cache,
+    pin,
+    prune,
+    release,
+    set_cache_limit,
+    unpin,
+    unreachable,
+)
+from kgeneric.cells import dbu
+from kgeneric.serialize import dumps, loads
+
+
+def _alive(c) -> bool:
+    return not c._kdb_cell._destroyed()
+
+
+def test_scope_releases_intermediates() -> None:
+    """Cells created in a scope are deleted, unless kept or used outside."""
+    straight = dbu.straight(500, 4321, LAYER.WG)
+    with cache_scope() as scope:
+        coupler = cells.coupler(gap=0.217)
+        kept = dbu.straight(500, 4322, LAYER.WG)
+        scope.keep(kept)
+        used = dbu.straight(500, 4321, LAYER.WG)
+    assert coupler in scope.cells and not _alive(coupler)
+    assert _alive(kept) and _alive(used) and used is straight
+    # the factory cache forgot the deleted cell
+    again = cells.coupler(gap=0.217)
+    assert _alive(again) and again is not coupler
+    assert release(again) >= 1
+    assert not _alive(again)
+
+
+def test_release_keeps_shared_children() -> None:
+    ring = cells.ring_single(gap=0.213, radius=7.1)
+    other = cells.ring_single(gap=0.214, radius=7.1)
+    children = [ring.kcl[ci] for ci in ring.called_cells()]
+    assert release(ring) == 1
+    assert not _alive(ring)
+    assert all(map(_alive, children))
+    assert release(other) == 1 + len(children)
+    assert not any(map(_alive, children))
+
+
+def _cached(name: str) -> bool:
+    return kf.kcl.layout.cell(name) is not None
+
+
+def test_lru_eviction() -> None:
+    """The least recently used top cells are evicted first."""
+    pinned = [dbu.straight(500, length, LAYER.WG) for length in (1, 2)]
+    pin(*pinned)
+    existing = cache_info().cells
+    set_cache_limit(max_cells=existing + 4)
+    try:
+        cache_before = cache_info()
+        names = [dbu.straight(500, 5000 + i, LAYER.WG).name for i in range(3)]
+        # keep the first one in use
+        assert dbu.straight(500, 5000, LAYER.WG).name == names[0]
+        more = [dbu.straight(500, 6000 + i, LAYER.WG).name for i in range(3)]
+        info = cache_info()
+        assert info.cells <= existing + 4
+        assert info.evicted > cache_before.evicted
+        assert all(map(_alive, pinned))
+        assert _cached(more[-1])
+        assert not _cached(names[1])
+    finally:
+        set_cache_limit()
+        unpin(*pinned)
+
+
+def test_held_cells_are_not_evicted() -> None:
+    """Cells referenced by the caller stay valid when the limit is exceeded."""
+    set_cache_limit(max_cells=3)
+    try:
+        held = dbu.straight(500, 5500, LAYER.WG)
+        names = [dbu.straight(500, 5501 + i, LAYER.WG).name for i in range(5)]
+        assert _alive(held)
+        assert held.name.startswith("straight")
+        assert not _cached(names[0])
+        assert _cached(names[-1])
+    finally:
+        set_cache_limit()
+
+
+def test_memory_limit() -> None:
+    set_cache_limit(max_bytes=0)
+    try:
+        name = dbu.straight(500, 7777, LAYER.WG).name
+        assert _cached(name)
+        dbu.straight(500, 7778, LAYER.WG)
+        assert not _cached(name)
+    finally:
+        set_cache_limit()
+    assert cache_info().memory > 0
+
+
+@pytest.fixture(autouse=True)
+def _protect_other_cells() -> Iterator[None]:
+    """Cells of other tests must survive the limits set here."""
+    keys = set(cache._entries) - cache._pinned
+    cache._pinned.update(keys)
+    yield
+    set_cache_limit()
+    cache._pinned.difference_update(keys)
+
+
+def test_prune_after_flatten() -> None:
+    layout = kf.KCLayout("test_prune")
+    mzi = loads(dumps(cells.mzi()), layout)
+    flat = kf.KCell("test_prune_top", kcl=layout)
+    flat << loads(dumps(cells.coupler()), layout)
+    kept = loads(dumps(cells.ring_single()), layout)
+    pin(kept)
+    flat.flatten()
+    n = len(list(layout.layout.each_cell()))
+    assert mzi.cell_index() in unreachable(flat)
+    result = prune(flat)
+    assert result.cells == n - 2 - len(kept.called_cells())
+    assert result.memory > 0
+    assert _alive(flat) and _alive(kept) and not _alive(mzi)
+    assert len(list(layout.layout.each_cell())) == 2 + len(kept.called_cells())
+    assert set(layout.kcells) == {c.cell_index() for c in layout.layout.each_cell()}
+    children = len(kept.called_cells())
+    unpin(kept)
+    assert prune(flat).cells == 1 + children
+
+
+def test_prune_cleans_kfactory_caches() -> None:
+    """Cells of other kfactory factories are removed from their caches too."""
+    layout = kf.KCLayout("test_prune_kfactory")
+    layer = layout.layer(1, 0)
+
+    @kf.cell
+    def box(size: int) -> kf.KCell:
+        c = kf.KCell(kcl=layout)
+        c.shapes(layer).insert(kf.kdb.Box(size))
+        return c
+
+    top = kf.KCell("test_prune_kfactory_top", kcl=layout)
+    b = box(1000)
+    assert factory_cache(box)
+    assert prune(top).cells == 1
+    assert not _alive(b)
+    assert not factory_cache(box)
+    assert _alive(box(1000))
+
+
+def test_prune_needs_top() -> None:
+    with pytest.raises(ValueError):
+        prune()
+
+
+def _entry(name: str) -> cache._Entry:
+    return next(e for e in cache._entries.values() if e.cell.name == name)
+
+
+def test_reference_sources() -> None:
+    """The references counted as internal are exactly those of a cached cell.
+
+    Each source assumed by the eviction is checked: the tracking entry, the
+    factory cache, the layout, the `d` accessor of the cell and cache scopes.
+    """
+    name = dbu.straight(500, 5600, LAYER.WG).name
+    entry = _entry(name)
+    assert sum(v is entry.cell for v in entry.cache.values()) == 1
+    assert entry.cell.kcl.kcells[entry.cell.cell_index()] is entry.cell
+    assert entry.cell.d.parent is entry.cell
+    references = sys.getrefcount(entry.cell) - 1
+    assert references == cache._references(entry)
+    assert not cache._held(entry)
+    with cache_scope() as scope:
+        scope.keep(dbu.straight(500, 5601, LAYER.WG))
+        entry = _entry(dbu.straight(500, 5601, LAYER.WG).name)
+        references = sys.getrefcount(entry.cell) - 1
+        assert references == cache._references(entry)
+        assert not cache._held(entry)
+    held = dbu.straight(500, 5600, LAYER.WG)
+    assert cache._held(_entry(name))
+    del held
+    assert not cache._held(_entry(name))
+
+
+def test_limit_uses_running_totals() -> None:
+    """The totals follow tracked and deleted cells without a scan."""
+    set_cache_limit(max_bytes=2**40)
+    try:
+        name = dbu.straight(500, 5700, LAYER.WG).name
+        assert cache._bytes == sum(e.memory or 0 for e in cache._entries.values())
+        release(kf.kcl[name])
+        assert cache._bytes == sum(e.memory or 0 for e in cache._entries.values())
+    finally:
+        set_cache_limit()
@@ -0,0 +1,22 @@
+from kgeneric import cells
+
+
+def test_coupler_shares_sbend() -> None:
+    """All four arms are instances of one s-bend cell."""
+    c = cells.coupler(gap=0.25, length=12)
+    children = [inst.cell.name for inst in c.each_inst()]
+    assert len(children) == 5
+    assert len(set(children)) == 2
+    assert c.ports["o1"].y == -c.ports["o2"].y
+    assert c.ports["o3"].x - 12000 == -c.ports["o2"].x
+    assert c.ports["o3"].y == c.ports["o2"].y
+
+
+def test_coupler_sweep_reuses_sbend() -> None:
+    """Sweeping the coupling length builds no new s-bend."""
+    kcl = cells.coupler(length=5).kcl
+    n = kcl.layout.cells()
+    for length in [6, 7, 8]:
+        cells.coupler(length=length)
+    # a coupler, a straight coupler and a straight per length
+    assert kcl.layout.cells() == n + 3 * 3
@@ -0,0 +1,86 @@
+import kfactory as kf
+import numpy as np
+import pytest
+
+from kgeneric import LAYER, cells, gpdk
+from kgeneric.cross_section import CrossSection
+from kgeneric.routing import route_sc, route_xs
+
+enclosure = kf.LayerEnclosure(
+    [(LAYER.WGCLAD, 2000), (LAYER.SLAB90, 500, 1500)], name="XSTEST"
+)
+
+
+def test_hash_and_equality() -> None:
+    xs = CrossSection(500, LAYER.WG, enclosure)
+    same = CrossSection(
+        500,
+        LAYER.WG,
+        kf.LayerEnclosure([(LAYER.SLAB90, 500, 1500), (LAYER.WGCLAD, 2000)]),
+    )
+    assert xs == same and hash(xs) == hash(same)
+    assert xs.name == same.name
+    assert xs != CrossSection(600, LAYER.WG, enclosure)
+    assert {xs: 1}[same] == 1
+    with pytest.raises(AttributeError):
+        xs.width = 600  # type: ignore[misc]
+    with pytest.raises(ValueError):
+        CrossSection(501, LAYER.WG)
+
+
+def test_edges() -> None:
+    xs = CrossSection(500, LAYER.WG, enclosure)
+    assert xs.sections == ((LAYER.WGCLAD, None, 2000), (LAYER.SLAB90, 500, 1500))
+    assert xs.layers == (LAYER.WGCLAD, LAYER.SLAB90, LAYER.SLAB90)
+    np.testing.assert_array_equal(xs.edges, [[2250, -2250], [1750, 750], [-750, -1750]])
+    assert not xs.edges.flags.writeable
+
+
+def test_factories_accept_cross_section() -> None:
+    """Cells are the same as with width, layer and enclosure given explicitly."""
+    xs = CrossSection.from_um(0.5, LAYER.WG, enclosure)
+    assert cells.straight_dbu(length=1000, cross_section=xs) is cells.straight_dbu(
+        500, 1000, LAYER.WG, enclosure
+    )
+    assert cells.straight(length=1, cross_section=xs) is cells.straight(
+        0.5, 1, LAYER.WG, enclosure
+    )
+    assert cells.bend_euler(radius=10, cross_section=xs) is cells.bend_euler(
+        0.5, 10, LAYER.WG, enclosure
+    )
+    assert cells.dbu.bend_circular(
+        radius=10_000, cross_section=xs
+    ) is cells.dbu.bend_circular(500, 10_000, LAYER.WG, enclosure)
+    assert cells.taper(
+        width1=0.5, width2=1, length=10, cross_section=xs
+    ) is cells.taper(0.5, 1, 10, LAYER.WG, enclosure)
+    assert cells.ring_single(cross_section=xs) is cells.ring_single(
+        width=0.5, layer=LAYER.WG, enclosure=enclosure
+    )
+    assert cells.spiral_euler(cross_section=xs) is cells.spiral_euler(
+        width=0.5, layer=LAYER.WG, enclosure=enclosure
+    )
+    # explicit parameters win
+    wide = cells.straight_dbu(width=1000, length=1000, cross_section=xs)
+    assert wide.ports["o1"].width == 1000
+
+
+def test_dwidth_in_name() -> None:
+    """The width in um has no floating point noise in the names."""
+    xs = CrossSection(700, LAYER.WG)
+    assert xs.dwidth == 0.7
+    c = cells.bend_euler(radius=10, cross_section=xs)
+    assert c.name.startswith("bend_euler_W0p7_")
+
+
+def test_route_xs() -> None:
+    """A route with the strip cross section equals the strip route."""
+    lengths = []
+    for route in (route_sc, lambda *args, **kw: route_xs(*args, gpdk.xs_sc, **kw)):
+        c = kf.KCell()
+        s1 = c << gpdk.straight_sc()
+        s2 = c << gpdk.straight_sc()
+        s2.d.move((60, 40))
+        insts = route(c, s1.ports["o2"], s2.ports["o1"], length_key="route")
+        lengths.append((c.info["route"], sorted(i.cell.name for i in insts)))
+    assert lengths[0] == lengths[1]
@@ -0,0 +1,34 @@
+import pytest
+from kfactory import kdb
+
+from kgeneric import LAYER, cells, gpdk
+from kgeneric.cells import dbu
+
+
+@pytest.mark.parametrize("angle", [90, 180, 270])
+def test_bend_euler_dbu(angle: int) -> None:
+    """The dbu euler bend matches the um one and ends on its port."""
+    c = dbu.bend_euler(500, 10000, LAYER.WG, gpdk.enclosure_sc, angle=angle)
+    ref = cells.bend_euler(0.5, 10, LAYER.WG, gpdk.enclosure_sc, angle=angle)
+    assert c.ports["o2"].trans == ref.ports["o2"].trans
+    assert c.info["length_um"] == pytest.approx(ref.info["length_um"])
+    region = kdb.Region(c.begin_shapes_rec(LAYER.WG))
+    ref_region = kdb.Region(ref.begin_shapes_rec(LAYER.WG))
+    # at most about a dbu of difference along the edges
+    assert (region ^ ref_region).area() < 2 * 4 * c.info["length_um"] * 1000
+
+
+def test_bend_circular_dbu() -> None:
+    """Ports of the dbu circular bend are exactly at the radius."""
+    c = dbu.bend_circular(500, 10000, LAYER.WG, angle=90)
+    assert c.ports["o2"].trans == kdb.Trans(1, False, 10000, 10000)
+    region = kdb.Region(c.begin_shapes_rec(LAYER.WG))
+    assert region.area() == pytest.approx(500 * c.info["length_um"] * 1000, rel=1e-3)
+
+
+def test_bend_s_dbu() -> None:
+    """The dbu s-bend has the same backbone length as the um one."""
+    c = dbu.bend_s(500, 10000, 20000, LAYER.WG)
+    ref = gpdk.bend_s_sc()
+    assert c.ports["o2"].trans == kdb.Trans(0, False, 20000, 10000)
+    assert c.info["length_um"] == pytest.approx(ref.info["length_um"])
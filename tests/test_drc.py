@@ -0,0 +1,103 @@
+from functools import partial
+
+import kfactory as kf
+import pytest
+
+from kgeneric import LAYER, cells, gpdk
+from kgeneric.drc import (
+    MinArea,
+    MinEnclosure,
+    Rule,
+    check_drc,
+    drc_markers,
+    violations,
+)
+
+
+@pytest.fixture
+def violating() -> kf.KCell:
+    c = kf.KCell()
+    narrow = c << cells.straight(width=0.1, length=5, layer=LAYER.WG)
+    narrow.d.move((0, 10))
+    small = c << cells.straight(width=0.2, length=0.2, layer=LAYER.WG)
+    small.d.move((20, 10))
+    for y in (30, 30.6):
+        wg = c << cells.straight(
+            width=0.5, length=5, layer=LAYER.WG, enclosure=gpdk.enclosure_sc
+        )
+        wg.d.move((0, y))
+    return c
+
+
+def test_clean() -> None:
+    c = kf.KCell()
+    c << gpdk.straight_sc()
+    bend = c << gpdk.bend_euler_sc()
+    bend.d.move((20, 0))
+    assert violations(check_drc(c)) == {}
+    assert c.shapes(LAYER.DRC_MARKER).is_empty()
+
+
+def test_violations(violating: kf.KCell) -> None:
+    results = check_drc(violating)
+    assert violations(results) == {
+        "WG.width": 1,
+        "WG.space": 1,
+        "WG.area": 1,
+    }
+    assert results["WG.width"].bbox() == kf.kdb.Box(0, 9950, 5000, 10050)
+    assert results["WG.area"].bbox() == kf.kdb.Box(20000, 9900, 20200, 10100)
+    assert violating.shapes(LAYER.DRC_MARKER).is_empty()
+    markers = drc_markers(violating, results)
+    assert markers.shapes(LAYER.DRC_MARKER).size() == 3
+    assert [markers.kcl[ci] for ci in markers.each_child_cell()] == [violating]
+
+
+def test_required_enclosure(violating: kf.KCell) -> None:
+    """The waveguides without cladding violate a required enclosure."""
+    rules = [MinEnclosure(LAYER.WG, 1.95, required=True)]
+    assert violations(check_drc(violating, rules)) == {"WG.enclosure.WGCLAD": 2}
+
+
+@pytest.mark.parametrize(
+    "factory",
+    [
+        *(f for f in vars(gpdk).values() if isinstance(f, partial)),
+        partial(cells.coupler, enclosure=gpdk.enclosure_sc),
+        partial(cells.mzi, enclosure=gpdk.enclosure_sc),
+    ],
+)
+def test_clean_cells(factory: partial[kf.KCell]) -> None:
+    """The cells of the generic PDK pass its rules."""
+    assert violations(check_drc(factory())) == {}
+
+
+def test_factory_cell_is_not_modified() -> None:
+    """Checking a cached, locked cell leaves it unchanged."""
+    c = cells.mzi(enclosure=gpdk.enclosure_sc)
+    results = check_drc(c)
+    assert c.shapes(LAYER.DRC_MARKER).is_empty()
+    drc_markers(c, results)
+    assert c.shapes(LAYER.DRC_MARKER).is_empty()
+
+
+def test_rule_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        Rule(LAYER.WG, 1)  # type: ignore[abstract]
+
+
+def test_tiles(violating: kf.KCell) -> None:
+    """Markers do not depend on the tiles and threads."""
+    single = check_drc(violating)
+    tiled = check_drc(violating, tile_size=2, threads=4)
+    for name, region in single.items():
+        assert (region ^ tiled[name]).is_empty(), name
+
+
+def test_area_extent() -> None:
+    c = kf.KCell()
+    c << cells.straight(width=0.1, length=40, layer=LAYER.WG)
+    rules = [MinArea(LAYER.WG, 5)]
+    assert violations(check_drc(c, rules, tile_size=5)) == {}
+    rules = [MinArea(LAYER.WG, 5, extent=40)]
+    assert violations(check_drc(c, rules, tile_size=5)) == {"WG.area": 1}
@@ -0,0 +1,60 @@
+import pickle
+
+import kfactory as kf
+import pytest
+
+from kgeneric import LAYER, cells
+from kgeneric.enclosure import (
+    NO_ENCLOSURE,
+    InternedEnclosure,
+    intern_enclosure,
+    layer_enclosure,
+)
+
+
+def test_intern() -> None:
+    enclosure = layer_enclosure(
+        [(LAYER.WGCLAD, 1700), (LAYER.SLAB90, 300, 1300)], name="INTERNTEST"
+    )
+    same = kf.LayerEnclosure(
+        [(LAYER.SLAB90, 300, 1300), (LAYER.WGCLAD, 1700)], name="INTERNTEST"
+    )
+    unnamed = kf.LayerEnclosure([(LAYER.SLAB90, 300, 1300), (LAYER.WGCLAD, 1700)])
+    assert isinstance(enclosure, InternedEnclosure)
+    assert intern_enclosure(same) is enclosure
+    assert intern_enclosure(enclosure) is enclosure
+    assert enclosure.name == "INTERNTEST"
+    assert hash(enclosure) == hash(intern_enclosure(same))
+    assert intern_enclosure(kf.LayerEnclosure([(LAYER.WGCLAD, 1800)])) is not enclosure
+    assert intern_enclosure(unnamed) is not enclosure
+    assert intern_enclosure(unnamed) is layer_enclosure(
+        [(LAYER.WGCLAD, 1700), (LAYER.SLAB90, 300, 1300)]
+    )
+    assert pickle.loads(pickle.dumps(enclosure)) is enclosure
+    assert NO_ENCLOSURE.name == str(kf.LayerEnclosure())
+
+
+def test_immutable() -> None:
+    enclosure = layer_enclosure([(LAYER.WGCLAD, 1600)])
+    with pytest.raises(TypeError):
+        enclosure.main_layer = LAYER.WG
+    with pytest.raises(TypeError):
+        enclosure.add_section(LAYER.SLAB90, kf.enclosure.Section(d_max=500))
+
+
+def test_equal_enclosures_share_cells() -> None:
+    first = kf.LayerEnclosure([(LAYER.WGCLAD, 1500), (LAYER.SLAB90, 1000)])
+    second = kf.LayerEnclosure([(LAYER.SLAB90, 1000), (LAYER.WGCLAD, 1500)])
+    c1 = cells.straight_dbu(width=500, length=1234, layer=LAYER.WG, enclosure=first)
+    c2 = cells.straight_dbu(500, 1234, LAYER.WG, second)
+    assert c1 is c2
+
+
+def test_names_do_not_depend_on_order() -> None:
+    """A named enclosure names its cells, even if equal sections were used."""
+    cells.straight_dbu(500, 1235, LAYER.WG, kf.LayerEnclosure([(LAYER.WGCLAD, 1500)]))
+    named = kf.LayerEnclosure([(LAYER.WGCLAD, 1500)], name="MYCLAD")
+    c = cells.straight_dbu(500, 1235, LAYER.WG, named)
+    assert c.name.endswith("_EMYCLAD")
+    sc = kf.LayerEnclosure([(LAYER.WGCLAD, 0, 2000)], name="MYSC")
+    assert cells.straight_dbu(500, 1235, LAYER.WG, sc).name.endswith("_EMYSC")
@@ -0,0 +1,42 @@
+import kfactory as kf
+import pytest
+
+from kgeneric import LAYER, cells
+from kgeneric.export import GdsLibraryWriter, write, write_library
+
+
+@pytest.mark.parametrize("suffix", [".oas", ".gds", ".gds.gz"])
+def test_library_writer(tmp_path, suffix: str) -> None:
+    """All cells end up in one file with their ports and info."""
+    tops = [
+        cells.straight(width=1, length=length, layer=LAYER.WG) for length in (3, 4)
+    ] + [cells.mzi(), cells.mzi(delta_length=20)]
+    filename = tmp_path / f"lib{suffix}"
+    if suffix == ".oas":
+        write_library(tops, filename)
+    else:
+        with GdsLibraryWriter(filename) as writer:
+            for c in tops:
+                writer.add(c)
+
+    kcl = kf.KCLayout(f"test_library_writer{suffix}")
+    kcl.read(filename)
+    names = {kf.kcl[ci].name for c in tops for ci in c.called_cells()}
+    names |= {c.name for c in tops}
+    assert {c.name for c in kcl.each_cell()} == names
+    mzi = kcl[tops[-1].name]
+    assert [p.name for p in mzi.ports] == [p.name for p in tops[-1].ports]
+    assert mzi.info["length_bot_um"] == pytest.approx(tops[-1].info["length_bot_um"])
+
+
+def test_oasis_is_not_streamed(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        GdsLibraryWriter(tmp_path / "lib.oas")
+
+
+def test_write_oasis(tmp_path) -> None:
+    """OASIS with CBLOCKs is smaller than GDS."""
+    c = cells.mzi()
+    write(c, tmp_path / "mzi.oas")
+    write(c, tmp_path / "mzi.gds")
+    assert (tmp_path / "mzi.oas").stat().st_size < (tmp_path / "mzi.gds").stat().st_size
@@ -0,0 +1,58 @@
+import os
+
+import kfactory as kf
+import pytest
+from kfactory import kdb
+
+from kgeneric import LAYER, cells
+from kgeneric.export import GdsLibraryWriter
+from kgeneric.libindex import LibraryIndex, fingerprint
+
+
+def test_library_index(tmp_path) -> None:
+    """A single cell is read from the index with its children, ports and info."""
+    tops = [
+        cells.straight(width=1, length=length, layer=LAYER.WG)
+        for length in range(1, 50)
+    ] + [cells.mzi()]
+    filename = tmp_path / "lib.gds"
+    with GdsLibraryWriter(filename) as writer:
+        for c in tops:
+            writer.add(c)
+    LibraryIndex.build(filename).save()
+
+    index = LibraryIndex.load(filename)
+    mzi = tops[-1]
+    assert index.fingerprint(mzi.name) == fingerprint(mzi)
+    assert index.matches(mzi)
+    assert not index.matches(cells.mzi(delta_length=20))
+
+    kcl = kf.KCLayout("test_library_index")
+    c = index.read_cell(mzi.name, kcl)
+    assert len(list(kcl.each_cell())) == len(index.hierarchy(mzi.name))
+    assert [p.name for p in c.ports] == [p.name for p in mzi.ports]
+    assert c.info["length_top_um"] == pytest.approx(mzi.info["length_top_um"])
+    region = kdb.Region(c.begin_shapes_rec(kcl.layer(1, 0)))
+    assert (region ^ kdb.Region(mzi.begin_shapes_rec(LAYER.WG))).is_empty()
+
+
+def test_library_changed(tmp_path) -> None:
+    """An index is rejected once its library was rewritten, even at equal size."""
+    filename = tmp_path / "lib.gds"
+    c1, c2 = (
+        cells.straight(width=1, length=length, layer=LAYER.WG) for length in (1, 2)
+    )
+    with GdsLibraryWriter(filename) as writer:
+        writer.add(c1)
+    index = LibraryIndex.build(filename)
+    index.save()
+    with GdsLibraryWriter(filename) as writer:
+        writer.add(c2)
+    # the timestamp resolution of the file system may be coarse
+    os.utime(filename, ns=(index.mtime_ns, index.mtime_ns + 1))
+
+    assert filename.stat().st_size == index.size
+    with pytest.raises(ValueError, match="changed"):
+        LibraryIndex.load(filename)
+    with pytest.raises(ValueError, match="changed"):
+        index.read_cell(c1.name, kf.KCLayout("test_library_changed"))
@@ -0,0 +1,23 @@
+from kfactory import kdb
+
+from kgeneric import cells
+
+
+def test_mzi_incremental_matches_mzi() -> None:
+    """The incremental MZI has the ports, lengths and geometry of the MZI."""
+    a = cells.mzi(delta_length=20, length_x=1)
+    b = cells.mzi_incremental(delta_length=20, length_x=1)
+    assert [p.trans for p in a.ports] == [p.trans for p in b.ports]
+    assert a.info["length_bot_um"] == b.info["length_bot_um"]
+    region_a = kdb.Region(a.begin_shapes_rec(0)).merged()
+    region_b = kdb.Region(b.begin_shapes_rec(0)).merged()
+    assert (region_a ^ region_b).is_empty()
+
+
+def test_mzi_incremental_sweep() -> None:
+    """A sweep of delta_length creates one straight and one MZI per point."""
+    kcl = cells.mzi_incremental(delta_length=1.0038).kcl
+    n = kcl.layout.cells()
+    for i in range(20):
+        cells.mzi_incremental(delta_length=1.0062 + 0.0024 * i)
+    assert kcl.layout.cells() == n + 2 * 20
@@ -0,0 +1,71 @@
+import kfactory as kf
+import pytest
+from kfactory import kdb
+
+from kgeneric import LAYER, cells, gpdk
+from kgeneric.pool import CellMerger, CellPool, build_bytes
+
+
+def _regions(c: kf.KCell) -> dict[str, kdb.Region]:
+    return {
+        c.kcl.get_info(layer).to_s(): kdb.Region(c.begin_shapes_rec(layer)).merged()
+        for layer in c.kcl.layer_indexes()
+        if not c.bbox_per_layer(layer).empty()
+    }
+
+
+def test_merge_into_private_layout() -> None:
+    """The tree is copied with shapes, ports and info, once."""
+    c = cells.ring_single(gap=0.23, enclosure=gpdk.enclosure_sc)
+    target = kf.KCLayout("test_pool_target")
+    merger = CellMerger(target)
+    data = build_bytes("ring_single", {"gap": 0.23, "enclosure": gpdk.enclosure_sc})
+    merged = merger.merge_bytes(data)
+    assert merged.name == c.name
+    assert target.layout.cells() == 1 + len(c.called_cells())
+    assert [(p.name, p.trans, p.width) for p in merged.ports] == [
+        (p.name, p.trans, p.width) for p in c.ports
+    ]
+    assert merged.info["length_um"] == pytest.approx(c.info["length_um"])
+    expected = _regions(c)
+    regions = _regions(merged)
+    assert regions.keys() == expected.keys()
+    for layer, region in regions.items():
+        assert (region ^ expected[layer]).is_empty()
+
+    assert merger.merge_bytes(data).cell_index() == merged.cell_index()
+    assert target.layout.cells() == 1 + len(c.called_cells())
+
+
+def test_merge_reuses_existing_cells() -> None:
+    """Cells which are already in kcl are not copied."""
+    c = cells.ring_single(gap=0.27)
+    n = c.kcl.layout.cells()
+    merger = CellMerger()
+    merged = merger.merge_bytes(build_bytes(cells.ring_single, {"gap": 0.27}))
+    assert merged.cell_index() == c.cell_index()
+    assert merger.added == 0
+    assert c.kcl.layout.cells() == n
+
+
+def test_pool_shares_children() -> None:
+    """A sweep built by the workers shares the quarter bend."""
+    target = kf.KCLayout("test_pool_sweep")
+    gaps = [0.31, 0.32, 0.33]
+    with CellPool(2, target=target) as pool:
+        rings = pool.map("ring_single", [{"gap": gap} for gap in gaps])
+    assert [c.name for c in rings] == [cells.ring_single(gap=gap).name for gap in gaps]
+    # three rings, one quarter bend and one bus straight
+    assert target.layout.cells() == 5
+    assert pool.merger.reused == 2 * (len(gaps) - 1)
+
+
+def test_pool_fills_factory_caches() -> None:
+    """The main process reuses the cells merged from the workers."""
+    with CellPool(1) as pool:
+        (ring,) = pool.map("ring_single", [{"gap": 0.41}])
+    assert cells.ring_single(gap=0.41) is ring
+    names = [c.name for c in ring.kcl.each_cell()]
+    assert len(names) == len(set(names))
+    bend = cells.dbu.bend_circular(500, 10000, LAYER.WG, angle=90)
+    assert bend.cell_index() in ring.called_cells()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from kfactory import kdb
+
+from kgeneric import LAYER, cells, gpdk
+from kgeneric.cells import dbu
+
+
+@pytest.mark.parametrize("length_x,length_y", [(0, 0), (6000, 0), (6000, 2000)])
+def test_ring_closed(length_x: int, length_y: int) -> None:
+    """The ring is one closed loop at `gap` from the bus."""
+    c = dbu.ring_single(
+        500, 10000, 200, LAYER.WG, gpdk.enclosure_sc, length_x, length_y
+    )
+    region = kdb.Region(c.begin_shapes_rec(LAYER.WG)).merged()
+    assert region.count() == 2
+    ring = next(p for p in region.each() if p.holes())
+    assert ring.holes() == 1
+    assert region.space_check(201).count() > 0
+    assert region.space_check(200).is_empty()
+    length = 2 * np.pi * 10 + 2 * (length_x + length_y) / 1000
+    assert c.info["length_um"] == pytest.approx(length)
+
+
+def test_ring_double_ports() -> None:
+    """The drop bus is at the same gap above the ring."""
+    c = cells.ring_double(gap=0.3, radius=5, length_y=1)
+    assert c.ports["o3"].trans.disp.y == 2 * (300 + 500) + 10000 + 1000
+    assert c.ports["o4"].trans == kdb.Trans(0, False, 5000, c.ports["o3"].y)
+
+
+def test_ring_sweep_reuses_bends() -> None:
+    """Sweeping the gap creates no new bend or straight cells."""
+    kcl = cells.ring_single(gap=0.2).kcl
+    n = kcl.layout.cells()
+    for gap in [0.25, 0.35, 0.45]:
+        cells.ring_single(gap=gap)
+    assert kcl.layout.cells() == n + 3
@@ -0,0 +1,178 @@
+import kfactory as kf
+import pytest
+from kfactory import kdb
+
+from kgeneric import LAYER, cells, gpdk
+from kgeneric.cells.mzi import mzi_routed
+from kgeneric.collision import CollisionError, CollisionGuard
+from kgeneric.fanout import fanout_grating_couplers
+from kgeneric.length import chain_length, route_length
+from kgeneric.quantized import straight_segments
+from kgeneric.routing import route_sc, route_sc_length_matched, route_sc_quantized
+
+
+def test_collision_guard() -> None:
+    """A route through an existing straight is a collision, a free one is not."""
+    c = kf.KCell()
+    s1 = c << gpdk.straight_sc()
+    s2 = c << gpdk.straight_sc()
+    s2.d.move((60, 0))
+    blocker = c << gpdk.straight_sc(length=5)
+    blocker.d.move((30, 0))
+
+    guard = CollisionGuard(c)
+    with pytest.raises(CollisionError):
+        guard.route(s1.ports["o2"], s2.ports["o1"], route_function=route_sc)
+
+    c = kf.KCell()
+    s1 = c << gpdk.straight_sc()
+    s2 = c << gpdk.straight_sc()
+    s2.d.move((50, 50))
+    guard = CollisionGuard(c)
+    insts = guard.route(s1.ports["o2"], s2.ports["o1"], route_function=route_sc)
+    assert insts
+    assert not guard.collisions
+
+
+def test_straight_segments() -> None:
+    """Quantized segments add up to the exact length."""
+    for length in [0, 1, 999, 2**16, 200_123, 1_234_567]:
+        segments = straight_segments(length, max_segment=2**16, min_segment=4)
+        assert sum(s * n for s, n in segments) == length
+        assert len(segments) <= 16
+
+
+def test_route_quantized() -> None:
+    """Quantized routes have the same geometry as plain routes."""
+    c = kf.KCell()
+    c_ref = kf.KCell()
+    for cell, route_function in [(c, route_sc_quantized), (c_ref, route_sc)]:
+        s1 = cell << gpdk.straight_sc()
+        s2 = cell << gpdk.straight_sc()
+        s2.d.move((123.457, 71.003))
+        n_cells = len(list(cell.kcl.layout.each_cell()))
+        insts = route_function(cell, s1.ports["o2"], s2.ports["o1"])
+        assert list(cell.insts)[2:] == insts
+        # no scratch or placeholder cells are left behind
+        n_route_cells = len({i.cell_index for i in insts})
+        assert len(list(cell.kcl.layout.each_cell())) <= n_cells + n_route_cells
+
+    for layer in c.kcl.layer_indexes():
+        region = kdb.Region(c.begin_shapes_rec(layer))
+        region_ref = kdb.Region(c_ref.begin_shapes_rec(layer))
+        assert (region ^ region_ref).is_empty()
+
+
+def test_route_length() -> None:
+    """The chain length along a route matches the sum of the route instances."""
+    c = kf.KCell()
+    s1 = c << gpdk.straight_sc()
+    s2 = c << gpdk.straight_sc()
+    s2.d.move((150, 50))
+    insts = route_sc(c, s1.ports["o2"], s2.ports["o1"], length_key="route_um")
+    length, chain = chain_length(c, s1.ports["o2"], s2.ports["o1"])
+    assert len(chain) == len(insts)
+    assert length == pytest.approx(c.info["route_um"])
+    assert length == pytest.approx(route_length(insts))
+
+
+def test_mzi_arm_lengths() -> None:
+    """The arm length difference of the mzi is the delta_length."""
+    c = cells.mzi(delta_length=30)
+    assert c.info["length_bot_um"] - c.info["length_top_um"] == pytest.approx(30)
+
+
+def test_route_length_matched() -> None:
+    """Matched routes hit their length differences."""
+    c = kf.KCell()
+    ports1 = []
+    ports2 = []
+    for i in range(4):
+        s1 = c << gpdk.straight_sc()
+        s1.d.move((0, 20 * i))
+        s2 = c << gpdk.straight_sc()
+        s2.d.move((300, 150 + 30 * i))
+        ports1.append(s1.ports["o2"])
+        ports2.append(s2.ports["o1"])
+    deltas = [0, 10, 25.5, 3]
+    lengths = route_sc_length_matched(c, ports1, ports2, delta_lengths=deltas)
+    measured = [chain_length(c, p1, p2)[0] for p1, p2 in zip(ports1, ports2)]
+    assert measured == pytest.approx(lengths)
+    for length, delta in zip(lengths, deltas):
+        assert length - lengths[0] == pytest.approx(delta, abs=0.002)
+
+
+def test_fanout_grating_couplers() -> None:
+    """Every port gets its own grating coupler and the routes don't touch."""
+    coupler = cells.coupler(length=300, dy=40)
+    c = fanout_grating_couplers(coupler)
+    assert [p.name for p in c.ports] == ["fl1", "fl2", "fl3", "fl4"]
+    assert sum(inst.size() for inst in c.insts if inst.size() > 1) == 4
+
+    ref = next(inst for inst in c.insts if inst.cell.name == coupler.name)
+    routes = []
+    for port in ref.ports:
+        _, insts = chain_length(c, port)
+        region = kdb.Region()
+        for inst in insts:
+            region += kdb.Region(inst.cell.begin_shapes_rec(LAYER.WG)).transformed(
+                inst.cplx_trans
+            )
+        routes.append(region)
+    for i, r1 in enumerate(routes):
+        for r2 in routes[i + 1 :]:
+            assert (r1 & r2).is_empty()
+
+
+def test_fanout_port_width() -> None:
+    """Ports wider than the grating coupler are routed at their width."""
+    mzi = cells.mzi()
+    assert {p.width for p in mzi.ports} == {1000}
+    c = fanout_grating_couplers(mzi)
+    assert [p.name for p in c.ports] == ["fl1", "fl2", "fl3", "fl4"]
+    tapers = [inst for inst in c.insts if inst.cell.name.startswith("taper")]
+    assert len(tapers) == 4
+    assert {inst.cell.ports["o2"].width for inst in tapers} == {1000}
+
+
+def test_mzi_routed() -> None:
+    """Checked routes give the geometry of the plain mzi under another name."""
+    c = mzi_routed()
+    c_ref = cells.mzi()
+    assert c.name != c_ref.name
+    for layer in c.kcl.layer_indexes():
+        region = kdb.Region(c.begin_shapes_rec(layer))
+        region_ref = kdb.Region(c_ref.begin_shapes_rec(layer))
+        assert (region ^ region_ref).is_empty()
+
+
+def test_mzi_routed_quantized() -> None:
+    c = mzi_routed(quantize_routes=True, delta_length=200)
+    c_ref = cells.mzi(delta_length=200)
+    assert c.name.startswith("mzi_routed_CCTrue_QRTrue")
+    for layer in c.kcl.layer_indexes():
+        region = kdb.Region(c.begin_shapes_rec(layer))
+        region_ref = kdb.Region(c_ref.begin_shapes_rec(layer))
+        assert (region ^ region_ref).is_empty()
+
+
+def test_fanout_close_ports() -> None:
+    """South ports less than two radii off their grating coupler get s-bends."""
+    device = kf.KCell()
+    device.shapes(LAYER.WG).insert(kdb.Box(0, 0, 130_000, 10_000))
+    for name, x in [("o1", 5_000), ("o2", 125_000)]:
+        device.create_port(
+            name=name,
+            trans=kdb.Trans(3, False, x, 0),
+            width=500,
+            layer=LAYER.WG,
+            port_type="optical",
+        )
+    c = fanout_grating_couplers(device)
+    assert [p.name for p in c.ports] == ["fl1", "fl2"]
+    sbends = [inst for inst in c.insts if inst.cell.name.startswith("bend_s")]
+    assert len(sbends) == 2
+    ref = next(inst for inst in c.insts if inst.cell.name == device.name)
+    for port in ref.ports:
+        _, insts = chain_length(c, port)
+        assert any(inst in sbends for inst in insts)
@@ -0,0 +1,70 @@
+import kfactory as kf
+import numpy as np
+from kfactory import kdb
+
+from kgeneric import LAYER, cells, gpdk
+from kgeneric.serialize import CellData, dumps, loads, to_shared_memory
+
+
+def _assert_equal(c: kf.KCell, loaded: kf.KCell) -> None:
+    for layer in c.kcl.layer_indexes():
+        target = loaded.kcl.layout.layer(c.kcl.get_info(layer))
+        expected = kdb.Region(c.begin_shapes_rec(layer))
+        assert (kdb.Region(loaded.begin_shapes_rec(target)) ^ expected).is_empty()
+    assert [(p.name, p.width, p.port_type, str(p.dcplx_trans)) for p in c.ports] == [
+        (p.name, p.width, p.port_type, str(p.dcplx_trans)) for p in loaded.ports
+    ]
+    assert loaded.info == c.info
+    assert loaded.settings == c.settings
+
+
+def test_roundtrip() -> None:
+    """Shapes, hierarchy, ports, info and settings survive."""
+    c = cells.mzi()
+    loaded = loads(dumps(c), kf.KCLayout("test_serialize"))
+    assert loaded.name == c.name
+    assert len(loaded.called_cells()) == len(c.called_cells())
+    _assert_equal(c, loaded)
+
+
+def test_roundtrip_instances_and_texts() -> None:
+    """Arrays, complex instances, holes, texts and off-grid ports."""
+    bend = cells.bend_circular(width=0.5, radius=5, layer=LAYER.WG, angle=30)
+    c = kf.KCell("test_serialize_instances")
+    c.create_inst(
+        bend,
+        kdb.Trans(1, True, 100, 200),
+        na=3,
+        nb=2,
+        a=kdb.Vector(20000, 0),
+        b=kdb.Vector(0, 30000),
+    )
+    c.create_inst(bend, kdb.ICplxTrans(1, 17, False, 5, 7))
+    polygon = kdb.Polygon(kdb.Box(-5000, -5000, 5000, 5000))
+    polygon.insert_hole(kdb.Box(-1000, -1000, 1000, 1000))
+    c.shapes(LAYER.WGCLAD).insert(polygon)
+    c.shapes(LAYER.TEXT).insert(kdb.Text("label", kdb.Trans(3, 4)))
+    c.add_port(bend.ports["o2"].copy(kdb.DCplxTrans(1, 17, False, 0.005, 0.007)))
+    c.info["count"] = 3
+    loaded = loads(dumps(c), kf.KCLayout("test_serialize_instances"))
+    _assert_equal(c, loaded)
+    texts = list(
+        loaded.shapes(loaded.kcl.layout.layer(kf.kcl.get_info(LAYER.TEXT))).each()
+    )
+    assert [t.text.string for t in texts] == ["label"]
+
+
+def test_zero_copy_shared_memory() -> None:
+    c = cells.ring_single(gap=0.29, enclosure=gpdk.enclosure_sc)
+    shm = to_shared_memory(c)
+    try:
+        data = CellData.from_buffer(shm.buf)
+        assert not data.vertices.flags.owndata
+        assert data.vertices.dtype == np.dtype("<i4")
+        assert data.vertices.shape == (data.contours.sum(), 2)
+        loaded = data.to_kcell(kf.KCLayout("test_serialize_shm"))
+        _assert_equal(c, loaded)
+        del data
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,103 @@
+import asyncio
+from pathlib import Path
+
+import kfactory as kf
+import pytest
+from kfactory import kdb
+
+from kgeneric import cells
+from kgeneric.service import CellClient, CellService, ServiceError, request_key
+
+
+def test_request_key() -> None:
+    assert request_key("straight", {"width": 1, "length": 2}) == request_key(
+        "straight", {"length": 2, "width": 1}
+    )
+    assert request_key("ring_single", {"gap": 0.3}) == request_key(
+        "ring_single", {"gap": 0.3, "radius": 10}
+    )
+    assert request_key("ring_single", {"gap": 0.3}) != request_key(
+        "ring_single", {"gap": 0.3, "radius": 20}
+    )
+    with pytest.raises(KeyError):
+        request_key("no_such_factory", {})
+
+
+def test_warm_up() -> None:
+    """Every worker is initialized before the service accepts requests."""
+
+    async def run() -> CellService:
+        service = CellService(processes=2)
+        await service.start()
+        try:
+            assert service._executor is not None
+            assert len(service._executor._processes) == 2  # type: ignore[attr-defined]
+            await service.build("ring_single", {"gap": 0.35})
+            await service.build("ring_single", {"gap": 0.35, "radius": 10})
+        finally:
+            await service.close()
+        return service
+
+    service = asyncio.run(run())
+    assert service.misses == 1
+    assert service.hits == 1
+
+
+def test_service(tmp_path: Path) -> None:
+    """Concurrent identical requests are built once and shared by the clients."""
+    socket = tmp_path / "kgeneric.sock"
+    layout = kf.KCLayout("test_service")
+
+    async def run() -> tuple[CellService, list[kf.KCell]]:
+        service = CellService(processes=1)
+        await service.serve(socket)
+        clients = [await CellClient.connect(socket) for _ in range(3)]
+        try:
+            results = await asyncio.gather(
+                *(c.cell("ring_single", layout, gap=0.34) for c in clients)
+            )
+            results.append(await clients[0].cell("ring_single", layout, gap=0.34))
+            with pytest.raises(ServiceError, match="KeyError"):
+                await clients[1].get("no_such_factory")
+        finally:
+            for client in clients:
+                await client.close()
+            await service.close()
+        return service, results
+
+    service, results = asyncio.run(run())
+    assert service.misses == 1
+    assert service.coalesced + service.hits == 3
+    assert service.hits >= 1
+    assert len({c.cell_index() for c in results}) == 1
+    c = cells.ring_single(gap=0.34)
+    assert results[0].name == c.name
+    for layer in c.kcl.layer_indexes():
+        r = kdb.Region(
+            results[0].begin_shapes_rec(layout.layout.layer(c.kcl.get_info(layer)))
+        )
+        assert (r ^ kdb.Region(c.begin_shapes_rec(layer))).is_empty()
+
+
+def test_cancelled_request() -> None:
+    """Cancelling a request does not cancel the build for coalesced requests."""
+
+    async def run() -> tuple[CellService, bytes]:
+        service = CellService(processes=1)
+        await service.start()
+        try:
+            first = asyncio.create_task(service.build("ring_single", {"gap": 0.321}))
+            second = asyncio.create_task(service.build("ring_single", {"gap": 0.321}))
+            await asyncio.sleep(0)
+            first.cancel()
+            data = await second
+            with pytest.raises(asyncio.CancelledError):
+                await first
+        finally:
+            await service.close()
+        return service, data
+
+    service, data = asyncio.run(run())
+    assert data
+    assert service.misses == 1
+    assert service.coalesced == 1
@@ -0,0 +1,72 @@
+import numpy as np
+from kfactory import kdb
+
+from kgeneric import LAYER, gpdk
+from kgeneric.cells import dbu
+from kgeneric.simplify import (
+    simplification,
+    simplification_tolerance,
+    simplify_cell,
+    simplify_contour,
+    simplify_polygon,
+)
+
+
+def test_simplify_contour() -> None:
+    """Vertices within the tolerance are removed, the corners are kept."""
+    x = np.arange(0, 1001, 100)
+    top = np.stack([x, 100 + (x // 100) % 2], axis=1)
+    contour = np.concatenate([[(0, 0), (1000, 0)], top[::-1]])
+    simplified = simplify_contour(contour, 1)
+    assert sorted(map(tuple, simplified)) == [(0, 0), (0, 100), (1000, 0), (1000, 100)]
+    assert len(simplify_contour(contour, 0.5)) == len(contour)
+
+
+def test_simplify_polygon_within_tolerance() -> None:
+    """The simplified polygon deviates at most by the tolerance."""
+    polygon = kdb.Polygon(
+        kdb.DPolygon.ellipse(kdb.DBox(-10000, -5000, 10000, 5000), 500)
+    )
+    simplified = simplify_polygon(polygon, 2)
+    assert simplified.num_points() < polygon.num_points()
+    assert (kdb.Region(polygon) ^ kdb.Region(simplified)).sized(-3).is_empty()
+
+
+def test_simplification_of_cells() -> None:
+    """Cells created within the context report the removed vertices."""
+    with simplification(tolerance=1):
+        assert simplification_tolerance() == 1
+        c = dbu.bend_euler(700, 13000, LAYER.WG, gpdk.enclosure_sc)
+    assert simplification_tolerance() is None
+    assert c.info["vertices_removed"] > 0
+    n = sum(
+        p.polygon.num_points()
+        for layer in c.kcl.layer_indexes()
+        for p in c.shapes(layer).each(kdb.Shapes.SPolygons)
+    )
+    assert n == c.info["vertices"]
+
+
+def test_simplification_in_name() -> None:
+    """Cells simplified with different tolerances are cached separately."""
+    plain = dbu.bend_euler(900, 17000, LAYER.WG)
+    with simplification(tolerance=5):
+        coarse = dbu.bend_euler(900, 17000, LAYER.WG)
+    with simplification(tolerance=1):
+        fine = dbu.bend_euler(900, 17000, LAYER.WG)
+    assert dbu.bend_euler(900, 17000, LAYER.WG) is plain
+    assert "vertices_removed" not in plain.info
+    assert coarse.name == f"{plain.name}_ST5"
+    assert fine.name == f"{plain.name}_ST1"
+    assert coarse.info["vertices"] < fine.info["vertices"]
+
+
+def test_simplify_cell_keeps_geometry() -> None:
+    """Simplifying a bend keeps its outline within the tolerance."""
+    ref = dbu.bend_euler(500, 10000, LAYER.WG)
+    c = ref.dup()
+    removed = simplify_cell(c, 1)
+    assert removed == c.info["vertices_removed"] > 0
+    region = kdb.Region(c.shapes(LAYER.WG))
+    ref_region = kdb.Region(ref.shapes(LAYER.WG))
+    assert (region ^ ref_region).sized(-2).is_empty()
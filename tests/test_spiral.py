@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from kfactory import KCell, kdb
+
+from kgeneric import LAYER, gpdk
+from kgeneric.cells import dbu
+from kgeneric.cells.dbu.spiral import (
+    spiral_archimedean_backbone,
+    spiral_euler_backbone,
+)
+
+
+@pytest.mark.parametrize(
+    "backbone",
+    [
+        spiral_archimedean_backbone(10000, 3000, 3, angle_step=0.2),
+        spiral_euler_backbone(10000, 3000, 60000, 3, resolution=600),
+    ],
+)
+def test_spiral_length(
+    backbone: tuple[np.ndarray, np.ndarray, float],  # type: ignore[type-arg]
+) -> None:
+    """The analytic length matches the length of a fine backbone."""
+    points, _, length = backbone
+    assert np.hypot(*np.diff(points, axis=0).T).sum() == pytest.approx(length, 1e-5)
+
+
+@pytest.mark.parametrize(
+    "c",
+    [
+        dbu.spiral_archimedean(500, 10000, 3000, 4, LAYER.WG, gpdk.enclosure_sc),
+        dbu.spiral_euler(500, 10000, 3000, 60000, 4, LAYER.WG, gpdk.enclosure_sc),
+    ],
+    ids=["archimedean", "euler"],
+)
+def test_spiral_geometry(c: KCell) -> None:
+    """A spiral is a single polygon keeping the pitch, with ports on the grid."""
+    core = kdb.Region(c.shapes(LAYER.WG))
+    assert core.count() == 1
+    assert core.space_check(3000 - 500 - 10).is_empty()
+    assert c.ports["o1"].trans == kdb.Trans(2, False, 0, 0)
+    assert c.ports["o2"].trans.angle == 0
+    assert not list(c.each_inst())
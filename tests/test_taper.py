@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from kfactory import kdb
+
+from kgeneric import LAYER, cells, gpdk
+from kgeneric.cells.dbu.taper import taper_profile_points, taper_profiles
+
+
+@pytest.mark.parametrize("profile", ["linear", "parabolic", "exponential"])
+def test_taper_profile_tolerance(profile: str) -> None:
+    """The decimated edge stays within tolerance plus grid snapping."""
+    points = taper_profile_points(500, 10000, 100000, profile, 0.5)
+    x = np.arange(100001)
+    y = taper_profiles[profile](x / 100000, 500, 10000) / 2
+    assert np.abs(np.interp(x, points[:, 0], points[:, 1]) - y).max() <= 1
+    assert len(points) < 200
+    assert taper_profile_points(500, 10000, 100000, profile, 0.5) is points
+
+
+def test_taper_profile_enclosure() -> None:
+    """The slab is a constant distance above and below the core."""
+    c = cells.taper_profile(0.5, 10, 100, LAYER.WG, enclosure=gpdk.enclosure_sc)
+    slab = kdb.Region(c.begin_shapes_rec(LAYER.WGCLAD))
+    assert slab.area() == 2 * 2000 * 100000
+    assert (slab & kdb.Region(c.begin_shapes_rec(LAYER.WG))).is_empty()
+
+
+def test_taper_profile_callable_name() -> None:
+    """Callable profiles are named by a digest of their samples."""
+    c1 = cells.taper_profile(0.5, 3, 10, LAYER.WG, profile=lambda t, w1, w2: w1 + t)
+    c2 = cells.taper_profile(0.5, 3, 10, LAYER.WG, profile=lambda t, w1, w2: w1 + t)
+    c3 = cells.taper_profile(0.5, 3, 10, LAYER.WG, profile=lambda t, w1, w2: w2 - t)
+    assert "<lambda>" not in c1.name
+    assert "_Pprofile_" in c1.name
+    assert c1 is c2
+    assert c1.name != c3.name
@@ -0,0 +1,70 @@
+from collections.abc import Iterator
+
+import kfactory as kf
+import pytest
+
+from kgeneric import LAYER, cache, cells
+from kgeneric.cells import euler
+from kgeneric.export import GdsLibraryWriter
+from kgeneric.libindex import LibraryIndex
+from kgeneric.version import cell_version, factory_version, refresh
+
+
+@pytest.fixture(autouse=True)
+def _protect_other_cells() -> Iterator[None]:
+    """Cells of other tests must survive a refresh."""
+    keys = set(cache._entries) - cache._pinned
+    cache._pinned.update(keys)
+    yield
+    cache._pinned.difference_update(keys)
+
+
+def test_dependencies() -> None:
+    """Keys are stable and include the factories which are called."""
+    assert factory_version(cells.mzi) == factory_version(cells.mzi)
+    assert factory_version(cells.mzi) != factory_version(cells.coupler)
+
+
+def test_refresh_rebuilds_changed_factories(monkeypatch: pytest.MonkeyPatch) -> None:
+    bend = cells.bend_euler(width=0.5, radius=13.1, layer=LAYER.WG)
+    straight = cells.straight(width=0.5, length=13.1, layer=LAYER.WG)
+    version = cell_version(bend)
+    assert version == factory_version(cells.bend_euler)
+    assert refresh() == []
+
+    extrude_path = euler.extrude_path
+
+    def patched(*args, **kwargs):  # type: ignore[no-untyped-def]
+        return extrude_path(*args, **kwargs)
+
+    monkeypatch.setattr(euler, "extrude_path", patched)
+    assert factory_version(cells.bend_euler) != version
+    # straight returns the cell of straight_dbu
+    assert factory_version(cells.straight_dbu) == cell_version(straight)
+
+    changed = refresh([cells.bend_euler, cells.straight_dbu])
+    assert changed == ["bend_euler"]
+    assert bend._kdb_cell._destroyed()
+    assert not straight._kdb_cell._destroyed()
+    rebuilt = cells.bend_euler(width=0.5, radius=13.1, layer=LAYER.WG)
+    assert cell_version(rebuilt) == factory_version(cells.bend_euler)
+    assert refresh([cells.bend_euler]) == []
+
+
+def test_library_versions(tmp_path) -> None:  # type: ignore[no-untyped-def]
+    c = cells.ring_single(gap=0.211)
+    filename = tmp_path / "lib.gds"
+    with GdsLibraryWriter(filename) as writer:
+        writer.add(c)
+    index = LibraryIndex.build(filename)
+    assert not index.is_current(c.name)
+    index.record_versions(c)
+    index.save()
+    index = LibraryIndex.load(filename)
+    assert index.cells[c.name]["factory"] == "kgeneric.cells.dbu.ring:ring_single"
+    assert index.is_current(c.name)
+    index.cells[c.name]["factory_version"] = "outdated"
+    assert not index.is_current(c.name)
+    assert all(
+        "factory_version" in index.cells[kf.kcl[ci].name] for ci in c.called_cells()
+    )